@@ -0,0 +1,96 @@
+"""
+Benchmark: nurse board script-run time at 50, 500 and 5,000 patients.
+
+Runs the board headlessly with Streamlit's AppTest and times the render part
+of one script run, for the old layout (a DataFrame of every patient and a row
+of widgets per patient) and for board.render_board (one page of widgets,
+confirmed patients as a single static table). A fifth of the patients are
+confirmed, as on a board that has been running for a while.
+
+The old layout at 5,000 patients takes minutes per run; use --repeats 1.
+
+Usage:
+    python bench/bench_board_render.py --sizes 50 500 5000
+"""
+import argparse
+import os
+import statistics
+
+from streamlit.testing.v1 import AppTest
+
+SIMPLE_FRONTEND = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend")
+
+
+def board_script(simple_frontend: str, patients: int, layout: str):
+    import sys
+    import time
+
+    import pandas as pd
+    import streamlit as st
+
+    sys.path.insert(0, simple_frontend)
+    from board import render_board
+    from patient_record import TRIAGE_LEVELS, PatientRecord
+    from patient_store import PatientStore
+
+    store = PatientStore(max_archived=patients)
+    for i in range(patients):
+        record = {
+            "patient id": f"er_{i:04d}",
+            "time of arrival": f"{i // 60 % 24:02d}:{i % 60:02d}:00",
+            "chief complaint and reported symptoms": "Simple leg laceration.",
+            "triage level": TRIAGE_LEVELS[i % len(TRIAGE_LEVELS)],
+            "triaged?": "YES",
+        }
+        store.add(PatientRecord.from_payload(record))
+    for i in range(0, patients, 5):
+        store.confirm(f"er_{i:04d}")
+
+    start = time.perf_counter()
+    if layout == "paged":
+        render_board(store, lambda record, level: None)
+    else:
+        # The board before pagination: every patient gets a row of widgets
+        rows = store.top() + store.archived()
+        df = pd.DataFrame([record.to_dict() for _, record in rows], index=[pid for pid, _ in rows])
+        header_cols = st.columns(len(df.columns) + 1)
+        for i, col_name in enumerate(df.columns):
+            header_cols[i].markdown(f"**{col_name}**")
+        for idx, row in df.iterrows():
+            row_cols = st.columns(len(df.columns) + 1)
+            for i, col_name in enumerate(df.columns):
+                if col_name == "triage_level":
+                    row_cols[i].selectbox("Triage Level", TRIAGE_LEVELS, key=f"triage_sel_{idx}",
+                                          label_visibility="collapsed")
+                else:
+                    row_cols[i].write(row[col_name])
+            row_cols[-1].button("✅", key=f"row_action_{idx}")
+    st.session_state["_render_s"] = time.perf_counter() - start
+
+
+def time_render(patients: int, layout: str, repeats: int):
+    samples = []
+    for _ in range(repeats):
+        at = AppTest.from_function(board_script, args=(SIMPLE_FRONTEND, patients, layout), default_timeout=600)
+        at.run()
+        if at.exception:
+            raise RuntimeError(at.exception[0].message)
+        samples.append(at.session_state["_render_s"])
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'patients':>8} {'all rows (ms)':>14} {'paged (ms)':>11}")
+    for patients in args.sizes:
+        full = time_render(patients, "all-rows", args.repeats)
+        paged = time_render(patients, "paged", args.repeats)
+        print(f"{patients:>8} {full * 1000:>14.0f} {paged * 1000:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Benchmark: getting the board's patients as a DataFrame on each script run, at
+50, 500 and 5,000 patients, with one new arrival between runs.
+
+  rebuild    pd.DataFrame over every patient dict (the store's full_state()),
+             inferring dtypes and the column union each run
+  view       BoardView.sync() (the new arrival's event) + frame()
+  filtered   the same, then frame("confirmed") as the board's confirmed table
+
+Usage (from the repo root):
+    python bench/bench_board_view.py --sizes 50 500 5000 --runs 200
+"""
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+from board_view import BoardView  # noqa: E402
+from patient_record import TRIAGE_LEVELS, PatientRecord  # noqa: E402
+from patient_store import PatientStore  # noqa: E402
+
+
+def _record(i: int):
+    return PatientRecord.from_payload({
+        "patient id": f"er_{i:05d}",
+        "age": str(18 + i % 70),
+        "time of arrival": f"{i // 60 % 24:02d}:{i % 60:02d}:00",
+        "chief complaint and reported symptoms": "Simple leg laceration.",
+        "triage level": TRIAGE_LEVELS[i % len(TRIAGE_LEVELS)],
+        "triaged?": "YES",
+    })
+
+
+def _store(patients: int):
+    store = PatientStore(max_archived=patients)
+    for i in range(patients):
+        store.add(_record(i))
+    for i in range(0, patients, 5):
+        store.confirm(f"er_{i:05d}")
+    return store
+
+
+def per_run_us(patients: int, runs: int, read):
+    """Mean time of read(store) per run, each run after one new arrival, in us."""
+    store = _store(patients)
+    read(store)  # first run (the view's initial load) is not counted
+    total = 0.0
+    for i in range(runs):
+        store.add(_record(patients + i))
+        start = time.perf_counter()
+        read(store)
+        total += time.perf_counter() - start
+    return total / runs * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[50, 500, 5000])
+    parser.add_argument("--runs", type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'patients':>8} {'rebuild (us)':>13} {'view (us)':>10} {'filtered (us)':>14}")
+    for patients in args.sizes:
+        rebuild = per_run_us(patients, args.runs, lambda store: pd.DataFrame(store.full_state()["patients"]))
+        view = BoardView()
+        synced = per_run_us(patients, args.runs, lambda store: (view.sync(store), view.frame()))
+        view = BoardView()
+        filtered = per_run_us(patients, args.runs, lambda store: (view.sync(store), view.frame("confirmed")))
+        print(f"{patients:>8} {rebuild:>13.0f} {synced:>10.0f} {filtered:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
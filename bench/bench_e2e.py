@@ -0,0 +1,298 @@
+"""
+End-to-end load test: receptionist Submit -> n8n -> ingest API -> nurse board -> confirmation.
+
+Starts the whole stack locally:
+
+  ingest_api.py      the ingest API and the store server (patient log in a temp directory)
+  bench/fake_n8n.py  the reception and triage-confirmation webhooks, with LLM-like latency
+  nurse tab          nurse_frontend.py itself, run through Streamlit's AppTest in its own
+                     process: it reruns when the store changes (as the refresh fragment
+                     would) and, with --confirm, clicks ✅ on the top patient every run
+
+then replays a synthetic arrival trace (synthetic_patients.PatientGenerator: daily
+census curve and bursts, starting at --start-hour) as receptionist Submit payloads,
+compressed to --rate patients/s on average, for --seconds, and waits up to --drain
+seconds for the rest to come through.
+
+Reports, per run:
+
+  ingest latency   the stand-in's POST /api/data round trips (p50/p95/p99)
+  time to visible  receptionist Submit to the end of the first nurse-board run that showed the patient
+  confirms         confirmations clicked on the board and accepted by the webhook, per second
+  memory           RSS of the ingest API (workers and store server) and of the nurse process
+
+--json writes the report as JSON; --history appends it as one line to a JSONL file,
+so a series of runs (one per commit) shows regressions in nurse_frontend.py and the API.
+Memory is read from /proc (Linux only; null elsewhere).
+
+Usage:
+    python bench/bench_e2e.py --rate 20 --seconds 30 --llm-latency 1.5 --confirm --history bench/e2e.jsonl
+"""
+import argparse
+import datetime
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+FRONTEND_DIR = os.path.join(BENCH_DIR, "..", "simple_frontend")
+sys.path.insert(0, FRONTEND_DIR)
+
+from synthetic_patients import PatientGenerator, post_patients  # noqa: E402
+
+# How often the nurse tab checks for changes between runs (nurse_frontend.REFRESH_CHECK_INTERVAL_S)
+CHECK_INTERVAL_S = 0.5
+
+
+def rss_mb(pid):
+    """Resident memory of a process and all its descendants, in MB (None without /proc)."""
+    total_kb = 0
+    pids = [pid]
+    while pids:
+        current = pids.pop()
+        try:
+            with open(f"/proc/{current}/status") as f:
+                total_kb += next((int(line.split()[1]) for line in f if line.startswith("VmRSS:")), 0)
+            with open(f"/proc/{current}/task/{current}/children") as f:
+                pids.extend(int(child) for child in f.read().split())
+        except FileNotFoundError:
+            if current == pid:
+                return None
+    return round(total_kb / 1024, 1)
+
+
+def percentiles_ms(values):
+    values = sorted(values)
+    if not values:
+        return {"count": 0, "p50": None, "p95": None, "p99": None, "max": None}
+    at = lambda q: round(values[min(len(values) - 1, int(len(values) * q))] * 1000, 1)  # noqa: E731
+    return {"count": len(values), "p50": at(0.5), "p95": at(0.95), "p99": at(0.99), "max": round(values[-1] * 1000, 1)}
+
+
+def nurse_process(env, confirm, ready, done, results):
+    """
+    One nurse tab: nurse_frontend.py through AppTest. A patient counts as visible
+    at the end of the first run that started after it reached the store.
+    """
+    os.environ.update(env)  # before store_server / nurse_frontend read it
+    from streamlit.testing.v1 import AppTest
+
+    import store_server
+
+    store = store_server.connect(timeout_s=10)
+    seq = store.full_state()["seq"]
+    at = AppTest.from_file(os.path.join(FRONTEND_DIR, "nurse_frontend.py"), default_timeout=60)
+    at.run()
+    rss_start = rss_mb(os.getpid())
+    ready.set()
+
+    waiting = {}  # patient id -> submitted_at, in the store but not rendered yet
+    time_to_visible = []
+    runs = clicks = 0
+    while not done.is_set():
+        events = store.changes_since(seq)
+        if events is None:  # fell behind the kept events: take every patient as new
+            state = store.full_state()
+            seq = state["seq"]
+            events = [{"type": "added", "patient": patient} for patient in state["patients"]]
+        elif events:
+            seq = events[-1]["seq"]
+        for event in events:
+            if event["type"] == "added":
+                waiting[event["patient"]["patient_id"]] = event["patient"]["submitted_at"]
+
+        confirm_buttons = [button for button in at.button if (button.key or "").startswith("row_action_")]
+        if confirm and confirm_buttons:
+            confirm_buttons[0].click()
+            clicks += 1
+        elif not events:
+            time.sleep(CHECK_INTERVAL_S)
+            continue
+        at.run()
+        runs += 1
+        rendered = time.time()
+        time_to_visible += [rendered - submitted for submitted in waiting.values() if submitted is not None]
+        waiting.clear()
+
+    results.put({
+        "runs": runs, "confirm_clicks": clicks, "time_to_visible_s": time_to_visible,
+        "rss_start": rss_start, "rss_end": rss_mb(os.getpid()),
+    })
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout_s=30):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BENCH_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args):
+    api_port, store_port, n8n_port = free_port(), free_port(), free_port()
+    log_dir = tempfile.mkdtemp(prefix="e2e_bench_")
+    env = dict(os.environ, PATIENT_LOG_DIR=log_dir, PATIENT_STORE_PORT=str(store_port), INGEST_LOG_LEVEL="WARNING",
+               N8N_CONFIRM_WEBHOOK_URL=f"http://127.0.0.1:{n8n_port}/webhook/triage-confirmation")
+    ingest_url = f"http://127.0.0.1:{api_port}/api/data"
+    n8n_url = f"http://127.0.0.1:{n8n_port}"
+    processes = []
+    mp = multiprocessing.get_context("spawn")
+    nurse = None
+    try:
+        api = subprocess.Popen(
+            [sys.executable, "ingest_api.py", "--host", "127.0.0.1", "--port", str(api_port),
+             "--workers", str(args.workers)],
+            cwd=FRONTEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        processes.append(api)
+        processes.append(subprocess.Popen(
+            [sys.executable, os.path.join(BENCH_DIR, "fake_n8n.py"), "--port", str(n8n_port),
+             "--ingest-url", ingest_url, "--llm-latency", str(args.llm_latency), "--llm-sigma", str(args.llm_sigma),
+             "--seed", str(args.seed)],
+            env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        ))
+        wait_for(f"http://127.0.0.1:{api_port}/api/queue")
+        wait_for(f"{n8n_url}/stats")
+
+        ready, done, results = mp.Event(), mp.Event(), mp.Queue()
+        nurse_env = {key: env[key] for key in ("PATIENT_STORE_PORT", "N8N_CONFIRM_WEBHOOK_URL")}
+        nurse = mp.Process(target=nurse_process, args=(nurse_env, args.confirm, ready, done, results))
+        nurse.start()
+        if not ready.wait(timeout=60):
+            raise RuntimeError("nurse tab did not start")
+        api_rss_start = rss_mb(api.pid)
+
+        # The trace at its own pace (--per-hour on average), sped up to --rate patients/s
+        speed = args.rate * 3600 / args.per_hour
+        start = datetime.datetime.now().replace(hour=args.start_hour, minute=0, second=0, microsecond=0)
+        generator = PatientGenerator(args.seed, patients_per_hour=args.per_hour, start=start)
+        trace = (
+            (arrival, {**record, "simulate": False})
+            for arrival, record in generator.stream(hours=args.seconds * speed / 3600, triaged=False)
+        )
+        submitted, submit_failed, submit_seconds = post_patients(
+            f"{n8n_url}/webhook/reception", trace, concurrency=args.concurrency, speed=speed,
+        )
+
+        # Drain: every workflow forwarded and, with --confirm, the board emptied
+        deadline = time.monotonic() + args.drain
+        while time.monotonic() < deadline:
+            n8n = requests.get(f"{n8n_url}/stats", timeout=5).json()
+            queue = requests.get(f"http://127.0.0.1:{api_port}/api/queue?limit=1", timeout=5).json()["data"]
+            if not n8n["in_flight"] and (not args.confirm or not queue):
+                break
+            time.sleep(CHECK_INTERVAL_S)
+        time.sleep(2 * CHECK_INTERVAL_S)  # one more nurse run for the last arrivals
+        done.set()
+        nurse_report = results.get(timeout=120)
+        nurse.join()
+        # Let the dispatcher deliver what was clicked last (it batches for 0.2 s)
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            n8n = requests.get(f"{n8n_url}/stats", timeout=5).json()
+            if n8n["confirmations"] >= nurse_report["confirm_clicks"]:
+                break
+            time.sleep(0.2)
+        api_rss_end = rss_mb(api.pid)
+    finally:
+        if nurse is not None and nurse.is_alive():
+            nurse.terminate()
+        for process in processes:
+            process.send_signal(signal.SIGINT)
+        for process in processes:
+            process.wait(timeout=30)
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+    confirm_span = (n8n["last_confirm_at"] or 0) - (n8n["first_confirm_at"] or 0)
+    return {
+        "benchmark": "e2e",
+        "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+        "commit": git_commit(),
+        "config": vars(args),
+        "submitted": submitted,
+        "submit_failed": submit_failed,
+        "submit_rate_per_s": round(submitted / submit_seconds, 2),
+        "ingested": n8n["forwarded"],
+        "ingest_failed": n8n["forward_failed"],
+        "ingest_latency_ms": percentiles_ms(n8n["ingest_latency_s"]),
+        "time_to_visible_ms": percentiles_ms(nurse_report["time_to_visible_s"]),
+        "nurse_runs": nurse_report["runs"],
+        "confirms": {
+            "clicked": nurse_report["confirm_clicks"],
+            "delivered": n8n["confirmations"],
+            "webhook_requests": n8n["confirm_requests"],
+            "per_s": round(n8n["confirmations"] / confirm_span, 2) if confirm_span > 0 else None,
+        },
+        "memory_mb": {
+            "ingest_api": {"start": api_rss_start, "end": api_rss_end,
+                           "growth": None if None in (api_rss_start, api_rss_end) else round(api_rss_end - api_rss_start, 1)},
+            "nurse": {"start": nurse_report["rss_start"], "end": nurse_report["rss_end"],
+                      "growth": None if None in (nurse_report["rss_start"], nurse_report["rss_end"])
+                      else round(nurse_report["rss_end"] - nurse_report["rss_start"], 1)},
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=float, default=10, help="average arrivals per second")
+    parser.add_argument("--seconds", type=float, default=30, help="length of the arrival trace, wall seconds")
+    parser.add_argument("--per-hour", type=float, default=12, help="arrivals per hour of the underlying trace")
+    parser.add_argument("--start-hour", type=int, default=10, help="hour of day the trace starts at")
+    parser.add_argument("--llm-latency", type=float, default=1.5, help="median n8n/LLM triage delay, seconds")
+    parser.add_argument("--llm-sigma", type=float, default=0.5)
+    parser.add_argument("--confirm", action="store_true", help="nurse confirms the top patient every run")
+    parser.add_argument("--workers", type=int, default=1, help="ingest API uvicorn workers")
+    parser.add_argument("--concurrency", type=int, default=8, help="receptionist submit threads")
+    parser.add_argument("--drain", type=float, default=60, help="max seconds to wait for in-flight work")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--history", help="append the report as one line to this JSONL file")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.history:
+        with open(args.history, "a") as f:
+            f.write(json.dumps(report) + "\n")
+
+    ingest, visible, confirms = report["ingest_latency_ms"], report["time_to_visible_ms"], report["confirms"]
+    print(f"submitted {report['submitted']:,} at {report['submit_rate_per_s']}/s, ingested {report['ingested']:,}")
+    print(f"ingest latency (ms)   p50 {ingest['p50']}  p95 {ingest['p95']}  p99 {ingest['p99']}")
+    print(f"time to visible (ms)  p50 {visible['p50']}  p95 {visible['p95']}  p99 {visible['p99']}"
+          f"  ({report['nurse_runs']} nurse runs)")
+    print(f"confirms              {confirms['clicked']} clicked, {confirms['delivered']} delivered, {confirms['per_s']}/s")
+    for name, memory in report["memory_mb"].items():
+        print(f"memory {name:<14} {memory['start']} -> {memory['end']} MB")
+
+
+if __name__ == "__main__":
+    main()
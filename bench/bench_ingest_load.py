@@ -0,0 +1,209 @@
+"""
+Load test: sustained POST /api/data rate while nurse tabs keep re-rendering the board.
+
+Two layouts, each with --tabs nurse tabs (threads in a separate "Streamlit"
+process re-running the board script through AppTest, back to back) and
+--clients load-generator processes posting patients as fast as the API answers:
+
+  thread  the old layout: the ingest API runs in a uvicorn thread inside the
+          process that renders the tabs, on an in-process PatientStore
+  server  ingest_api.py as its own server (--workers uvicorn workers) with the
+          store server; the tabs read the store over its local socket
+
+Both stores write a PatientLog to a temp directory. Reports POSTs/s, POST
+latency percentiles and board renders per tab.
+
+Usage:
+    python bench/bench_ingest_load.py --tabs 5 --clients 4 --workers 4 --seconds 10
+"""
+import argparse
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend")
+sys.path.insert(0, FRONTEND_DIR)
+
+
+def make_patient(client: int, i: int):
+    return {
+        "patient id": f"er_{client}_{i:06d}",
+        "age": 30 + i % 50,
+        "time of arrival": f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+        "chief complaint and reported symptoms": "Chest tightness since this morning.",
+        "triage level": str(i % 5 + 1),
+        "triaged?": "YES",
+        "rational behind the triage classification": "Needs ECG and labs.",
+    }
+
+
+def post_loop(url, client, seconds, results):
+    """Load-generator process: post patients back to back, report latencies."""
+    session = requests.Session()
+    latencies = []
+    deadline = time.perf_counter() + seconds
+    i = 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        session.post(url, json=make_patient(client, i), timeout=30).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+        i += 1
+    results.put(latencies)
+
+
+def tab_script():
+    import ingest_api
+    from board import render_board
+
+    render_board(ingest_api.get_store(), lambda record, level: None)
+
+
+# AppTest swaps a process-wide mock runtime in and out around each run, so runs
+# can't overlap. Rendering is CPU-bound under the GIL anyway: one run at a time
+# still keeps the process as busy as a Streamlit server rendering every tab.
+_render_lock = threading.Lock()
+
+
+def tab_loop(stop, renders):
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_function(tab_script, default_timeout=60)
+    while not stop.is_set():
+        with _render_lock:
+            at.run()
+        renders.append(1)
+
+
+def nurse_process(layout, port, log_dir, store_port, tabs, ready, done, results):
+    """
+    The Streamlit process: --tabs threads re-rendering the board. In the thread
+    layout it also serves the ingest API from a uvicorn thread, as before.
+    """
+    import uvicorn
+
+    import ingest_log
+
+    ingest_log.setup(stream=open(os.devnull, "w"))  # the API logs a line per request
+
+    import ingest_api
+    import store_server
+    from metrics import Metrics
+    from patient_log import PatientLog
+    from patient_store import PatientStore
+
+    server = None
+    if layout == "thread":
+        store = PatientStore()
+        store.attach_log(PatientLog(log_dir))
+        ingest_api._store = store
+        ingest_api._metrics = Metrics()
+        server = uvicorn.Server(uvicorn.Config(ingest_api.api, host="127.0.0.1", port=port, log_level="warning", access_log=False))
+        threading.Thread(target=server.run, daemon=True).start()
+    else:
+        store_server.STORE_PORT = store_port
+    wait_for(f"http://127.0.0.1:{port}/api/queue")
+
+    stop = threading.Event()
+    renders = [[] for _ in range(tabs)]
+    threads = [threading.Thread(target=tab_loop, args=(stop, renders[i]), daemon=True) for i in range(tabs)]
+    for thread in threads:
+        thread.start()
+    ready.set()
+    done.wait()
+    stop.set()
+    for thread in threads:
+        thread.join()
+    if server is not None:
+        server.should_exit = True
+    results.put(sum(len(r) for r in renders))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout_s=30):
+    deadline = time.monotonic() + timeout_s
+    while time.monotonic() < deadline:
+        try:
+            requests.get(url, timeout=1)
+            return
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def run(layout, args):
+    port = free_port()
+    store_port = free_port()
+    log_dir = tempfile.mkdtemp(prefix="ingest_load_bench_")
+    mp = multiprocessing.get_context("spawn")
+    api_process = None
+    try:
+        if layout == "server":
+            env = dict(os.environ, PATIENT_LOG_DIR=log_dir, PATIENT_STORE_PORT=str(store_port))
+            api_process = subprocess.Popen(
+                [sys.executable, "ingest_api.py", "--host", "127.0.0.1", "--port", str(port),
+                 "--workers", str(args.workers)],
+                cwd=FRONTEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        ready, done, results = mp.Event(), mp.Event(), mp.Queue()
+        nurse = mp.Process(target=nurse_process, args=(layout, port, log_dir, store_port, args.tabs, ready, done, results))
+        nurse.start()
+        if not ready.wait(timeout=60):
+            raise RuntimeError("nurse tabs did not start")
+
+        url = f"http://127.0.0.1:{port}/api/data"
+        clients = [mp.Process(target=post_loop, args=(url, c, args.seconds, results)) for c in range(args.clients)]
+        for client in clients:
+            client.start()
+        latencies = [x for _ in clients for x in results.get()]
+        for client in clients:
+            client.join()
+        done.set()
+        renders = results.get()
+        nurse.join()
+    finally:
+        if api_process is not None:
+            api_process.send_signal(signal.SIGINT)
+            api_process.wait(timeout=30)
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+    latencies.sort()
+    p50 = statistics.median(latencies) * 1000
+    p99 = latencies[int(len(latencies) * 0.99)] * 1000
+    print(
+        f"{layout:<7} {len(latencies) / args.seconds:>9,.0f} {p50:>9.1f} {p99:>9.1f}"
+        f" {renders / max(args.tabs, 1) / args.seconds:>13.1f}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tabs", type=int, default=5)
+    parser.add_argument("--clients", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers in the server layout (one per spare core)")
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--layouts", nargs="+", default=["thread", "server"], choices=["thread", "server"])
+    args = parser.parse_args()
+
+    print(f"{args.tabs} tabs, {args.clients} clients, {args.seconds:g}s per layout")
+    print(f"{'layout':<7} {'POSTs/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'renders/tab/s':>13}")
+    for layout in args.layouts:
+        run(layout, args)
+
+
+if __name__ == "__main__":
+    main()
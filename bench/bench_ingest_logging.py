@@ -0,0 +1,112 @@
+"""
+Benchmark: POST /api/data latency as the queue grows, old print vs ingest_log.
+
+  print       the old receive_data: print the payload, then print the whole
+              data store (one repr of every patient per request)
+  ingest_log  ingest_api.receive_data: one compact line per patient through a
+              queued logger (the write happens on the listener thread)
+
+Both write to a temp file. At each queue size the store is first filled
+directly (untimed), then --posts requests are timed through the ASGI app
+in-process (starlette's TestClient, no sockets).
+
+Usage:
+    python bench/bench_ingest_logging.py --sizes 0 1000 2500 5000 10000 --posts 200
+"""
+import argparse
+import contextlib
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import ingest_log  # noqa: E402
+from metrics import Metrics  # noqa: E402
+from patient_record import PatientRecord  # noqa: E402
+from patient_store import PatientStore  # noqa: E402
+
+
+def make_patient(i: int):
+    return {
+        "patient id": f"er_{i:06d}",
+        "age": 30 + i % 50,
+        "time of arrival": f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+        "chief complaint and reported symptoms": "Chest tightness since this morning.",
+        "triage level": str(i % 5 + 1),
+        "triaged?": "YES",
+        "rational behind the triage classification": "Needs ECG and labs.",
+    }
+
+
+def print_app(store, data_store):
+    """receive_data as it was: the payload and the full data store on stdout."""
+    api = FastAPI()
+
+    @api.post("/api/data")
+    async def receive_data(request: Request):
+        body = await request.json()
+        data_store.append(body)
+        store.add(PatientRecord.from_payload(body))
+        print("✅ Received data:", body)
+        print( "datastore", data_store)
+        return {"status": "ok"}
+
+    return api
+
+
+def run(name, args, out):
+    store = PatientStore()
+    data_store = []
+    if name == "print":
+        api = print_app(store, data_store)
+    else:
+        import ingest_api
+
+        ingest_api._store = store
+        ingest_api._metrics = Metrics()
+        api = ingest_api.api
+
+    results = []
+    next_id = 0
+    with TestClient(api) as client, contextlib.redirect_stdout(out):
+        for size in args.sizes:
+            while next_id < size:
+                payload = make_patient(next_id)
+                data_store.append(payload)
+                store.add(PatientRecord.from_payload(payload))
+                next_id += 1
+            latencies = []
+            for _ in range(args.posts):
+                start = time.perf_counter()
+                client.post("/api/data", json=make_patient(next_id)).raise_for_status()
+                latencies.append(time.perf_counter() - start)
+                next_id += 1
+            latencies.sort()
+            results.append((size, statistics.median(latencies) * 1000, latencies[int(len(latencies) * 0.99)] * 1000))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[0, 1000, 2500, 5000, 10000])
+    parser.add_argument("--posts", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="ingest_log_bench_") as directory:
+        with open(os.path.join(directory, "ingest.log"), "w") as out:
+            ingest_log.setup(stream=out)
+            rows = {name: run(name, args, out) for name in ("print", "ingest_log")}
+
+    print(f"{'queue':>7} {'print p50':>10} {'p99 (ms)':>9} {'ingest_log p50':>15} {'p99 (ms)':>9}")
+    for (size, old_p50, old_p99), (_, new_p50, new_p99) in zip(rows["print"], rows["ingest_log"]):
+        print(f"{size:>7,} {old_p50:>10.2f} {old_p99:>9.2f} {new_p50:>15.2f} {new_p99:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
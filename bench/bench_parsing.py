@@ -0,0 +1,85 @@
+"""
+Micro-benchmark: parsing n8n payloads.
+
+Runs a corpus of the payload shapes n8n actually returns through the old
+parsing path (the dict-only parse_structured_output, falling back to the
+literal_eval + json.loads extract_patient_data) and through
+parsing_functions.parse_records. Reports microseconds per payload and how
+many payloads each path turned into records.
+
+Usage:
+    python bench/bench_parsing.py --repeats 2000
+"""
+import argparse
+import ast
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+from parsing_functions import ParseError, parse_records  # noqa: E402
+
+PATIENT = {
+    "patient_id": "er_0001",
+    "age": 0,
+    "arrival_time": "14:00:00",
+    "chief_complaint_and_reported_symptoms": "The baby has had difficulty breathing and has developed a mild fever.",
+}
+PATIENT_JSON = json.dumps(PATIENT, indent=2)
+
+CORPUS = {
+    "dict output": [{"output": PATIENT}],
+    "json string output": [{"output": PATIENT_JSON}],
+    "nested literal output": [{"output": repr([{"output": PATIENT_JSON}])}],
+    "bare output dict": {"output": PATIENT},
+    "bare record": PATIENT,
+    "json text": json.dumps([{"output": PATIENT}]),
+    "three patients": [{"output": dict(PATIENT, patient_id=f"er_000{i}")} for i in range(3)],
+}
+
+
+def old_parse(data):
+    """What the front ends did before: dict-shaped output, else literal_eval + json.loads, first item only."""
+    try:
+        output = data[0]["output"]
+        if isinstance(output, dict):
+            return [{k: output.get(k) for k in ("patient_id", "age", "chief_complaint_and_reported_symptoms")}]
+    except Exception:
+        pass
+    try:
+        inner = ast.literal_eval(data[0]["output"])
+        return [json.loads(inner[0]["output"])]
+    except Exception:
+        return []
+
+
+def new_parse(data):
+    try:
+        return parse_records(data)
+    except ParseError:
+        return []
+
+
+def bench(parse, payload, repeats):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        result = parse(payload)
+    return (time.perf_counter() - start) / repeats * 1e6, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeats", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'shape':<24} {'old (us)':>9} {'old recs':>9} {'new (us)':>9} {'new recs':>9}")
+    for name, payload in CORPUS.items():
+        old_us, old_n = bench(old_parse, payload, args.repeats)
+        new_us, new_n = bench(new_parse, payload, args.repeats)
+        print(f"{name:<24} {old_us:>9.1f} {old_n:>9} {new_us:>9.1f} {new_n:>9}")
+
+
+if __name__ == "__main__":
+    main()
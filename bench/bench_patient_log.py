@@ -0,0 +1,83 @@
+"""
+Benchmark: ingest rate with the durable patient log, and cold-start replay time.
+
+Ingests N records (default 100k) three ways: the old list.append, the
+in-memory PatientStore, and the PatientStore with a PatientLog attached
+(group commit). Then rebuilds a fresh store from the log, as a restarted
+nurse board would.
+
+Usage:
+    python bench/bench_patient_log.py --records 100000
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+from patient_log import PatientLog  # noqa: E402
+from patient_record import PatientRecord  # noqa: E402
+from patient_store import PatientStore  # noqa: E402
+
+
+def make_patient(i: int):
+    return {
+        "patient id": f"er_{i:06d}",
+        "time of arrival": f"{i // 3600 % 24:02d}:{i // 60 % 60:02d}:{i % 60:02d}",
+        "chief complaint and reported symptoms": "Coughing all night long, temperature of 101 last night.",
+        "triage level": str(i % 5 + 1),
+        "triaged?": "YES",
+        "rational behind the triage classification": "Needs labs and an X-ray.",
+    }
+
+
+def ingest(store, payloads):
+    start = time.perf_counter()
+    for payload in payloads:
+        store.add(PatientRecord.from_payload(payload))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--commit-interval", type=float, default=0.05)
+    args = parser.parse_args()
+
+    records = [make_patient(i) for i in range(args.records)]
+    n = len(records)
+
+    start = time.perf_counter()
+    data_store = []
+    for record in records:
+        data_store.append(record)
+    list_s = time.perf_counter() - start
+    print(f"list.append           : {n / list_s:12,.0f} records/s")
+
+    memory_s = ingest(PatientStore(), records)
+    print(f"PatientStore          : {n / memory_s:12,.0f} records/s")
+
+    log_dir = tempfile.mkdtemp(prefix="patient_log_bench_")
+    try:
+        store = PatientStore()
+        log = PatientLog(log_dir, commit_interval_s=args.commit_interval)
+        store.attach_log(log)
+        logged_s = ingest(store, records)
+        log.sync()
+        print(f"PatientStore + log    : {n / logged_s:12,.0f} records/s ({logged_s / memory_s:.1f}x in-memory)")
+        log.close()
+
+        start = time.perf_counter()
+        restored = PatientStore()
+        restored.attach_log(PatientLog(log_dir))
+        replay_s = time.perf_counter() - start
+        print(f"cold-start replay     : {replay_s * 1000:12,.0f} ms for {len(restored):,} patients")
+    finally:
+        shutil.rmtree(log_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Benchmark: what the prompt registry costs a front end and each LLM request.
+
+  import       fresh interpreters importing the package (and what the old eager
+               import of every prompt cost), minus a bare interpreter start
+  first get    loading, hashing and sizing a prompt the first time it is used
+  render       building one request (prefix from the registry, per-patient suffix)
+
+Usage (from the repo root):
+    python bench/bench_prompt_registry.py --runs 20 --renders 20000
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT_DIR)
+
+IMPORTS = {
+    "import prompts": "import prompts",
+    "import prompts + first triage get": "import prompts; prompts.registry.get('triage')",
+    "import prompt builders": "import prompts; prompts.build_triage_prompt",
+}
+
+
+def interpreter_ms(code: str, runs: int):
+    """Median wall time of a fresh `python -c code`, in ms."""
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=ROOT_DIR, check=True)
+        times.append((time.perf_counter() - start) * 1000)
+    return statistics.median(times)
+
+
+def per_call_us(fn, count: int):
+    start = time.perf_counter()
+    for _ in range(count):
+        fn()
+    return (time.perf_counter() - start) / count * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20, help="interpreter starts per import measurement")
+    parser.add_argument("--renders", type=int, default=20000)
+    args = parser.parse_args()
+
+    baseline = interpreter_ms("pass", args.runs)
+    print(f"{'import (ms over a bare interpreter)':<40} {'median':>8}")
+    for label, code in IMPORTS.items():
+        print(f"{label:<40} {interpreter_ms(code, args.runs) - baseline:>8.2f}")
+
+    from prompts import (  # noqa: E402 (timed above in fresh interpreters)
+        PromptStats, build_final_decision_prompt, build_triage_batch_prompt, build_triage_prompt, registry,
+    )
+
+    print(f"\n{'first get (ms)':<40} {'ms':>8}")
+    for name, variant in (("triage", "default"), ("triage", "core"), ("final_decision", "default")):
+        start = time.perf_counter()
+        registry.get(name, variant)
+        print(f"{name + '/' + variant:<40} {(time.perf_counter() - start) * 1000:>8.3f}")
+
+    patient = {
+        "patient_id": "er_0001", "age": 54, "arrival_time": "14:02:11",
+        "chief_complaint_and_reported_symptoms": "Crushing chest pain radiating to the left arm, sweating.",
+    }
+    batch = [{**patient, "patient_id": f"er_{i:04d}"} for i in range(10)]
+    stats = PromptStats()
+    renders = {
+        "triage": lambda: build_triage_prompt(patient),
+        "triage + PromptStats": lambda: build_triage_prompt(patient, stats),
+        "triage core + 3 handbook passages": lambda: build_triage_prompt(patient, passages=3),
+        "triage batch of 10": lambda: build_triage_batch_prompt(batch),
+        "final decision": lambda: build_final_decision_prompt(patient),
+        "registry.get (loaded)": lambda: registry.get("triage"),
+        "registry.get with A/B unit": lambda: registry.get("triage", unit="er_0001"),
+    }
+    print(f"\n{'render (us per call)':<40} {'us':>8}")
+    for label, fn in renders.items():
+        fn()  # first call loads what it needs
+        print(f"{label:<40} {per_call_us(fn, args.renders):>8.2f}")
+    print(f"\nversion stamped: {build_triage_prompt(patient).version}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark: CPU per idle nurse tab and ingest-to-display latency.
+
+Compares the old refresh loop (full render + sleep(2) + rerun) with the
+version-gated refresh in nurse_frontend.py (cheap version check every
+REFRESH_CHECK_INTERVAL_S, full render only on change or after MAX_STALENESS_S).
+
+Each "tab" is a thread doing what one Streamlit session does per full rerun:
+rebuild the DataFrame from the shared list and touch every cell.
+The run is split in two halves: idle (no arrivals, CPU is measured) and
+busy (one arrival every --ingest-every seconds, latency is measured).
+
+Usage:
+    python bench/bench_refresh.py --tabs 5 --patients 300 --seconds 10
+"""
+import argparse
+import threading
+import time
+
+import pandas as pd
+
+
+def make_patient(i: int):
+    return {
+        "patient id": f"er_{i:04d}",
+        "time of arrival": "14:00:00",
+        "chief complaint and reported symptoms": "Simple leg laceration.",
+        "triage level": "4",
+        "triaged?": "YES",
+        "rational behind the triage classification": "One resource (lac repair).",
+    }
+
+
+def render(data_store):
+    """Stand-in for one full script run: DataFrame rebuild + per-cell access."""
+    df = pd.DataFrame(data_store)
+    for _, row in df.iterrows():
+        for col_name in df.columns:
+            row[col_name]
+
+
+class SharedState:
+    def __init__(self, patients: int):
+        self.data_store = [make_patient(i) for i in range(patients)]
+        self.version = 0
+        self.changed = threading.Condition()
+        self.arrived_at = {}  # version -> perf_counter() at ingest
+
+    def ingest(self, record):
+        with self.changed:
+            self.data_store.append(record)
+            self.version += 1
+            self.arrived_at[self.version] = time.perf_counter()
+            self.changed.notify_all()
+
+
+class Tab(threading.Thread):
+    def __init__(self, state, stop, idle_over, mode, args):
+        super().__init__(daemon=True)
+        self.state, self.stop, self.idle_over = state, stop, idle_over
+        self.mode, self.args = mode, args
+        self.idle_cpu = None
+        self.latencies = []
+        self._shown_version = 0
+
+    def _full_render(self):
+        version = self.state.version
+        render(list(self.state.data_store))
+        shown_at = time.perf_counter()
+        for v in range(self._shown_version + 1, version + 1):
+            self.latencies.append(shown_at - self.state.arrived_at[v])
+        self._shown_version = version
+
+    def run(self):
+        rendered_at = 0.0
+        while not self.stop.is_set():
+            if self.idle_cpu is None and self.idle_over.is_set():
+                self.idle_cpu = time.thread_time()
+            if self.mode == "poll":
+                self._full_render()
+                self.stop.wait(self.args.poll_interval)
+                continue
+            stale = time.monotonic() - rendered_at >= self.args.max_staleness
+            if self.state.version != self._shown_version or stale:
+                rendered_at = time.monotonic()
+                self._full_render()
+            self.stop.wait(self.args.check_interval)
+
+
+def run(mode: str, args):
+    state = SharedState(args.patients)
+    stop, idle_over = threading.Event(), threading.Event()
+    tabs = [Tab(state, stop, idle_over, mode, args) for _ in range(args.tabs)]
+    for tab in tabs:
+        tab.start()
+
+    half = args.seconds / 2
+    time.sleep(half)
+    idle_over.set()
+    deadline = time.monotonic() + half
+    i = args.patients
+    while time.monotonic() < deadline:
+        state.ingest(make_patient(i))
+        i += 1
+        time.sleep(args.ingest_every)
+    stop.set()
+    for tab in tabs:
+        tab.join()
+
+    idle_cpu = [tab.idle_cpu if tab.idle_cpu is not None else time.thread_time() for tab in tabs]
+    latencies = sorted(l for tab in tabs for l in tab.latencies)
+    return {
+        "mode": mode,
+        "idle_cpu_s_per_tab_per_min": sum(idle_cpu) / len(tabs) / half * 60,
+        "latency_mean_ms": 1000 * sum(latencies) / len(latencies) if latencies else float("nan"),
+        "latency_max_ms": 1000 * latencies[-1] if latencies else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tabs", type=int, default=5)
+    parser.add_argument("--patients", type=int, default=300)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--ingest-every", type=float, default=1.5, help="seconds between arrivals in the busy half")
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--check-interval", type=float, default=0.5)
+    parser.add_argument("--max-staleness", type=float, default=30.0)
+    args = parser.parse_args()
+
+    for mode in ("poll", "gated"):
+        result = run(mode, args)
+        print(
+            f"{result['mode']:>6}: idle {result['idle_cpu_s_per_tab_per_min']:.3f} CPU-s/tab/min, "
+            f"ingest-to-display mean {result['latency_mean_ms']:.0f} ms, max {result['latency_max_ms']:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+"""
+Benchmark: triage throughput against batch size, with a fake LLM.
+
+A burst of arrivals (a bus accident: --patients at once) goes through
+triage.TriageBatcher backed by bench/fake_llm.FakeLLM. For each batch size
+this reports LLM calls, wall time until every patient is triaged, throughput
+and prompt bytes per patient. --cache puts a triage.TriageCache in front
+(the burst shares one complaint, so most patients reuse another's triage).
+
+Usage (from the repo root):
+    python bench/bench_triage_batching.py --patients 20 --sizes 1 2 5 10 20
+    python bench/bench_triage_batching.py --cache
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.fake_llm import FakeLLM  # noqa: E402
+from prompts import PromptStats, triage_prompt_version  # noqa: E402
+from triage import TriageBatcher, TriageCache  # noqa: E402
+
+
+def run(batch_size: int, args):
+    llm = FakeLLM(base_latency_s=args.base_latency, per_patient_s=args.per_patient,
+                  malformed_rate=args.malformed_rate)
+    stats = PromptStats()
+    cache = TriageCache(lambda patient: triage_prompt_version(patient=patient)) if args.cache else None
+    batcher = TriageBatcher(llm, max_batch=batch_size, max_wait_ms=args.max_wait_ms,
+                            max_in_flight=args.in_flight, stats=stats, cache=cache)
+    patients = [
+        {"patient_id": f"er_{i:04d}", "age": 20 + i % 60, "arrival_time": "14:00:00",
+         "chief_complaint_and_reported_symptoms": "Injured in a bus accident, pain in the left arm."}
+        for i in range(args.patients)
+    ]
+    start = time.perf_counter()
+    futures = [batcher.submit(patient) for patient in patients]
+    results = [future.result() for future in futures]
+    elapsed = time.perf_counter() - start
+    batcher.close()
+    assert all(r["patient id"] == p["patient_id"] for r, p in zip(results, patients))
+    report = stats.report()
+    hits = (cache.report()["hit_ratio"], batcher.coalesced) if cache is not None else None
+    return llm.calls, batcher.fallbacks, elapsed, report["bytes_per_patient"], hits
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patients", type=int, default=20)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 5, 10, 20])
+    parser.add_argument("--base-latency", type=float, default=1.0, help="fake LLM round-trip cost, seconds")
+    parser.add_argument("--per-patient", type=float, default=0.05, help="fake LLM cost per patient, seconds")
+    parser.add_argument("--malformed-rate", type=float, default=0.05, help="chance an item is missing from a batch reply")
+    parser.add_argument("--max-wait-ms", type=float, default=200)
+    parser.add_argument("--in-flight", type=int, default=4)
+    parser.add_argument("--cache", action="store_true", help="put a TriageCache in front of the LLM")
+    args = parser.parse_args()
+
+    print(f"{'batch':>5} {'calls':>6} {'fallbacks':>9} {'wall (s)':>9} {'patients/s':>11} {'bytes/patient':>14}"
+          + (f" {'hit ratio':>9} {'coalesced':>9}" if args.cache else ""))
+    for size in args.sizes:
+        calls, fallbacks, elapsed, bytes_per_patient, hits = run(size, args)
+        print(f"{size:>5} {calls:>6} {fallbacks:>9} {elapsed:>9.2f} {args.patients / elapsed:>11.1f} {bytes_per_patient:>14,.0f}"
+              + (f" {hits[0]:>9.2f} {hits[1]:>9}" if hits else ""))
+
+
+if __name__ == "__main__":
+    main()
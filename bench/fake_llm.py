@@ -0,0 +1,52 @@
+"""
+Local stand-in for the triage LLM: no network, configurable latency.
+
+FakeLLM is a drop-in call_llm for triage.TriageBatcher. It reads the patient
+record(s) out of the prompt suffix, sleeps like a model would (a fixed
+round-trip cost plus a per-patient generation cost) and replies in the output
+format the prompt asks for: one JSON object, or a JSON array for batches.
+"""
+import json
+import random
+import threading
+import time
+
+LEVELS = ["1", "2", "3", "level 3 - Vital Signs Needed", "4", "5"]
+
+
+class FakeLLM:
+    def __init__(self, base_latency_s: float = 1.0, per_patient_s: float = 0.05, malformed_rate: float = 0.0,
+                 seed: int = 0):
+        self.base_latency_s = base_latency_s
+        self.per_patient_s = per_patient_s
+        self.malformed_rate = malformed_rate
+        self.calls = 0
+        self.patients_seen = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def __call__(self, parts) -> str:
+        _, _, records = parts.suffix.rpartition("\n# Patient record")
+        payload = json.loads(records.split("\n", 1)[1])
+        patients = payload if isinstance(payload, list) else [payload]
+        with self._lock:
+            self.calls += 1
+            self.patients_seen += len(patients)
+            drop = [self._random.random() < self.malformed_rate for _ in patients]
+        time.sleep(self.base_latency_s + self.per_patient_s * len(patients))
+
+        items = [self._triage(patient) for patient, dropped in zip(patients, drop) if not dropped or len(patients) == 1]
+        if not isinstance(payload, list):
+            return json.dumps(items[0])
+        return "```json\n" + json.dumps(items) + "\n```"
+
+    def _triage(self, patient):
+        patient_id = patient.get("patient_id", patient.get("patient id"))
+        return {
+            "patient id": patient_id,
+            "time of arrival": patient.get("arrival_time", patient.get("time of arrival")),
+            "chief complaint and reported symptoms": patient.get("chief_complaint_and_reported_symptoms"),
+            "triage level": LEVELS[sum(map(ord, str(patient_id))) % len(LEVELS)],
+            "triaged?": "YES",
+            "rational behind the triage classification": "Fake LLM reply for benchmarking.",
+        }
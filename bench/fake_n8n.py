@@ -0,0 +1,136 @@
+"""
+Local stand-in for the n8n webhooks: no network, no LLM, configurable latency.
+
+  POST /webhook/reception             the receptionist's Submit payload. Answers
+                                      right away (like n8n's "Workflow was started"),
+                                      then, after an LLM-like delay, posts a triaged
+                                      record to the ingest API, as the n8n workflow does
+  POST /webhook/triage-confirmation   nurse confirmations (one payload or a list)
+  GET  /stats                         what the stand-in saw, for the benchmark driver
+
+The LLM delay is log-normal around --llm-latency (median, seconds) with spread
+--llm-sigma, which gives the long tail a real model has. Point the frontends at it with
+N8N_RECEPTION_WEBHOOK_URL / N8N_CONFIRM_WEBHOOK_URL.
+
+Usage:
+    python bench/fake_n8n.py --port 5678 --ingest-url http://localhost:8000/api/data --llm-latency 1.5
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+
+import requests
+import uvicorn
+from fastapi import FastAPI, Request
+from starlette.concurrency import run_in_threadpool
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bench.fake_llm import LEVELS  # noqa: E402
+
+app = FastAPI()
+config = {"ingest_url": "http://localhost:8000/api/data", "llm_latency": 1.5, "llm_sigma": 0.5, "confirm_latency": 0.05}
+stats = {
+    "received": 0, "forwarded": 0, "forward_failed": 0, "ingest_latency_s": [],
+    "confirmations": 0, "confirm_requests": 0, "first_confirm_at": None, "last_confirm_at": None,
+}
+_random = random.Random(0)
+_local = threading.local()
+_lock = threading.Lock()  # _forward runs on threadpool threads
+_tasks = set()  # keeps the background workflows referenced until they finish
+
+
+def _session():
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = _local.session = requests.Session()
+    return session
+
+
+def _triage(payload):
+    """The triage agent's output shape, carrying the receptionist's tracing fields through."""
+    patient_id = payload.get("patient_id")
+    return {
+        "patient id": patient_id,
+        "age": payload.get("age"),
+        "time of arrival": payload.get("arrival_time"),
+        "chief complaint and reported symptoms": payload.get("chief_complaint_and_reported_symptoms"),
+        "triage level": LEVELS[sum(map(ord, str(patient_id))) % len(LEVELS)],
+        "triaged?": "YES",
+        "rational behind the triage classification": "Fake n8n reply for benchmarking.",
+        "correlation_id": payload.get("correlation_id"),
+        "submitted_at": payload.get("submitted_at"),
+        "idempotency_key": payload.get("idempotency_key"),
+    }
+
+
+def _forward(record):
+    start = time.perf_counter()
+    try:
+        ok = _session().post(config["ingest_url"], json=record, timeout=30).ok
+    except requests.exceptions.RequestException:
+        ok = False
+    elapsed = time.perf_counter() - start
+    with _lock:
+        if ok:
+            stats["forwarded"] += 1
+            stats["ingest_latency_s"].append(elapsed)
+        else:
+            stats["forward_failed"] += 1
+
+
+async def _workflow(payload):
+    await asyncio.sleep(_random.lognormvariate(0, config["llm_sigma"]) * config["llm_latency"])
+    await run_in_threadpool(_forward, _triage(payload))
+
+
+@app.post("/webhook/reception")
+async def reception(request: Request):
+    payload = await request.json()
+    stats["received"] += 1
+    task = asyncio.create_task(_workflow(payload))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return {"message": "Workflow was started"}
+
+
+@app.post("/webhook/triage-confirmation")
+async def triage_confirmation(request: Request):
+    body = await request.json()
+    await asyncio.sleep(config["confirm_latency"])
+    now = time.time()
+    stats["confirmations"] += len(body) if isinstance(body, list) else 1
+    stats["confirm_requests"] += 1
+    stats["first_confirm_at"] = stats["first_confirm_at"] or now
+    stats["last_confirm_at"] = now
+    return {"message": "Workflow was started"}
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "in_flight": len(_tasks)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5678)
+    parser.add_argument("--ingest-url", default=config["ingest_url"])
+    parser.add_argument("--llm-latency", type=float, default=config["llm_latency"], help="median triage delay, seconds")
+    parser.add_argument("--llm-sigma", type=float, default=config["llm_sigma"], help="log-normal spread of the delay")
+    parser.add_argument("--confirm-latency", type=float, default=config["confirm_latency"], help="seconds")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    config.update(ingest_url=args.ingest_url, llm_latency=args.llm_latency, llm_sigma=args.llm_sigma,
+                  confirm_latency=args.confirm_latency)
+    _random.seed(args.seed)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", access_log=False)
+
+
+if __name__ == "__main__":
+    main()
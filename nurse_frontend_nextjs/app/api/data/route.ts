@@ -1,5 +1,5 @@
 import { NextRequest, NextResponse } from "next/server";
-import { addData, getData } from "../../../lib/dataStore";
+import { addData, currentSeq, getData, getDataSince } from "../../../lib/dataStore";
 
 export async function POST(request: NextRequest) {
   try {
@@ -14,8 +14,14 @@ export async function POST(request: NextRequest) {
   }
 }
 
-export async function GET() {
-  // Allow GET to view data (used by frontend for polling)
-  return NextResponse.json({ data: getData() });
+export async function GET(request: NextRequest) {
+  // Allow GET to view data (used by frontend for polling).
+  // With ?since=<seq> only the entries after seq are returned, plus the new seq.
+  const since = request.nextUrl.searchParams.get("since");
+  if (since !== null && /^\d+$/.test(since)) {
+    return NextResponse.json(getDataSince(Number(since)));
+  }
+  const data = getData();
+  return NextResponse.json({ data, seq: currentSeq(), reset: true });
 }
 
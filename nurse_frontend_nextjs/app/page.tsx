@@ -1,6 +1,6 @@
 "use client";
 
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import {
   TRIAGE_COLUMN_NAME,
   TRIAGE_OPTIONS,
@@ -19,17 +19,31 @@ export default function NurseInterface() {
     Record<number, string>
   >({});
   const [loading, setLoading] = useState(false);
+  const seqRef = useRef<number | null>(null); // cursor past the entries received so far (see lib/dataStore)
+  const fetchingRef = useRef(false); // a slow poll must not overlap the next (it would append twice)
 
-  // Fetch data from API
+  // Fetch new entries from API (the whole list only on first load or after a server restart)
   const fetchData = async () => {
+    if (fetchingRef.current) {
+      return;
+    }
+    fetchingRef.current = true;
     try {
-      const response = await fetch("/api/data");
+      const url = seqRef.current === null ? "/api/data" : `/api/data?since=${seqRef.current}`;
+      const response = await fetch(url);
       const result = await response.json();
       if (result.data) {
-        setDataStore(result.data);
+        if (result.reset) {
+          setDataStore(result.data);
+        } else if (result.data.length) {
+          setDataStore((prev) => [...prev, ...result.data]);
+        }
+        seqRef.current = result.seq;
       }
     } catch (error) {
       console.error("Error fetching data:", error);
+    } finally {
+      fetchingRef.current = false;
     }
   };
 
@@ -10,15 +10,44 @@ const dataStore: DataEntry[] = [];
 
 export function addData(data: DataEntry): void {
   dataStore.push(data);
-  console.log("✅ Received data:", data);
-  console.log("datastore", dataStore);
+  // One compact line per patient (id and size); logging the whole store made every request O(n)
+  console.log(
+    JSON.stringify({
+      event: "received",
+      patient_id: data.patient_id ?? data["patient id"],
+      bytes: JSON.stringify(data).length,
+      entries: dataStore.length,
+    })
+  );
 }
 
 export function getData(): DataEntry[] {
   return dataStore;
 }
 
+// Sequence numbers start from this instance's start time in microseconds (as the
+// Python store's do), so a cursor handed out by an earlier instance (before a cold
+// start or clearData) is always below this instance's range and never mistaken
+// for a position in it.
+let epoch = Date.now() * 1000;
+
+// The cursor of a client that has seen every entry so far
+export function currentSeq(): number {
+  return epoch + dataStore.length;
+}
+
+// Entries are only ever appended, so a client at `since` needs just the ones
+// after it. A `since` outside this instance's range means the client's entries
+// came from another instance and it must replace what it has.
+export function getDataSince(since: number): { data: DataEntry[]; seq: number; reset: boolean } {
+  if (since < epoch || since > currentSeq()) {
+    return { data: dataStore, seq: currentSeq(), reset: true };
+  }
+  return { data: dataStore.slice(since - epoch), seq: currentSeq(), reset: false };
+}
+
 export function clearData(): void {
+  // A new range too: cursors into the cleared entries must reset
+  epoch = Math.max(Date.now() * 1000, currentSeq() + 1);
   dataStore.length = 0;
 }
-
@@ -0,0 +1,33 @@
+import importlib
+
+from .registry import PromptRegistry, PromptVersion, registry
+
+# Everything else loads on first access, so importing the package (or one prompt
+# module) doesn't pay for the builders, the prompt texts or the handbook index
+_LAZY = {
+    "PromptParts": "builders",
+    "PromptStats": "builders",
+    "TRIAGE_OUTPUT_FIELDS": "builders",
+    "build_final_decision_prompt": "builders",
+    "build_triage_batch_prompt": "builders",
+    "build_triage_prompt": "builders",
+    "estimate_tokens": "builders",
+    "section_tokens": "builders",
+    "triage_prompt_version": "builders",
+    "HandbookIndex": "handbook",
+    "build_index": "handbook",
+    "default_index": "handbook",
+}
+
+
+def __getattr__(name):
+    module = _LAZY.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(f".{module}", __name__), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY))
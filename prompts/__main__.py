@@ -0,0 +1,3 @@
+from .builders import print_token_report
+
+print_token_report()
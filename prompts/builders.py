@@ -0,0 +1,270 @@
+"""
+Structured prompt builders.
+
+Each prompt is split into a static prefix (the ESI rules, byte-identical for
+every patient, so provider prompt caching can reuse it) and a short per-patient
+suffix (the record). The prefixes come from the prompt registry
+(prompts.registry), and each PromptParts carries the version that built it.
+The triage prompt also comes as a core prompt without the hand-copied handbook
+examples, with the handbook passages relevant to the patient retrieved into the
+suffix instead (prompts.handbook). PromptStats keeps
+track of how many bytes/tokens each request sends and how often the prefix
+would have been a cache hit.
+
+    python -m prompts    # token estimate per prompt section
+"""
+import json
+import math
+import re
+import threading
+import time
+
+from .handbook import default_index
+from .registry import registry
+
+_PIECE_RE = re.compile(r"[A-Za-z0-9]+|[^\sA-Za-z0-9]")
+_HEADING_RE = re.compile(r"^(#{1,2} .+)$", re.MULTILINE)
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Tokenizer-free token estimate: every punctuation mark counts as one token and
+    every word as one token per 4 characters (BPE vocabularies split long words).
+    """
+    return sum(math.ceil(len(piece) / 4) for piece in _PIECE_RE.findall(text))
+
+
+def section_tokens(text: str):
+    """[(heading, estimated tokens)] for each "#"/"##" section of a prompt, in order."""
+    sections = []
+    matches = list(_HEADING_RE.finditer(text))
+    if matches and matches[0].start() > 0 and text[:matches[0].start()].strip():
+        sections.append(("(preamble)", estimate_tokens(text[:matches[0].start()])))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        sections.append((match.group(1).strip(), estimate_tokens(text[match.start():end])))
+    return sections
+
+
+class PromptParts:
+    """
+    A prompt as a cacheable static prefix plus a per-patient suffix. `version`
+    names the registry prompt (and retrieval setting) the prefix came from.
+    """
+
+    __slots__ = ("name", "prefix", "suffix", "prefix_hash", "version", "prefix_bytes")
+
+    def __init__(self, name: str, prefix: str, suffix: str, prefix_hash: str, version: str = None,
+                 prefix_bytes: int = None):
+        self.name = name
+        self.prefix = prefix
+        self.suffix = suffix
+        self.prefix_hash = prefix_hash
+        self.version = version or prefix_hash
+        self.prefix_bytes = prefix_bytes
+
+    @classmethod
+    def from_prompt(cls, name: str, prompt, suffix: str, version: str = None):
+        """Parts with a registry PromptVersion as the prefix (its hash and size are already known)."""
+        return cls(name, prompt.text, suffix, prompt.hash, version or prompt.version, prompt.nbytes)
+
+    @property
+    def text(self):
+        return self.prefix + self.suffix
+
+    def as_messages(self, cache_marker: bool = False):
+        """
+        Chat messages: the prefix as the system message, the patient as the user message.
+        cache_marker=True adds an explicit cache breakpoint on the system block for
+        providers that need one; others cache identical prefixes automatically.
+        """
+        system = {"type": "text", "text": self.prefix}
+        if cache_marker:
+            system["cache_control"] = {"type": "ephemeral"}
+        return [
+            {"role": "system", "content": [system]},
+            {"role": "user", "content": self.suffix},
+        ]
+
+
+class PromptStats:
+    """
+    Bytes and estimated tokens sent per patient, split into prefix and suffix, and
+    the prefix-cache hit ratio: a request counts as a hit when the same prefix was
+    sent within cache_ttl_s (providers keep cached prefixes for a few minutes).
+    """
+
+    def __init__(self, cache_ttl_s: float = 300):
+        self.cache_ttl_s = cache_ttl_s
+        self.requests = 0
+        self.patients = 0
+        self.prefix_hits = 0
+        self.bytes_sent = 0
+        self.uncached_bytes = 0  # bytes the provider has to process from scratch
+        self.prefix_tokens = 0
+        self.suffix_tokens = 0
+        self._last_sent = {}  # prefix hash -> monotonic time last sent
+        self._prefix_tokens = {}  # prefix hash -> estimated tokens
+        self._lock = threading.Lock()
+
+    def record(self, parts: PromptParts, patients: int = 1):
+        now = time.monotonic()
+        prefix_bytes = parts.prefix_bytes if parts.prefix_bytes is not None else len(parts.prefix.encode())
+        suffix_bytes = len(parts.suffix.encode())
+        suffix_tokens = estimate_tokens(parts.suffix)
+        with self._lock:
+            if parts.prefix_hash not in self._prefix_tokens:
+                self._prefix_tokens[parts.prefix_hash] = estimate_tokens(parts.prefix)
+            last = self._last_sent.get(parts.prefix_hash)
+            hit = last is not None and now - last <= self.cache_ttl_s
+            self._last_sent[parts.prefix_hash] = now
+            self.requests += 1
+            self.patients += patients
+            self.prefix_hits += hit
+            self.bytes_sent += prefix_bytes + suffix_bytes
+            self.uncached_bytes += suffix_bytes if hit else prefix_bytes + suffix_bytes
+            self.prefix_tokens += self._prefix_tokens[parts.prefix_hash]
+            self.suffix_tokens += suffix_tokens
+
+    def report(self):
+        with self._lock:
+            patients = max(self.patients, 1)
+            return {
+                "requests": self.requests,
+                "patients": self.patients,
+                "prefix_hit_ratio": self.prefix_hits / self.requests if self.requests else 0.0,
+                "bytes_per_patient": self.bytes_sent / patients,
+                "uncached_bytes_per_patient": self.uncached_bytes / patients,
+                "prefix_tokens": self.prefix_tokens,
+                "suffix_tokens": self.suffix_tokens,
+            }
+
+
+_COMPLAINT_KEYS = ("chief_complaint_and_reported_symptoms", "chief complaint and reported symptoms", "complaint")
+
+
+def _patient_suffix(patient: dict) -> str:
+    return "\n# Patient record\n" + json.dumps(patient, ensure_ascii=False, default=str) + "\n"
+
+
+def _handbook_suffix(patients, passages: int) -> str:
+    """The top `passages` handbook passages for each patient's complaint (shared ones once), as a prompt section."""
+    index = default_index()
+    found = {}
+    for patient in patients:
+        complaint = next((str(patient[key]) for key in _COMPLAINT_KEYS if patient.get(key)), "")
+        for passage in index.search(complaint, passages):
+            found.setdefault(passage["text"], passage["page"])
+    if not found:
+        return ""
+    return "\n# ESI handbook passages relevant to this request\n" + "\n".join(
+        f"[p. {page}] {text}" for text, page in found.items()
+    ) + "\n"
+
+
+def _triage_prompt(patient, passages, variant):
+    """The registry triage prompt for this request: `variant`, else "core" with passages, else the configured one."""
+    if variant is None and passages:
+        variant = "core"
+    return registry.get("triage", variant, unit=None if patient is None else _patient_id(patient))
+
+
+def triage_prompt_version(passages: int = 0, variant: str = None, patient: dict = None) -> str:
+    """
+    Identifies the triage instructions build_triage_prompt(patient, passages=passages)
+    sends, for caching or recording which prompt produced a result. Under an A/B
+    split of the triage prompt, pass the patient: each one gets the variant its id
+    is routed to.
+    """
+    version = _triage_prompt(patient, passages, variant).version
+    return f"{version}+handbook{passages}" if passages else version
+
+
+def _patient_id(patient: dict):
+    return next((str(patient[key]) for key in ("patient_id", "patient id", "id") if patient.get(key) not in (None, "")),
+                None)
+
+
+def build_triage_prompt(patient: dict, stats: PromptStats = None, passages: int = 0,
+                        variant: str = None) -> PromptParts:
+    """
+    The triage agent prompt for one patient record. With passages=k the prefix is
+    the core prompt (no examples) and the k handbook passages that best match
+    the patient's complaint go in the suffix, next to the record. Without a
+    variant, the registry picks one (its default or A/B split, by patient id).
+    """
+    prompt = _triage_prompt(patient, passages, variant)
+    if passages:
+        parts = PromptParts.from_prompt("triage_handbook", prompt,
+                                        _handbook_suffix([patient], passages) + _patient_suffix(patient),
+                                        f"{prompt.version}+handbook{passages}")
+    else:
+        parts = PromptParts.from_prompt("triage", prompt, _patient_suffix(patient))
+    if stats is not None:
+        stats.record(parts)
+    return parts
+
+
+# Output contract for batched requests; the field names are the ones the
+# triage prompt's "Output Format" section asks for
+TRIAGE_OUTPUT_FIELDS = [
+    "patient id",
+    "time of arrival",
+    "chief complaint and reported symptoms",
+    "triage level",
+    "triaged?",
+    "rational behind the triage classification",
+]
+_BATCH_INSTRUCTIONS = (
+    "This request contains several patient records instead of one. Triage each patient independently.\n"
+    "Return ONLY a JSON array with exactly one object per patient, each with the fields "
+    + json.dumps(TRIAGE_OUTPUT_FIELDS)
+    + ". Copy each \"patient id\" exactly as received.\n"
+    "\n# Patient records\n"
+)
+
+
+def build_triage_batch_prompt(patients, stats: PromptStats = None, passages: int = 0,
+                              variant: str = None) -> PromptParts:
+    """
+    The triage agent prompt for several patients at once. The prefix is the same
+    as for a single patient (so it stays cached); the suffix asks for a JSON array
+    with one object per patient, keyed by patient id. With passages=k, the
+    handbook passages for every patient in the batch come first in the suffix.
+    """
+    patients = list(patients)
+    suffix = (
+        f"\n# Batch of {len(patients)} patients\n"
+        + _BATCH_INSTRUCTIONS
+        + json.dumps(patients, ensure_ascii=False, default=str)
+        + "\n"
+    )
+    # One prompt per batch: the A/B split goes by the first patient
+    prompt = _triage_prompt(patients[0] if patients else None, passages, variant)
+    if passages:
+        parts = PromptParts.from_prompt("triage_batch_handbook", prompt, _handbook_suffix(patients, passages) + suffix,
+                                        f"{prompt.version}+handbook{passages}")
+    else:
+        parts = PromptParts.from_prompt("triage_batch", prompt, suffix)
+    if stats is not None:
+        stats.record(parts, patients=len(patients))
+    return parts
+
+
+def build_final_decision_prompt(patient: dict, stats: PromptStats = None) -> PromptParts:
+    """The final-decision (level 2 vs 3) prompt for one patient record with vitals."""
+    parts = PromptParts.from_prompt("final_decision", registry.get("final_decision", unit=_patient_id(patient)),
+                                    _patient_suffix(patient))
+    if stats is not None:
+        stats.record(parts)
+    return parts
+
+
+def print_token_report():
+    """Estimated tokens per section of each static prompt."""
+    for name in registry.names():
+        for variant in registry.variants(name):
+            prompt = registry.get(name, variant)
+            print(f"{prompt.version}: ~{prompt.tokens} tokens, {prompt.nbytes} bytes")
+            for heading, tokens in section_tokens(prompt.text):
+                print(f"  {tokens:>6}  {heading}")
@@ -0,0 +1,365 @@
+"""
+Local retrieval over the ESI handbook (Esi_Handbook.pdf at the repo root).
+
+build_index() extracts the handbook text, splits every page into overlapping
+passages and writes a BM25 index as one compact file, which HandbookIndex
+memory-maps and searches without loading the passages:
+
+    python -m prompts.handbook build                      # writes prompts/esi_handbook.idx
+    python -m prompts.handbook query "worst headache of my life after lifting furniture"
+
+default_index() opens the default index on first use (building it first if it is
+missing), so the triage prompt builders can attach the top-k passages for a
+patient's complaint to the slimmer core prompt.
+"""
+import array
+import heapq
+import math
+import mmap
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+HANDBOOK_PDF = os.path.join(ROOT_DIR, "Esi_Handbook.pdf")
+INDEX_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "esi_handbook.idx")
+
+PASSAGE_WORDS = 120  # words per passage...
+PASSAGE_STRIDE = 90  # ...starting every this many words (neighbours overlap by 30)
+MIN_PAGE_WORDS = 25  # title and blank pages have nothing to retrieve
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_MAGIC = b"ESIIDX1\0"
+_HEADER = struct.Struct("<8sIIIII4x")  # magic, passages, terms, postings, vocab bytes, text bytes (32 bytes)
+_STOPWORDS = frozenset(
+    "a an and are as at be been but by can could do does for from had has have he her his if in into is it its "
+    "may might must no not of on or our she should so such than that the their them then there these they this "
+    "those to was we were what when where which while who will with would you your".split()
+)
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_CITATION_RE = re.compile(r"\((?:19|20)\d\d[a-z]?\)")
+
+
+# --- Text ---
+def tokenize(text: str):
+    """Lowercase word terms without stopwords, with plurals folded ("injuries" -> "injury", "pains" -> "pain")."""
+    terms = []
+    for word in _WORD_RE.findall(text.lower()):
+        if word in _STOPWORDS:
+            continue
+        if len(word) > 4 and word.endswith("ies"):
+            word = word[:-3] + "y"
+        elif len(word) > 3 and word.endswith("s") and not word.endswith(("ss", "us", "is")):
+            word = word[:-1]
+        terms.append(word)
+    return terms
+
+
+# --- PDF extraction (the handbook's Flate-compressed content streams; no PDF library needed) ---
+_OBJ_RE = re.compile(rb"(\d+) 0 obj")
+_REF_RE = re.compile(rb"(\d+) 0 R")
+_CONTENT_TOKEN_RE = re.compile(rb"\(|\[|\]|<[0-9A-Fa-f\s]*>|/[^\s/\[\]()<>]+|[-+.\d]+|[A-Za-z'\"*]+")
+_ARRAY_START = object()
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+
+def _objects(data: bytes):
+    """{object number: body bytes} (dictionary and, for streams, the raw stream after it)."""
+    starts = list(_OBJ_RE.finditer(data))
+    objects = {}
+    for i, match in enumerate(starts):
+        end = starts[i + 1].start() if i + 1 < len(starts) else len(data)
+        objects[int(match.group(1))] = data[match.end():end]
+    return objects
+
+
+def _stream(body: bytes):
+    """The decompressed stream of an object body, or None."""
+    match = re.search(rb"stream\r?\n", body)
+    if match is None or b"FlateDecode" not in body[:match.start()]:
+        return None
+    try:
+        return zlib.decompressobj().decompress(body[match.end():])
+    except zlib.error:
+        return None
+
+
+def _pages(objects):
+    """Page object numbers in reading order (the page tree from the catalog's /Pages)."""
+    root = next((body for body in objects.values() if re.search(rb"/Type\s*/Catalog", body)), None)
+    if root is None:
+        return sorted(n for n, body in objects.items() if re.search(rb"/Type\s*/Page\b", body))
+    pages = []
+    stack = [int(re.search(rb"/Pages\s+(\d+) 0 R", root).group(1))]
+    while stack:
+        number = stack.pop()
+        body = objects.get(number, b"")
+        kids = re.search(rb"/Kids\s*\[([^\]]*)\]", body)
+        if kids is None:
+            pages.append(number)
+        else:
+            stack.extend(reversed([int(n) for n in _REF_RE.findall(kids.group(1))]))
+    return pages
+
+
+def _read_string(content: bytes, i: int):
+    """The literal string starting after the "(" at content[i - 1]; returns (bytes, index after ")")."""
+    out = bytearray()
+    depth = 1
+    while i < len(content):
+        c = content[i:i + 1]
+        if c == b"\\":
+            nxt = content[i + 1:i + 2]
+            if nxt.isdigit():
+                octal = re.match(rb"[0-7]{1,3}", content[i + 1:i + 4]).group()
+                out.append(int(octal, 8) & 0xFF)
+                i += 1 + len(octal)
+                continue
+            out += _ESCAPES.get(nxt, b"" if nxt in b"\r\n" else nxt)
+            i += 2
+            continue
+        if c == b"(":
+            depth += 1
+        elif c == b")":
+            depth -= 1
+            if depth == 0:
+                return bytes(out), i + 1
+        out += c
+        i += 1
+    return bytes(out), i
+
+
+def _page_text(content: bytes):
+    """The text shown by a content stream: strings joined in order, a space at each line move."""
+    pieces = []
+    operands = []
+    i = 0
+    while True:
+        match = _CONTENT_TOKEN_RE.search(content, i)
+        if match is None:
+            break
+        token, i = match.group(), match.end()
+        if token == b"(":
+            text, i = _read_string(content, i)
+            operands.append(text.decode("mac_roman"))
+        elif token == b"[":
+            operands.append(_ARRAY_START)
+        elif token == b"]":
+            # TJ array: strings, and kerning numbers (a big negative one is a word gap)
+            starts = [n for n, op in enumerate(operands) if op is _ARRAY_START]
+            start = starts[-1] if starts else -1
+            items = operands[start + 1:]
+            operands[max(start, 0):] = ["".join(
+                item if isinstance(item, str) else " " if isinstance(item, float) and item < -250 else ""
+                for item in items
+            )]
+        elif token[:1] in b"-+.0123456789":
+            try:
+                operands.append(float(token))
+            except ValueError:
+                operands.clear()
+        elif token[:1] in b"/<":
+            operands.append(None)
+        else:
+            if token in (b"Tj", b"TJ", b"'", b'"'):
+                if token in (b"'", b'"'):
+                    pieces.append(" ")
+                pieces.append(next((op for op in reversed(operands) if isinstance(op, str)), ""))
+            elif token in (b"Td", b"TD") and len(operands) >= 2 and isinstance(operands[-1], float):
+                if abs(operands[-1]) > 0.1:  # a move down; a move along the line only splits kerned words
+                    pieces.append(" ")
+            elif token in (b"T*", b"Tm", b"ET"):
+                pieces.append(" ")
+            operands.clear()
+    return re.sub(r"\s+", " ", "".join(pieces)).strip()
+
+
+def extract_pages(path: str = HANDBOOK_PDF):
+    """[(page number, text)] of a PDF whose pages use Flate-compressed text content streams."""
+    with open(path, "rb") as f:
+        objects = _objects(f.read())
+    pages = []
+    for page_number, obj in enumerate(_pages(objects), start=1):
+        contents = re.search(rb"/Contents\s*(\[[^\]]*\]|\d+ 0 R)", objects[obj])
+        if contents is None:
+            continue
+        streams = [_stream(objects.get(int(n), b"")) for n in _REF_RE.findall(contents.group(1))]
+        text = " ".join(_page_text(stream) for stream in streams if stream)
+        if text:
+            pages.append((page_number, text))
+    return pages
+
+
+def split_passages(pages):
+    """[(page number, passage text)]: overlapping PASSAGE_WORDS-word windows, reference lists left out."""
+    passages = []
+    for page_number, text in pages:
+        words = text.split()
+        if len(words) < MIN_PAGE_WORDS:
+            continue
+        for start in range(0, max(len(words) - PASSAGE_WORDS + PASSAGE_STRIDE, 1), PASSAGE_STRIDE):
+            passage = " ".join(words[start:start + PASSAGE_WORDS])
+            if len(_CITATION_RE.findall(passage)) >= 3:
+                continue  # a page of references matches everything and says nothing
+            passages.append((page_number, passage))
+    return passages
+
+
+# --- Index file ---
+def build_index(pdf_path: str = HANDBOOK_PDF, index_path: str = INDEX_PATH):
+    """
+    Extract, split and index the handbook into index_path. Layout (little-endian,
+    every array 4-byte aligned): header, term offsets, posting offsets, posting
+    passage ids, posting BM25 weights (float32), passage pages, passage text
+    offsets, vocabulary (sorted terms), passage text. Returns the passage count.
+    """
+    passages = split_passages(extract_pages(pdf_path))
+    term_counts = [_counts(tokenize(text)) for _, text in passages]
+    lengths = [sum(counts.values()) for counts in term_counts]
+    average = sum(lengths) / max(len(lengths), 1)
+    postings = {}  # term -> [(passage id, term frequency)]
+    for passage_id, counts in enumerate(term_counts):
+        for term, count in counts.items():
+            postings.setdefault(term, []).append((passage_id, count))
+
+    vocab = sorted(postings)
+    term_offsets, posting_offsets = array.array("I", [0]), array.array("I", [0])
+    docs, weights = array.array("I"), array.array("f")
+    vocab_blob = bytearray()
+    for term in vocab:
+        plist = postings[term]
+        # BM25 term weight precomputed per (term, passage): a query only adds them up
+        idf = math.log(1 + (len(passages) - len(plist) + 0.5) / (len(plist) + 0.5))
+        for passage_id, count in plist:
+            norm = count + BM25_K1 * (1 - BM25_B + BM25_B * lengths[passage_id] / average)
+            docs.append(passage_id)
+            weights.append(idf * count * (BM25_K1 + 1) / norm)
+        vocab_blob += term.encode()
+        term_offsets.append(len(vocab_blob))
+        posting_offsets.append(len(docs))
+    pages = array.array("I", (page for page, _ in passages))
+    text_offsets, text_blob = array.array("I", [0]), bytearray()
+    for _, text in passages:
+        text_blob += text.encode()
+        text_offsets.append(len(text_blob))
+
+    tmp_path = f"{index_path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(passages), len(vocab), len(docs), len(vocab_blob), len(text_blob)))
+        for part in (term_offsets, posting_offsets, docs, weights, pages, text_offsets):
+            f.write(part.tobytes())
+        f.write(vocab_blob)
+        f.write(text_blob)
+    os.replace(tmp_path, index_path)
+    return len(passages)
+
+
+def _counts(terms):
+    counts = {}
+    for term in terms:
+        counts[term] = counts.get(term, 0) + 1
+    return counts
+
+
+class HandbookIndex:
+    """
+    A built index, memory-mapped read-only: the postings and passages stay in
+    the page cache and only the vocabulary is turned into a dict (on the first
+    search). search() returns the k best passages for a query by BM25.
+    """
+
+    def __init__(self, path: str = INDEX_PATH):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.passages, terms, postings, vocab_bytes, text_bytes = _HEADER.unpack_from(self._map)
+        if magic != _MAGIC:
+            raise ValueError(f"{path} is not an ESI handbook index.")
+        view = memoryview(self._map)
+        offset = _HEADER.size
+        sections = {}
+        for name, fmt, count in (("term_offsets", "I", terms + 1), ("posting_offsets", "I", terms + 1),
+                                 ("docs", "I", postings), ("weights", "f", postings),
+                                 ("pages", "I", self.passages), ("text_offsets", "I", self.passages + 1)):
+            sections[name] = view[offset:offset + 4 * count].cast(fmt)
+            offset += 4 * count
+        self._term_offsets, self._posting_offsets = sections["term_offsets"], sections["posting_offsets"]
+        self._docs, self._weights = sections["docs"], sections["weights"]
+        self._pages, self._text_offsets = sections["pages"], sections["text_offsets"]
+        self._vocab_start = offset
+        self._text_start = offset + vocab_bytes
+        self._terms = None  # term -> term id, built on the first search
+        self._lock = threading.Lock()
+
+    def _term_ids(self):
+        if self._terms is None:
+            with self._lock:
+                if self._terms is None:
+                    blob = self._map[self._vocab_start:self._text_start].decode()
+                    offsets = self._term_offsets.tolist()
+                    self._terms = {blob[offsets[i]:offsets[i + 1]]: i for i in range(len(offsets) - 1)}
+        return self._terms
+
+    def search(self, query: str, k: int = 4):
+        """[{"page", "text", "score"}] of the k passages scoring highest for `query` (fewer if little matches)."""
+        terms = self._term_ids()
+        scores = {}
+        for term in set(tokenize(query)):
+            term_id = terms.get(term)
+            if term_id is None:
+                continue
+            start, end = self._posting_offsets[term_id], self._posting_offsets[term_id + 1]
+            for passage_id, weight in zip(self._docs[start:end], self._weights[start:end]):
+                scores[passage_id] = scores.get(passage_id, 0.0) + weight
+        best = heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+        return [
+            {"page": self._pages[passage_id], "text": self.passage(passage_id), "score": round(score, 3)}
+            for passage_id, score in best
+        ]
+
+    def passage(self, passage_id: int):
+        start = self._text_start + self._text_offsets[passage_id]
+        return self._map[start:self._text_start + self._text_offsets[passage_id + 1]].decode()
+
+
+_default_index = None
+_default_index_lock = threading.Lock()
+
+
+def default_index():
+    """The default HandbookIndex, opened on first use (and built first if the file is missing)."""
+    global _default_index
+    if _default_index is None:
+        with _default_index_lock:
+            if _default_index is None:
+                if not os.path.exists(INDEX_PATH):
+                    build_index()
+                _default_index = HandbookIndex(INDEX_PATH)
+    return _default_index
+
+
+def main(argv):
+    if argv[:1] == ["build"]:
+        start = time.perf_counter()
+        count = build_index()
+        print(f"{count} passages indexed in {time.perf_counter() - start:.2f}s: "
+              f"{INDEX_PATH} ({os.path.getsize(INDEX_PATH) / 1024:.0f} KB)")
+    elif argv[:1] == ["query"] and len(argv) > 1:
+        index = default_index()
+        index.search("warm up")
+        start = time.perf_counter()
+        results = index.search(" ".join(argv[1:]))
+        print(f"{(time.perf_counter() - start) * 1000:.3f} ms")
+        for result in results:
+            print(f"\n[p. {result['page']}, score {result['score']}] {result['text']}")
+    else:
+        print(__doc__)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
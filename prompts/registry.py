@@ -0,0 +1,208 @@
+"""
+Registry of the agents' prompts, by name and variant.
+
+A prompt's text is loaded the first time it is asked for (nothing is imported
+at startup), hashed, and kept with what is derived from it once (its UTF-8
+size and token estimate), so every request can carry the version that built it:
+
+    registry.get("triage")              # the default variant
+    registry.get("triage", "core")      # the rules without the hand-copied examples
+    registry.get("triage").version      # "triage/default@1f0c9a..."
+
+Variants come from register() or from files: prompts/variants/<name>/<variant>.md
+is picked up without a code change. Which variant a request uses when none is
+given is set per prompt in the environment (read when the prompt is first
+used), so a process switches, or splits traffic, with a restart instead of a
+redeploy:
+
+    PROMPT_TRIAGE_VARIANT=core                  # everyone gets "core"
+    PROMPT_TRIAGE_SPLIT=default:50,core:50      # A/B by patient id (see choose())
+
+`python -m prompts` lists every variant with its version and size.
+
+Triage in production still runs in the n8n workflow with its own prompt; this
+registry (and the triage package built on it) is used by the benchmarks and
+tests until the triage path moves into this repo.
+"""
+import importlib
+import os
+import threading
+
+VARIANTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "variants")
+DEFAULT_VARIANT = "default"
+
+
+class PromptVersion:
+    """One loaded prompt variant: its text and content hash, plus figures derived from it once."""
+
+    __slots__ = ("name", "variant", "text", "hash", "nbytes", "_tokens")
+
+    def __init__(self, name: str, variant: str, text: str):
+        self.name = name
+        self.variant = variant
+        self.text = text
+        self.hash = _sha256(text.encode()).hexdigest()[:16]
+        self.nbytes = len(text.encode())
+        self._tokens = None
+
+    @property
+    def version(self):
+        """What gets stamped on requests and triage records: "<name>/<variant>@<hash>"."""
+        return f"{self.name}/{self.variant}@{self.hash}"
+
+    @property
+    def tokens(self):
+        if self._tokens is None:
+            from .builders import estimate_tokens
+            self._tokens = estimate_tokens(self.text)
+        return self._tokens
+
+    def __repr__(self):
+        return f"PromptVersion({self.version!r})"
+
+
+class PromptRegistry:
+    """
+    Prompt sources by (name, variant), loaded lazily. A source is "module:attribute"
+    (imported on first use), a callable returning the text, or a file path.
+    """
+
+    def __init__(self, variants_dir: str = VARIANTS_DIR):
+        self.variants_dir = variants_dir
+        self._sources = {}  # (name, variant) -> source
+        self._loaded = {}  # (name, variant) -> PromptVersion
+        self._routes = {}  # name -> (default variant, ((variant, cumulative weight), ...)), from the environment
+        self._lock = threading.RLock()  # derived variants load their base inside get()
+
+    def register(self, name: str, variant: str, source):
+        with self._lock:
+            self._sources[(name, variant)] = source
+            self._loaded.pop((name, variant), None)
+
+    def get(self, name: str, variant: str = None, unit=None) -> PromptVersion:
+        """
+        A prompt variant, loaded on first use. Without a variant: choose(name, unit)
+        when `unit` is given and a split is configured, else the default variant.
+        """
+        if variant is None:
+            variant = self.choose(name, unit)
+        version = self._loaded.get((name, variant))
+        if version is None:
+            with self._lock:
+                version = self._loaded.get((name, variant))
+                if version is None:
+                    version = self._loaded[(name, variant)] = PromptVersion(name, variant, self._load(name, variant))
+        return version
+
+    def default_variant(self, name: str):
+        return self._route(name)[0]
+
+    def set_split(self, name: str, weights: dict):
+        """Route requests without a variant between variants by weight ({"default": 1, "core": 1} = 50/50)."""
+        with self._lock:
+            self._routes[name] = (self.default_variant(name), _cumulative(weights.items()))
+
+    def choose(self, name: str, unit=None) -> str:
+        """
+        The variant for `unit` (a patient id) under the prompt's split, the same one
+        every time and in every process; the default variant when there is no split.
+        """
+        default, split = self._route(name)
+        if not split or unit is None:
+            return default
+        point = int.from_bytes(_sha256(f"{name}|{unit}".encode()).digest()[:8], "big") / 2 ** 64
+        for variant, upper in split:
+            if point < upper:
+                return variant
+        return split[-1][0]
+
+    def variants(self, name: str):
+        """The known variants of a prompt, registered or on disk."""
+        found = {variant for known, variant in self._sources if known == name}
+        directory = os.path.join(self.variants_dir, name)
+        if os.path.isdir(directory):
+            found.update(os.path.splitext(entry)[0] for entry in os.listdir(directory) if entry.endswith(".md"))
+        return sorted(found)
+
+    def names(self):
+        names = {name for name, _ in self._sources}
+        if os.path.isdir(self.variants_dir):
+            names.update(entry for entry in os.listdir(self.variants_dir)
+                         if os.path.isdir(os.path.join(self.variants_dir, entry)))
+        return sorted(names)
+
+    def loaded(self):
+        """The PromptVersions loaded so far."""
+        return list(self._loaded.values())
+
+    def _route(self, name):
+        """(default variant, split) of a prompt; the environment is read once, on first use."""
+        route = self._routes.get(name)
+        if route is None:
+            route = self._routes[name] = (
+                os.environ.get(f"PROMPT_{name.upper()}_VARIANT", DEFAULT_VARIANT),
+                _parse_split(os.environ.get(f"PROMPT_{name.upper()}_SPLIT", "")),
+            )
+        return route
+
+    def _load(self, name, variant):
+        source = self._sources.get((name, variant))
+        if source is None:
+            source = os.path.join(self.variants_dir, name, f"{variant}.md")
+            if not os.path.exists(source):
+                raise KeyError(f"Unknown prompt variant: {name}/{variant}")
+        if callable(source):
+            return source()
+        if isinstance(source, str) and ":" in source and not os.path.exists(source):
+            module, attribute = source.split(":", 1)
+            return getattr(importlib.import_module(module), attribute)
+        with open(source, encoding="utf-8") as f:
+            return f.read()
+
+
+def _sha256(data: bytes):
+    # hashlib (OpenSSL) is most of this module's import time; load it with the first prompt
+    import hashlib
+    return hashlib.sha256(data)
+
+
+def _cumulative(weights):
+    weights = [(variant.strip(), float(weight)) for variant, weight in weights if float(weight) > 0]
+    total = sum(weight for _, weight in weights)
+    split, upper = [], 0.0
+    for variant, weight in weights:
+        upper += weight / total
+        split.append((variant, upper))
+    return tuple(split)
+
+
+def _parse_split(text: str):
+    """"default:50,core:50" -> (("default", 0.5), ("core", 1.0)); () when unset or malformed."""
+    try:
+        return _cumulative(item.split(":") for item in text.split(",") if item.strip())
+    except (ValueError, ZeroDivisionError):
+        return ()
+
+
+def _without_examples(prompt: str) -> str:
+    """The prompt without its hand-copied "Examples:" blocks (each runs to the next blank line)."""
+    lines = []
+    skipping = False
+    for line in prompt.splitlines():
+        if line.strip() == "Examples:":
+            skipping = True
+        elif skipping and not line.strip():
+            skipping = False
+        if not skipping:
+            lines.append(line)
+    return "\n".join(lines) + "\n"
+
+
+registry = PromptRegistry()
+registry.register("triage", DEFAULT_VARIANT, "prompts.triage_agent_prompt:triage_agent_prompt")
+# The rules without the handbook examples; the examples relevant to each patient
+# are retrieved from the handbook index instead (see builders.build_triage_prompt)
+registry.register("triage", "core", lambda: _without_examples(registry.get("triage", DEFAULT_VARIANT).text))
+registry.register("final_decision", DEFAULT_VARIANT, "prompts.final_decision_agent_prompt:final_decision_agent_prompt")
+registry.register("receptionist", DEFAULT_VARIANT, "prompts.receptionist_agent_prompt:receptionist_agent_prompt")
+
@@ -0,0 +1,101 @@
+import math
+
+import streamlit as st
+
+from board_view import BoardView
+from patient_record import TRIAGE_LEVELS, PatientRecord
+
+COLUMNS = PatientRecord.COLUMNS
+
+# Waiting patients get interactive widgets only on the page being shown
+PAGE_SIZE = 25
+
+
+def _on_triage_change(store, patient_id: str, widget_key: str):
+    # Overrides live in the shared store, so every tab sees them and the patient is re-ranked
+    store.override(patient_id, st.session_state[widget_key])
+
+
+def _render_waiting(store, send_confirm, page_size):
+    """One page of waiting patients (most urgent first), with a level selectbox and confirm button per row."""
+    total = store.active_count()
+    pages = max(1, math.ceil(total / page_size))
+    page = 1
+    if pages > 1:
+        page = st.number_input(f"Page (of {pages})", min_value=1, max_value=pages, step=1, key="board_page")
+    start = (page - 1) * page_size
+    # top(k) only orders the first k patients, so later pages cost more but never a full sort
+    rows = store.top(start + page_size)[start:]
+    # One call for the page's levels (each store call may be a round trip to the store server)
+    levels = store.levels([patient_id for patient_id, _ in rows])
+    st.caption(f"Waiting: {total} — showing {start + 1}–{start + len(rows)}")
+
+    # Column layout is fixed (PatientRecord.COLUMNS) and reused for every row
+    spec = [1] * len(COLUMNS) + [1]
+    header_cols = st.columns(spec)
+    for i, (label, _) in enumerate(COLUMNS):
+        header_cols[i].markdown(f"**{label}**")
+    header_cols[-1].markdown("**Confirm?**")
+
+    for patient_id, record in rows:
+        row_cols = st.columns(spec)
+        selected = None
+        for i, (_, attr) in enumerate(COLUMNS):
+            if attr == "triage_level":
+                # Editable triage level control (the nurse's override if any, else the arrival level)
+                current_val = levels[patient_id]
+                # Accept common ESI levels 1-5 as strings or ints
+                options = TRIAGE_LEVELS
+                default_str = str(current_val) if current_val is not None else ""
+                # The key carries the shared level, so an override made in another tab
+                # shows up here instead of this tab's stale widget value
+                sel_key = f"triage_sel_{patient_id}_{default_str}"
+                selected = row_cols[i].selectbox(
+                    "Triage Level",  # Non-empty label for accessibility,
+                    options,
+                    index=options.index(default_str) if default_str in options else 0,
+                    key=sel_key,
+                    on_change=_on_triage_change,
+                    args=(store, patient_id, sel_key),
+                    label_visibility="collapsed",  # Hides the label in the UI
+                )
+            else:
+                row_cols[i].write(getattr(record, attr))
+        if row_cols[-1].button("✅", key=f"row_action_{patient_id}"):
+            # Send confirmation webhook once per row (confirm() succeeds once across all tabs),
+            # using the level shown in the selectbox
+            if store.confirm(patient_id, selected):
+                send_confirm(record, selected)
+            st.rerun()
+
+
+def _render_confirmed(view):
+    """Confirmed patients still retained, newest first, as one static table (no per-row widgets)."""
+    confirmed = view.frame("confirmed")
+    if confirmed.empty:
+        return
+    with st.expander(f"Confirmed patients ({len(confirmed)})"):
+        # The board shows the confirmed level (the nurse's override if any) as the triage level
+        table = confirmed.sort_values("confirmed_at", ascending=False, kind="stable")
+        table = table[["level" if attr == "triage_level" else attr for _, attr in COLUMNS]]
+        table.columns = [label for label, _ in COLUMNS]
+        st.dataframe(table, hide_index=True)
+
+
+def render_board(store, send_confirm, page_size: int = PAGE_SIZE, view: BoardView = None):
+    """
+    Render the nurse board from a PatientStore. send_confirm(record, level) is called
+    once per confirmed patient. `view` is a BoardView kept across runs (synced here);
+    without one the confirmed table is built from a full load of the store.
+    """
+    if not len(store):
+        st.info("No patients yet!")
+        return
+    if store.active_count():
+        _render_waiting(store, send_confirm, page_size)
+    else:
+        st.success("No patients waiting.")
+    if view is None:
+        view = BoardView()
+    view.sync(store)
+    _render_confirmed(view)
@@ -0,0 +1,213 @@
+import math
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+from patient_record import TRIAGE_LEVELS, canonical_level
+
+_LEVEL_CODES = {level: code for code, level in enumerate(TRIAGE_LEVELS)}
+LEVEL_DTYPE = pd.CategoricalDtype(TRIAGE_LEVELS, ordered=True)
+_NAT = np.iinfo(np.int64).min  # NaT once viewed as timedelta64
+_AGE_RE = re.compile(r"^\s*(\d+)")
+_TIME_RE = re.compile(r"^\s*(\d{1,2}):(\d{2})(?::(\d{2}))?")
+
+# (column, numpy dtype, missing value) in the fixed column order of every frame
+_COLUMNS = [
+    ("patient_id", object, None),
+    ("age", object, None),  # as received ("0 (15 months - a baby)" stays readable on the board)
+    ("age_years", np.int16, 0),  # parsed, with a mask: pandas Int16
+    ("arrival_time", object, None),  # as received
+    ("arrival", np.int64, _NAT),  # parsed: seconds after midnight, as timedelta64[s]
+    ("complaint", object, None),
+    ("triage_level", np.int8, -1),  # category codes over TRIAGE_LEVELS: the level the patient arrived with
+    ("triaged", object, None),
+    ("rationale", object, None),
+    ("level", np.int8, -1),  # the level shown on the board (the nurse's override if any)
+    ("sao2", np.float64, math.nan),
+    ("hr", np.float64, math.nan),
+    ("rr", np.float64, math.nan),
+    ("received_at", np.float64, math.nan),
+    ("confirmed_at", np.float64, math.nan),
+]
+COLUMNS = [name for name, _, _ in _COLUMNS]
+
+
+def _level_code(level):
+    return _LEVEL_CODES.get(canonical_level(level), -1)
+
+
+def _age(age):
+    """(years, known) from a record's age: 42, "42", "0 (15 months - a baby)"."""
+    if isinstance(age, (int, float)) and not isinstance(age, bool) and not math.isnan(age):
+        return int(age), True
+    match = _AGE_RE.match(age) if isinstance(age, str) else None
+    return (int(match.group(1)), True) if match else (0, False)
+
+
+def _seconds(arrival_time):
+    """Seconds after midnight of an "HH:MM[:SS]" arrival time, or the NaT marker."""
+    match = _TIME_RE.match(arrival_time) if isinstance(arrival_time, str) else None
+    if match is None:
+        return _NAT
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + int(seconds or 0)
+
+
+def _float(value):
+    return math.nan if value is None else float(value)
+
+
+class BoardView:
+    """
+    Columnar copy of the patient store for the board and analytics, kept in the
+    reading process and updated from the store's delta events (sync()), so a new
+    arrival costs one row append and a confirmation or override one cell write.
+
+    Columns are numpy arrays in a fixed order with fixed types (see COLUMNS):
+    triage levels as int8 category codes, age in years as int16 with a missing
+    mask, arrival time as seconds after midnight (the last two next to the text
+    as received). They grow by doubling. frame() wraps the filled part as a
+    DataFrame without copying or dtype inference (levels categorical, age_years
+    Int16, arrival timedelta64[s]). A patient evicted from the store leaves a
+    dead row until dead rows outnumber live ones; frames skip dead rows, which
+    costs one boolean take while any exist.
+
+    Frames share memory with the view: later overrides and confirmations show
+    through, so copy() a frame that is kept across runs.
+    """
+
+    def __init__(self, capacity: int = 256):
+        self.seq = None  # store event the view is current with; None until the first sync
+        self._size = 0
+        self._dead = 0
+        self._rows = {}  # patient_id -> row
+        self._arrays = {name: np.full(capacity, missing, dtype=dtype) for name, dtype, missing in _COLUMNS}
+        self._age_known = np.zeros(capacity, dtype=bool)
+        self._alive = np.zeros(capacity, dtype=bool)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._size - self._dead
+
+    # --- Following the store ---
+    def sync(self, store):
+        """
+        Apply the store's events since the last sync (one changes_since call), or
+        reload everything from full_state() when the view is new or fell behind.
+        Returns the number of events applied (-1 after a reload).
+        """
+        with self._lock:
+            events = None if self.seq is None else store.changes_since(self.seq)
+            if events is None:
+                state = store.full_state()
+                self._clear()
+                for patient in state["patients"]:
+                    self._put(patient)
+                self.seq = state["seq"]
+                return -1
+            for event in events:
+                self._apply(event)
+            if events:
+                self.seq = events[-1]["seq"]
+            return len(events)
+
+    def _apply(self, event):
+        kind, patient_id = event["type"], event["patient_id"]
+        if kind == "added":
+            self._put(event["patient"])
+            return
+        row = self._rows.get(patient_id)
+        if row is None:
+            return
+        if kind == "overridden":
+            self._arrays["level"][row] = _level_code(event["level"])
+        elif kind == "confirmed":
+            self._arrays["level"][row] = _level_code(event["level"])
+            self._arrays["confirmed_at"][row] = _float(event["confirmed_at"])
+        elif kind == "evicted":
+            del self._rows[patient_id]
+            self._alive[row] = False
+            self._dead += 1
+            if self._dead > self._size - self._dead + 64:
+                self._compact()
+
+    def _put(self, patient):
+        """Write a patient (a store _patient() dict) into its row, appending one for a new patient."""
+        patient_id = patient["patient_id"]
+        row = self._rows.get(patient_id)
+        if row is None:
+            if self._size == len(self._alive):
+                self._grow(max(2 * self._size, 16))
+            row = self._rows[patient_id] = self._size
+            self._size += 1
+        arrays = self._arrays
+        arrays["patient_id"][row] = patient_id
+        arrays["age"][row] = patient.get("age")
+        arrays["age_years"][row], self._age_known[row] = _age(patient.get("age"))
+        arrays["arrival_time"][row] = patient.get("arrival_time")
+        arrays["arrival"][row] = _seconds(patient.get("arrival_time"))
+        arrays["complaint"][row] = patient.get("complaint")
+        arrays["triage_level"][row] = _level_code(patient.get("triage_level"))
+        arrays["triaged"][row] = patient.get("triaged")
+        arrays["rationale"][row] = patient.get("rationale")
+        arrays["level"][row] = _level_code(patient.get("level"))
+        for name in ("sao2", "hr", "rr", "received_at", "confirmed_at"):
+            arrays[name][row] = _float(patient.get(name))
+        self._alive[row] = True
+
+    def _grow(self, capacity):
+        for name, dtype, missing in _COLUMNS:
+            grown = np.full(capacity, missing, dtype=dtype)
+            grown[:self._size] = self._arrays[name][:self._size]
+            self._arrays[name] = grown
+        for attr in ("_age_known", "_alive"):
+            grown = np.zeros(capacity, dtype=bool)
+            grown[:self._size] = getattr(self, attr)[:self._size]
+            setattr(self, attr, grown)
+
+    def _compact(self):
+        keep = np.flatnonzero(self._alive[:self._size])
+        for name in self._arrays:
+            self._arrays[name][:len(keep)] = self._arrays[name][keep]
+        self._age_known[:len(keep)] = self._age_known[keep]
+        self._alive[:len(keep)] = True
+        self._alive[len(keep):self._size] = False
+        self._size, self._dead = len(keep), 0
+        self._rows = {patient_id: row for row, patient_id in enumerate(self._arrays["patient_id"][:self._size])}
+
+    def _clear(self):
+        self._size = self._dead = 0
+        self._rows = {}
+        self._alive[:] = False
+
+    # --- Reads ---
+    def frame(self, which: str = "all"):
+        """
+        The view as a DataFrame with COLUMNS, one row per patient: "all" of them, the
+        "waiting" ones or the "confirmed" ones (filtering takes a copy of those rows).
+        """
+        with self._lock:
+            size = self._size
+            rows = None
+            if self._dead:
+                rows = self._alive[:size]
+            if which != "all":
+                confirmed = ~np.isnan(self._arrays["confirmed_at"][:size])
+                wanted = confirmed if which == "confirmed" else ~confirmed
+                rows = wanted if rows is None else rows & wanted
+            columns = {}
+            for name, dtype, _ in _COLUMNS:
+                values = self._arrays[name][:size]
+                if name == "age_years":
+                    values = pd.arrays.IntegerArray(values, ~self._age_known[:size])
+                elif name == "arrival":
+                    values = values.view("m8[s]")
+                elif dtype is np.int8:
+                    values = pd.Categorical.from_codes(values, dtype=LEVEL_DTYPE, validate=False)
+                if rows is not None:
+                    values = values[rows]
+                # Left to itself pandas would infer (and copy into) a string dtype for text columns
+                columns[name] = pd.Series(values, dtype=object, copy=False) if dtype is object else values
+        return pd.DataFrame(columns, copy=False)
@@ -0,0 +1,143 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+
+from webhook_client import CONNECT_TIMEOUT_S, pooled_session, post_with_retries
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dead_letters (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    payloads TEXT NOT NULL,  -- JSON list
+    error TEXT NOT NULL,
+    failed_at REAL NOT NULL
+);
+"""
+
+
+class ConfirmDispatcher:
+    """
+    Sends nurse confirmations to the n8n webhook from a background thread.
+
+    submit() only enqueues, so the button handler returns immediately. The worker
+    reuses one pooled requests.Session, takes the confirmations that arrive within
+    batch_window_s of each other together and posts each as its own payload (the
+    webhook's format), retrying failed posts with jittered exponential backoff
+    (webhook_client.post_with_retries). With post_lists=True, for a webhook that
+    accepts them, several confirmations taken together go as one JSON list.
+    Posts that still fail after max_retries (or that the worker failed on for
+    any other reason) land in dead_letters, where they stay until
+    retry_dead_letters() puts them back on the queue. With dead_letters_path they
+    are also kept in SQLite there (like the reception Outbox), so a restart of
+    the nurse UI still shows them.
+
+    With `metrics`, each delivered confirmation's time from submit() to the
+    webhook accepting it is recorded as confirm_dispatch_seconds.
+    """
+
+    def __init__(self, url: str, timeout=(CONNECT_TIMEOUT_S, 10), max_retries: int = 5, backoff_s: float = 0.5,
+                 max_backoff_s: float = 30, batch_window_s: float = 0.2, max_batch: int = 20, metrics=None,
+                 post_lists: bool = False, dead_letters_path: str = None):
+        self.url = url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.batch_window_s = batch_window_s
+        self.max_batch = max_batch
+        self.post_lists = post_lists
+        self.metrics = metrics
+        self.dead_letters = []  # [{"payloads": [...], "error": str, "failed_at": float}]
+        self.sent = 0
+        self._queue = queue.Queue()  # (payload, submitted at (monotonic))
+        self._lock = threading.Lock()
+        self._db = None
+        if dead_letters_path:
+            self._db = sqlite3.connect(dead_letters_path, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(_SCHEMA)
+            self.dead_letters = [
+                {"payloads": json.loads(payloads), "error": error, "failed_at": failed_at}
+                for payloads, error, failed_at in self._db.execute(
+                    "SELECT payloads, error, failed_at FROM dead_letters ORDER BY id")
+            ]
+        self._session = pooled_session()
+        self._worker = threading.Thread(target=self._run, name="confirm-dispatcher", daemon=True)
+        self._worker.start()
+
+    def submit(self, payload: dict):
+        """Queue one confirmation for delivery. Never blocks on the network."""
+        self._queue.put((payload, time.monotonic()))
+
+    def pending(self):
+        """Number of confirmations waiting to be sent (approximate)."""
+        return self._queue.qsize()
+
+    def retry_dead_letters(self):
+        """Put every dead-lettered confirmation back on the queue."""
+        with self._lock:
+            failed, self.dead_letters = self.dead_letters, []
+            if self._db is not None:
+                self._db.execute("DELETE FROM dead_letters")
+        for item in failed:
+            for payload in item["payloads"]:
+                self._queue.put((payload, time.monotonic()))
+        return sum(len(item["payloads"]) for item in failed)
+
+    # --- Worker ---
+    def _run(self):
+        while True:
+            items = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_window_s
+            while len(items) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            for batch in [items] if self.post_lists else [[item] for item in items]:
+                try:
+                    self._deliver(batch)
+                except Exception as e:
+                    # Never lose the worker (or the confirmations) to an unexpected error
+                    print(f"❌ Confirmation delivery crashed ({e!r}):", [payload for payload, _ in batch])
+                    self._dead_letter([payload for payload, _ in batch], repr(e))
+
+    def _deliver(self, items):
+        batch = [payload for payload, _ in items]
+        body = batch[0] if len(batch) == 1 else batch
+        error, _ = post_with_retries(
+            self._session, self.url, body, self.timeout, self.max_retries, self.backoff_s, self.max_backoff_s,
+        )
+        if error is None:
+            with self._lock:
+                self.sent += len(batch)
+            if self.metrics is not None:
+                self._observe_delivered(items)
+            return
+        print(f"❌ Confirmation failed after retries ({error}):", body)
+        self._dead_letter(batch, error)
+
+    def _dead_letter(self, payloads, error: str):
+        item = {"payloads": payloads, "error": error, "failed_at": time.time()}
+        with self._lock:
+            self.dead_letters.append(item)
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT INTO dead_letters (payloads, error, failed_at) VALUES (?, ?, ?)",
+                        (json.dumps(payloads), error, item["failed_at"]),
+                    )
+                except (sqlite3.Error, TypeError, ValueError) as e:
+                    print(f"❌ Could not persist dead letter ({e}); it is kept in memory only")
+
+    def _observe_delivered(self, items):
+        delivered = time.monotonic()
+        try:
+            for _, submitted in items:
+                self.metrics.observe("confirm_dispatch_seconds", delivered - submitted)
+        except (OSError, EOFError):
+            pass  # metrics are best effort; never lose the worker over them
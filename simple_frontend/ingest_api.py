@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import threading
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+import ingest_log
+import store_server
+from parsing_functions import ParseError, parse_payloads
+from patient_record import PatientRecord, triage_rank
+from vital_signs import classify as classify_vitals
+
+# Run with:  python ingest_api.py [--workers 4] [--port 8000]
+# n8n posts every triaged patient to http://<host>:8000/api/data. The patients
+# live in the store server (store_server.py), which every worker and every nurse
+# tab connects to; this script starts it too unless one is already running.
+
+ingest_log.setup()
+
+API_HOST = "0.0.0.0"
+API_PORT = 8000
+
+# /api/stream sends a comment line this often when nothing changed (keeps proxies from closing it)
+STREAM_KEEPALIVE_S = 15
+
+_store = None
+_metrics = None
+
+
+def get_store():
+    """The shared store (connected on first use, so each uvicorn worker gets its own proxy)."""
+    global _store
+    if _store is None:
+        _store = store_server.connect(timeout_s=10)
+    return _store
+
+
+def get_metrics():
+    """The shared hot-path histograms, kept in the store server next to the store."""
+    global _metrics
+    if _metrics is None:
+        _metrics = store_server.connect(timeout_s=10, shared="metrics")
+    return _metrics
+
+
+VITALS_NEEDED_RANK = triage_rank("3 - Vital Signs Needed")
+
+
+def _decide_vitals_locally(record: PatientRecord):
+    """
+    Settle a "level 3 - Vital Signs Needed" patient whose vitals came with the record
+    using the danger-zone table, so the final-decision LLM is only needed when the
+    table can't decide.
+    """
+    if triage_rank(record.triage_level) != VITALS_NEEDED_RANK or not record.has_vitals():
+        return
+    level, rationale = classify_vitals(record.age, record.sao2, record.hr, record.rr)
+    if level is not None:
+        record.triage_level = level
+        record.triaged = "YES"
+        record.rationale = rationale
+
+
+api = FastAPI()
+
+
+def _store_patient(record: PatientRecord, start: float, received_at: float):
+    """
+    Add the patient (once per idempotency key) and record this hop's timings.
+    Returns (patient_id, added, seconds spent on the request).
+    """
+    patient_id, added = get_store().add_once(record)
+    elapsed = time.perf_counter() - start
+    metrics = get_metrics()
+    metrics.observe("ingest_latency_seconds", elapsed)
+    # submitted_at comes from the receptionist's clock; skip it if the clocks disagree. A provisional
+    # record comes straight from the receptionist, not through triage, so it isn't this hop
+    timed = added and not record.is_provisional() and record.submitted_at is not None
+    if timed and received_at >= record.submitted_at:
+        metrics.observe("submit_to_ingest_seconds", received_at - record.submitted_at)
+    return patient_id, added, elapsed
+
+
+@api.post("/api/data")
+async def receive_data(request: Request):
+    start = time.perf_counter()
+    received_at = time.time()
+    raw = await request.body()
+    try:
+        body = json.loads(raw)
+    except ValueError:
+        return JSONResponse({"status": "error", "detail": "Body is not valid JSON."}, status_code=400)
+    # A patient as n8n posts it, an item list, an {'output': ...} wrapper, JSON text or several patients
+    try:
+        payloads = parse_payloads(body)
+    except ParseError as e:
+        return JSONResponse({"status": "error", "detail": str(e)}, status_code=422)
+    if len(payloads) == 1:
+        return await _receive_patient(payloads[0], request, start, received_at, len(raw))
+    # The request's correlation id and idempotency key can't stand for several patients
+    results = [await _receive_patient(payload, None, start, received_at, len(raw)) for payload in payloads]
+    return {"status": "ok", "patients": results}
+
+
+async def _receive_patient(payload: dict, request, start: float, received_at: float, nbytes: int):
+    # Normalize once here; everything downstream uses attribute access
+    record = PatientRecord.from_payload(payload)
+    headers = request.headers if request is not None else {}
+    # The receptionist stamps a correlation id at Submit; keep tracing if n8n dropped it
+    if record.correlation_id is None:
+        record.correlation_id = headers.get("x-correlation-id") or uuid.uuid4().hex
+    # The receptionist's outbox may resend a submission (and n8n re-run it); its key marks the resends
+    if record.idempotency_key is None:
+        record.idempotency_key = headers.get("idempotency-key")
+    _decide_vitals_locally(record)
+    # The store calls are blocking socket round trips; keep them off the event loop
+    patient_id, added, elapsed = await run_in_threadpool(_store_patient, record, start, received_at)
+    if not added:
+        ingest_log.event(
+            "duplicate", patient_id=patient_id, correlation_id=record.correlation_id, key=record.idempotency_key,
+        )
+        return {"status": "duplicate", "patient_id": patient_id, "correlation_id": record.correlation_id}
+    # One compact line per patient (ids and sizes, not the payload or the queue)
+    ingest_log.event(
+        "provisional" if record.is_provisional() else "received", patient_id=patient_id,
+        correlation_id=record.correlation_id, level=record.triage_level, bytes=nbytes, ms=f"{elapsed * 1000:.1f}",
+    )
+    ingest_log.debug_payload("received", payload)
+    return {"status": "ok", "correlation_id": record.correlation_id}
+
+
+@api.get("/api/queue")
+async def get_queue(limit: int = 20):
+    """The `limit` most urgent waiting patients (ESI level, then arrival time)."""
+    top = await run_in_threadpool(get_store().top, max(limit, 0))
+    return {"data": [record.to_dict() for _, record in top]}
+
+
+@api.get("/api/data")
+async def get_data(since: int | None = None):
+    """
+    Catch-up for dashboards: {"reset": False, "seq", "events"} with the changes
+    after `since`, or {"reset": True, "seq", "patients"} with everything when
+    `since` is missing or older than the events the store still keeps.
+    """
+    store = get_store()
+    events = None if since is None else await run_in_threadpool(store.changes_since, since)
+    if events is None:
+        return {"reset": True, **await run_in_threadpool(store.full_state)}
+    return {"reset": False, "seq": events[-1]["seq"] if events else since, "events": events}
+
+
+@api.get("/metrics")
+async def metrics():
+    """Hot-path histograms (see metrics.HISTOGRAMS) in the Prometheus text format."""
+    text = await run_in_threadpool(get_metrics().render)
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
+# --- Change notifications for /api/stream ---
+# One thread per worker blocks on the store and wakes every open stream,
+# instead of each stream holding a threadpool thread while it waits
+_store_changed = None  # asyncio.Event, swapped for a fresh one after each change
+_watcher = None
+
+
+def _notify_change():
+    global _store_changed
+    changed, _store_changed = _store_changed, asyncio.Event()
+    changed.set()
+
+
+def _watch_store(loop):
+    store = get_store()
+    version = store.version
+    while True:
+        seen, version = version, store.wait_for_change(version, STREAM_KEEPALIVE_S)
+        if version != seen:
+            loop.call_soon_threadsafe(_notify_change)
+
+
+def _ensure_watcher():
+    global _store_changed, _watcher
+    if _watcher is None:
+        _store_changed = asyncio.Event()
+        _watcher = threading.Thread(target=_watch_store, args=(asyncio.get_running_loop(),), daemon=True)
+        _watcher.start()
+
+
+def _sse(kind, data, seq):
+    return f"id: {seq}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _event_stream(seq):
+    store = get_store()
+    while True:
+        changed = _store_changed  # taken before reading, so a change made meanwhile still wakes us
+        events = None if seq is None else await run_in_threadpool(store.changes_since, seq)
+        if events is None:
+            state = await run_in_threadpool(store.full_state)
+            seq = state["seq"]
+            yield _sse("reset", state, seq)
+        elif events:
+            seq = events[-1]["seq"]
+            yield "".join(_sse(event["type"], event, event["seq"]) for event in events)
+        try:
+            await asyncio.wait_for(changed.wait(), STREAM_KEEPALIVE_S)
+        except asyncio.TimeoutError:
+            yield ": keepalive\n\n"
+
+
+@api.get("/api/stream")
+async def stream(request: Request, since: int | None = None):
+    """
+    Server-Sent Events with the store's delta events (added, overridden, confirmed,
+    evicted), each with its sequence number as the event id. Starts with a "reset"
+    event holding the full state unless `since` (or the Last-Event-ID header an
+    EventSource sends when it reconnects) can be caught up from the kept events.
+    """
+    last_event_id = request.headers.get("last-event-id", "")
+    if last_event_id.isdigit():
+        since = int(last_event_id)
+    _ensure_watcher()
+    return StreamingResponse(
+        _event_stream(since),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest API for n8n (patients go to the shared store).")
+    parser.add_argument("--host", default=API_HOST)
+    parser.add_argument("--port", type=int, default=API_PORT)
+    parser.add_argument("--workers", type=int, default=1)
+    args = parser.parse_args()
+
+    store_process = None
+    if not store_server.is_running():
+        store_process = multiprocessing.Process(target=store_server.serve, name="patient-store")
+        store_process.start()
+        store_server.connect(timeout_s=10)
+    try:
+        uvicorn.run(
+            "ingest_api:api",
+            host=args.host,
+            port=args.port,
+            workers=args.workers,
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+        )
+    finally:
+        if store_process is not None:
+            # SIGTERM lets the store sync its log before exiting
+            store_process.terminate()
+            store_process.join()
+
+
+if __name__ == "__main__":
+    main()
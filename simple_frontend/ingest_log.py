@@ -0,0 +1,74 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+
+# INGEST_LOG_LEVEL=DEBUG also logs full payloads, but only for a sample of
+# requests (INGEST_DEBUG_SAMPLE_RATE, default 1%), so debugging a busy shift
+# doesn't bring back an O(payload) write per request.
+LOG_LEVEL = os.environ.get("INGEST_LOG_LEVEL", "INFO").upper()
+DEBUG_SAMPLE_RATE = float(os.environ.get("INGEST_DEBUG_SAMPLE_RATE", "0.01"))
+
+logger = logging.getLogger("ingest")
+_listener = None
+
+
+class SampledDebugFilter(logging.Filter):
+    """Lets through every record above DEBUG and a `rate` fraction of DEBUG ones."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno > logging.DEBUG or random.random() < self.rate
+
+
+def _format_value(value):
+    text = str(value)
+    # Quote values with spaces ("3 - Vital Signs Needed") so every line still splits on spaces
+    return json.dumps(text) if " " in text or '"' in text else text
+
+
+def _format_fields(fields):
+    return " ".join(f"{key}={_format_value(value)}" for key, value in fields.items() if value is not None)
+
+
+def event(name: str, **fields):
+    """One compact line: `event=<name> key=value ...` (None values are left out)."""
+    if logger.isEnabledFor(logging.INFO):
+        logger.info("event=%s %s", name, _format_fields(fields))
+
+
+def debug_payload(name: str, payload):
+    """The full payload at DEBUG, for a sample of calls. Formatted only if this call is sampled."""
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("event=%s payload=%r", name, payload)
+
+
+def setup(level: str = LOG_LEVEL, debug_sample_rate: float = DEBUG_SAMPLE_RATE, stream=None):
+    """
+    Route the "ingest" logger through a queue: callers (the event loop) only
+    enqueue the record, and a listener thread does the actual write. Safe to call
+    more than once; returns the logger.
+    """
+    global _listener
+    if _listener is not None:
+        return logger
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    # Filter on the queue handler, so an unsampled debug record is dropped before it is formatted
+    handler.addFilter(SampledDebugFilter(debug_sample_rate))
+    output = logging.StreamHandler(stream)
+    output.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+    _listener = logging.handlers.QueueListener(records, output)
+    _listener.start()
+    atexit.register(_listener.stop)  # drains what is still queued
+
+    logger.addHandler(handler)
+    logger.setLevel(level)
+    logger.propagate = False
+    return logger
@@ -0,0 +1,82 @@
+import bisect
+import threading
+
+# Bucket upper bounds, in seconds
+FAST_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+PIPELINE_BUCKETS = (1, 2.5, 5, 10, 20, 30, 60, 120, 300)  # receptionist -> n8n/LLM -> ingest API
+CLINICAL_BUCKETS = (60, 300, 600, 900, 1800, 3600, 7200, 14400)  # minutes to hours
+
+# name: (help, buckets, label name or None)
+HISTOGRAMS = {
+    "ingest_latency_seconds": (
+        "Time to handle POST /api/data (parse, local vitals decision, store).", FAST_BUCKETS, None),
+    "submit_to_ingest_seconds": (
+        "Receptionist Submit to the patient reaching the ingest API (n8n and the triage LLM).", PIPELINE_BUCKETS, None),
+    "queue_wait_seconds": (
+        "Time a patient waited on the nurse board before being confirmed, by confirmed ESI level.",
+        CLINICAL_BUCKETS, "level"),
+    "door_to_triage_seconds": (
+        "Receptionist Submit to nurse confirmation (door-to-triage), by confirmed ESI level.",
+        CLINICAL_BUCKETS, "level"),
+    "confirm_dispatch_seconds": (
+        "Nurse confirm click to the n8n confirmation webhook accepting it (retries included).", FAST_BUCKETS, None),
+    "board_render_seconds": ("Time to render the nurse board in one Streamlit run.", FAST_BUCKETS, None),
+}
+
+
+class Histogram:
+    """Cumulative-bucket histogram, one series per label value (Prometheus semantics)."""
+
+    def __init__(self, name: str, help: str, buckets, label=None):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.label = label
+        self._series = {}  # label value -> [bucket counts..., +Inf count, sum]
+
+    def observe(self, value: float, label_value=None):
+        series = self._series.get(label_value)
+        if series is None:
+            series = self._series[label_value] = [0] * (len(self.buckets) + 1) + [0.0]
+        series[bisect.bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for label_value, series in sorted(self._series.items(), key=lambda item: str(item[0])):
+            prefix = f'{self.label}="{label_value}",' if self.label else ""
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), series):
+                cumulative += count
+                lines.append(f'{self.name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+            labels = f"{{{prefix[:-1]}}}" if prefix else ""
+            lines.append(f"{self.name}_sum{labels} {series[-1]}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """
+    The hot-path histograms (HISTOGRAMS), kept in the store server so the API
+    workers, the store itself and every nurse tab report into one place.
+    Each observe() is one call (one round trip through a proxy); render() is
+    the Prometheus text format served at /metrics.
+    """
+
+    PREFIX = "er_"
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._histograms = {
+            name: Histogram(self.PREFIX + name, help, buckets, label)
+            for name, (help, buckets, label) in HISTOGRAMS.items()
+        }
+
+    def observe(self, name: str, value: float, label_value=None):
+        with self._lock:
+            self._histograms[name].observe(value, label_value)
+
+    def render(self):
+        with self._lock:
+            lines = [line for histogram in self._histograms.values() for line in histogram.render()]
+        return "\n".join(lines) + "\n"
@@ -1,29 +1,30 @@
 import streamlit as st
-import threading
 import pandas as pd
-from fastapi import FastAPI, Request
-import uvicorn
 import time
-import requests
+import datetime
+import os
+
+import store_server
+from confirm_dispatcher import ConfirmDispatcher
+from board import render_board
+from board_view import BoardView
+from patient_record import PatientRecord
 
 # Must be the first Streamlit command
 st.set_page_config(page_title="Nurse Interface", page_icon="🚑", layout="centered")
 
-# Provide a single shared state across Streamlit reruns and the API thread
+# Patients are received by the ingest API (python ingest_api.py, its own process)
+# and kept in the store server; every tab reads and confirms through one proxy.
+# Wait a little for it: both are started together (see .devcontainer/devcontainer.json)
 @st.cache_resource
 def get_shared_state():
-    return {"data_store": []}
-
-shared_state = get_shared_state()
+    return {"store": store_server.connect(timeout_s=10), "metrics": store_server.connect(timeout_s=10, shared="metrics")}
 
-def _noop(*args, **kwargs):
-    return None
-
-# Track which rows have been confirmed (by index)
-if "confirmed_rows" not in st.session_state:
-    st.session_state["confirmed_rows"] = []
-if "triage_override" not in st.session_state:
-    st.session_state["triage_override"] = {}
+try:
+    shared_state = get_shared_state()
+except ConnectionError as e:
+    st.error(f"Patient store is not running ({e}). Start it with `python ingest_api.py`.")
+    st.stop()
 
 # --- Configuration for confirm webhook ---
 # Prefer setting in .streamlit/secrets.toml as:
@@ -31,124 +32,99 @@ if "triage_override" not in st.session_state:
 # CONFIRM_WEBHOOK_URL = st.secrets.get("N8N_CONFIRM_WEBHOOK_URL", "")
 # if not CONFIRM_WEBHOOK_URL:
     # Optional: allow hardcoding here if secrets not used
-CONFIRM_WEBHOOK_URL = "https://lujein.app.n8n.cloud/webhook/triage-confirmation"
-
-def _normalize_key(name: str):
-    return name.replace("_", "").replace(" ", "").lower()
-
-def _extract_field(row: dict, candidate_names):
-    # Try exact, case-insensitive, and normalized matches
-    for name in candidate_names:
-        if name in row:
-            return row.get(name)
-    lower_map = {k.lower(): v for k, v in row.items()}
-    for name in candidate_names:
-        if name.lower() in lower_map:
-            return lower_map[name.lower()]
-    norm_map = {_normalize_key(k): v for k, v in row.items()}
-    for name in candidate_names:
-        if _normalize_key(name) in norm_map:
-            return norm_map[_normalize_key(name)]
-    return None
-
-TRIAGE_COLUMN_NAME = "triage level"
-
-def _send_confirm(row: dict):
+CONFIRM_WEBHOOK_URL = os.environ.get(
+    "N8N_CONFIRM_WEBHOOK_URL", "https://lujein.app.n8n.cloud/webhook/triage-confirmation"
+)
+# Confirmations that could not be delivered are kept here across restarts
+CONFIRM_DEAD_LETTERS_PATH = os.environ.get(
+    "CONFIRM_DEAD_LETTERS_PATH",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "confirm_dead_letters.sqlite3"),
+)
+
+# One background sender shared by every tab (pooled connection, retries, dead letters)
+@st.cache_resource
+def get_confirm_dispatcher():
+    return ConfirmDispatcher(CONFIRM_WEBHOOK_URL, metrics=shared_state["metrics"],
+                             dead_letters_path=CONFIRM_DEAD_LETTERS_PATH)
+
+dispatcher = get_confirm_dispatcher()
+
+# Columnar copy of the store shared by every tab, brought up to date from the
+# store's change events on each run instead of rebuilt
+@st.cache_resource
+def get_board_view():
+    return BoardView()
+
+board_view = get_board_view()
+
+# The store's version, followed by one thread per server process: the refresh
+# check below reads it locally instead of calling the store every half second
+@st.cache_resource
+def get_version_watcher():
+    return store_server.VersionWatcher(shared_state["store"])
+
+version_watcher = get_version_watcher()
+
+# --- Refresh configuration ---
+# A tab checks the shared version this often (a local read, nothing is rendered)...
+REFRESH_CHECK_INTERVAL_S = 0.5
+# ...and only reruns the full board when the version moved, or at least this often
+MAX_STALENESS_S = 30
+
+def _send_confirm(record: PatientRecord, triage_level):
     if not CONFIRM_WEBHOOK_URL:
         return
     payload = {
-        "patient_id": _extract_field(row, ["patient_id", "patient id", "id"]),
-        "triage_level": row.get("triage level"),
+        "patient_id": record.patient_id,
+        "triage_level": triage_level,
+        "correlation_id": record.correlation_id,
     }
-    try:
-        requests.post(CONFIRM_WEBHOOK_URL, json=payload, timeout=5)
-    except Exception:
-        pass
-
-# --- Shared in-memory storage (lives in shared_state) ---
-data_store = shared_state["data_store"]
-
-# --- FastAPI setup (for receiving data from n8n) ---
-api = FastAPI()
-
-@api.post("/api/data")
-async def receive_data(request: Request):
-    body = await request.json()
-    data_store.append(body)
-    print("✅ Received data:", body)
-    print( "datastore", data_store)
-    return {"status": "ok"}
-
-def run_api():
-    """Run FastAPI in the background."""
-    uvicorn.run(api, host="0.0.0.0", port=8000)
-
-# --- Run FastAPI in background thread (only once) ---
-if "_api_thread" not in st.session_state:
-    st.session_state["_api_thread"] = threading.Thread(target=run_api, daemon=True)
-    st.session_state["_api_thread"].start()
+    dispatcher.submit(payload)
+
+# --- Shared store and metrics (proxies to the store server, live in shared_state) ---
+store = shared_state["store"]
+metrics = shared_state["metrics"]
 
 # --- Streamlit UI ---
 st.title("🚑 Nurse Interface")
 
-# Listening for data on http://localhost:8000/api/data
-
+# Remember which version this run renders (read before the data, so a
+# concurrent ingest causes one extra rerun rather than a missed patient)
+st.session_state["_seen_version"] = version_watcher.version
+st.session_state["_seen_dead_letters"] = len(dispatcher.dead_letters)
+st.session_state["_rendered_at"] = time.monotonic()
 
-def _handle_row_action(row_index: int):
-    try:
-        row = pd.DataFrame(data_store).iloc[row_index].to_dict()
-    except Exception:
-        row = {}
-    st.session_state["last_row_clicked"] = row
+# n8n posts to the ingest API on http://localhost:8000/api/data (see ingest_api.py)
 
 # --- Display data in a table ---
-if data_store:
-    df = pd.DataFrame(data_store)
-
-    # Render a lightweight table with a last-column button per row
-    # Header
-    triage_col = TRIAGE_COLUMN_NAME if TRIAGE_COLUMN_NAME in df.columns else None
-    header_cols = st.columns(len(df.columns) + 1)
-    for i, col_name in enumerate(df.columns):
-        label = f"**{col_name}**" if col_name != triage_col else f"**{col_name}**"
-        header_cols[i].markdown(label)
-    header_cols[-1].markdown("**Confirm?**")
-
-    # Rows
-    for idx, row in df.iterrows():
-        row_cols = st.columns(len(df.columns) + 1)
-        for i, col_name in enumerate(df.columns):
-            if col_name == triage_col:
-                # Editable triage level control
-                current_val = st.session_state["triage_override"].get(idx, row[col_name])
-                # Accept common ESI levels 1-5 as strings or ints
-                options = ["1", "2", "3", "3 - Vital Signs Needed", "4", "5"]
-                default_str = str(current_val) if current_val is not None else ""
-                selected = row_cols[i].selectbox(
-                    "Triage Level",  # Non-empty label for accessibility,
-                    options,
-                    index=options.index(default_str) if default_str in options else 0,
-                    key=f"triage_sel_{idx}",
-                    label_visibility="collapsed",  # Hides the label in the UI
-                )
-                st.session_state["triage_override"][idx] = selected
-            else:
-                row_cols[i].write(row[col_name])
-        label = "done" if idx in st.session_state["confirmed_rows"] else "✅"
-        if row_cols[-1].button(label, key=f"row_action_{idx}"):
-            if idx not in st.session_state["confirmed_rows"]:
-                # Send confirmation webhook once per row, using override if present
-                row_dict = row.to_dict()
-                override = st.session_state["triage_override"].get(idx)
-                if override is not None and triage_col is not None:
-                    row_dict[triage_col] = override
-                _send_confirm(row_dict)
-                st.session_state["confirmed_rows"].append(idx)
-            st.rerun()
-else:
-    st.info("No patients yet!")
-
-# --- Auto-refresh (poll for new data) ---
-# Always refresh every 2 seconds without user interaction
-time.sleep(2)
-st.rerun()
+# Only the visible page of waiting patients gets widgets; confirmed ones are one static table
+render_started = time.perf_counter()
+render_board(store, _send_confirm, view=board_view)
+metrics.observe("board_render_seconds", time.perf_counter() - render_started)
+
+# --- Confirmations that could not be delivered ---
+if dispatcher.dead_letters:
+    failed = [
+        {**payload, "error": item["error"], "failed at": datetime.datetime.fromtimestamp(item["failed_at"]).strftime("%H:%M:%S")}
+        for item in dispatcher.dead_letters
+        for payload in item["payloads"]
+    ]
+    st.warning(f"⚠️ {len(failed)} confirmation(s) could not be sent to n8n.")
+    st.dataframe(pd.DataFrame(failed), hide_index=True)
+    if st.button("Retry failed confirmations"):
+        dispatcher.retry_dead_letters()
+        st.rerun()
+
+# --- Auto-refresh (only when something changed) ---
+# Nurse actions rerun the script on their own; this fragment only compares the
+# shared version and reruns the whole board when new data arrived, a
+# confirmation failed for good, or the board went stale
+@st.fragment(run_every=REFRESH_CHECK_INTERVAL_S)
+def _watch_for_changes():
+    stale = time.monotonic() - st.session_state["_rendered_at"] >= MAX_STALENESS_S
+    changed = version_watcher.version != st.session_state["_seen_version"]
+    newly_failed = len(dispatcher.dead_letters) != st.session_state["_seen_dead_letters"]
+    if changed or newly_failed or stale:
+        st.rerun(scope="app")
+
+_watch_for_changes()
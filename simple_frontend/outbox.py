@@ -0,0 +1,153 @@
+import json
+import sqlite3
+import threading
+import time
+
+from webhook_client import CONNECT_TIMEOUT_S, READ_TIMEOUT_S, backoff_delay, pooled_session, post_with_retries
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS outbox (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    key TEXT NOT NULL UNIQUE,
+    payload TEXT NOT NULL,
+    state TEXT NOT NULL,  -- queued, sending, sent, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    error TEXT,
+    queued_at REAL NOT NULL,
+    sent_at REAL
+);
+CREATE INDEX IF NOT EXISTS outbox_state ON outbox (state, id);
+"""
+_PENDING = ("queued", "sending")
+
+
+class Outbox:
+    """
+    Submissions to a webhook, kept in SQLite until the webhook accepted them and
+    sent by a background thread oldest first, so a Streamlit run never waits on
+    the network and an outage delays submissions instead of losing them.
+
+    submit() stores the payload under its key (a second submit of the same key is
+    ignored) and returns. The worker posts the oldest pending one with
+    post_with_retries; while the webhook stays unreachable (connection errors,
+    timeouts, 5xx, 408, 429) that one stays at the head of the queue, "queued"
+    with the error, and is retried with backoff up to max_outage_backoff_s, so
+    order is kept. A payload the webhook rejects (other 4xx) is "failed" and
+    skipped until retry(key). A payload left "sending" by a crash is sent again
+    on startup; the receiver drops the resend by its idempotency key.
+
+    backlog() is the queue depth and the age of the oldest pending payload.
+    Sent payloads are kept for keep_sent_s, for status().
+    """
+
+    def __init__(self, url: str, path: str, timeout=(CONNECT_TIMEOUT_S, READ_TIMEOUT_S), max_retries: int = 3,
+                 backoff_s: float = 0.5, max_backoff_s: float = 8, max_outage_backoff_s: float = 60,
+                 keep_sent_s: float = 24 * 3600):
+        self.url = url
+        self.path = path
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_s = backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.max_outage_backoff_s = max_outage_backoff_s
+        self.keep_sent_s = keep_sent_s
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        with self._lock:
+            self._db.executescript(_SCHEMA)
+            self._db.execute("UPDATE outbox SET state = 'queued' WHERE state = 'sending'")
+            self._prune()
+        self._session = pooled_session()
+        self._worker = threading.Thread(target=self._run, name="outbox", daemon=True)
+        self._worker.start()
+
+    def submit(self, payload: dict, key: str):
+        """Store one payload for sending (once per key). Never blocks on the network. Returns the key."""
+        with self._lock:
+            self._db.execute(
+                "INSERT OR IGNORE INTO outbox (key, payload, state, queued_at) VALUES (?, ?, 'queued', ?)",
+                (key, json.dumps(payload), time.time()),
+            )
+        self._wake.set()
+        return key
+
+    def status(self, key: str):
+        """{"state", "attempts", "error", "queued_at", "sent_at"} of `key`, or None if unknown or pruned."""
+        return self.statuses([key]).get(key)
+
+    def statuses(self, keys):
+        """{key: status} for the known keys among `keys`."""
+        keys = list(keys)
+        if not keys:
+            return {}
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT key, state, attempts, error, queued_at, sent_at FROM outbox"
+                f" WHERE key IN ({', '.join('?' * len(keys))})",
+                keys,
+            ).fetchall()
+        return {
+            key: {"state": state, "attempts": attempts, "error": error, "queued_at": queued_at, "sent_at": sent_at}
+            for key, state, attempts, error, queued_at, sent_at in rows
+        }
+
+    def retry(self, key: str):
+        """Queue a failed payload again. Returns False if it isn't in the "failed" state."""
+        with self._lock:
+            changed = self._db.execute(
+                "UPDATE outbox SET state = 'queued', error = NULL WHERE key = ? AND state = 'failed'", (key,)
+            ).rowcount
+        self._wake.set()
+        return bool(changed)
+
+    def backlog(self):
+        """(payloads waiting to be sent, seconds the oldest of them has waited or None)."""
+        with self._lock:
+            count, oldest = self._db.execute(
+                "SELECT COUNT(*), MIN(queued_at) FROM outbox WHERE state IN (?, ?)", _PENDING
+            ).fetchone()
+        return count, None if oldest is None else time.time() - oldest
+
+    def pending(self):
+        return self.backlog()[0]
+
+    # --- Worker ---
+    def _run(self):
+        outage = 0  # consecutive rounds the webhook was unreachable
+        while True:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT id, payload FROM outbox WHERE state IN (?, ?) ORDER BY id LIMIT 1", _PENDING
+                ).fetchone()
+            if row is None:
+                with self._lock:
+                    self._prune()
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            row_id, payload = row
+            error, retriable = post_with_retries(
+                self._session, self.url, json.loads(payload), self.timeout, self.max_retries, self.backoff_s,
+                self.max_backoff_s, on_attempt=lambda attempt: self._update(
+                    row_id, "state = 'sending', attempts = attempts + 1"),
+            )
+            if error is None:
+                outage = 0
+                self._update(row_id, "state = 'sent', error = NULL, sent_at = ?", time.time())
+            elif not retriable:
+                print(f"❌ Submission rejected ({error}):", payload)
+                self._update(row_id, "state = 'failed', error = ?", error)
+            else:
+                # Still unreachable: keep it first in line and wait longer each round
+                outage += 1
+                self._update(row_id, "state = 'queued', error = ?", error)
+                time.sleep(backoff_delay(outage, self.max_backoff_s, self.max_outage_backoff_s))
+
+    def _update(self, row_id, assignments, *values):
+        with self._lock:
+            self._db.execute(f"UPDATE outbox SET {assignments} WHERE id = ?", (*values, row_id))
+
+    def _prune(self):
+        self._db.execute("DELETE FROM outbox WHERE state = 'sent' AND sent_at < ?", (time.time() - self.keep_sent_s,))
@@ -1,102 +1,135 @@
-import json
-import re
-import streamlit as st
-import json
-import re
-import streamlit as st
-import json
 import ast
+import json
+from collections import deque
+from dataclasses import dataclass, field
+
+# Shapes n8n hands back (see receptionist_agent_prompt's output format):
+#   [{'output': {'patient_id': 'er_0001', 'age': 0, ...}}]
+#   [{'output': '{\n  "patient_id": "er_0001",\n  "age": 0, ...\n}'}]
+#   [{'output': '[{\'output\': \'{\\n  "patient_id": 123456, ... }\'}]'}]
+# plus bare dicts, {'output': ...} without the list, JSON text, and lists of several of these.
 
+INTAKE_FIELDS = ("patient_id", "age", "arrival_time", "chief_complaint_and_reported_symptoms")
+_INTAKE_KEYS = frozenset(INTAKE_FIELDS)
 
-# simulated_data = [{'output': '[{\'output\': \'{\\n  "patient_id": 123456,\\n  "age": 29,\\n  "arrival_time": "16:39:18",\\n  "chief_complaint_and_reported_symptoms": "Severe chest pain and shortness of breath"\\n}\'}]'}]
 
-# def extract_patient_data(data):
-#     """
-#     Parses the specific n8n output format like:
-#     [{'output': '[{\'output\': \'{\\n  "patient_id": 123456, ... }\'}]'}]
+class ParseError(ValueError):
+    """Nothing usable could be parsed out of an n8n payload."""
 
-#     Returns a clean Python dict, e.g.:
-#     {'patient_id': 123456, 'age': 29, ...}
-#     """
-#     try:
-#         # 1️⃣ Outer list
-#         if isinstance(data, list) and len(data) > 0:
-#             data = data[0]
-#         else:
-#             raise ValueError("Unexpected data format (not a list).")
 
-#         # 2️⃣ Get 'output' key (string containing list-like text)
-#         output_str = data.get("output")
-#         if not isinstance(output_str, str):
-#             raise ValueError("Missing or invalid 'output' key.")
+@dataclass(slots=True)
+class IntakeRecord:
+    patient_id: str
+    age: object  # int when the LLM gave a number, else the original text
+    arrival_time: str
+    chief_complaint_and_reported_symptoms: str
+    extra: dict = field(default_factory=dict)  # any other keys the LLM added
 
-#         # 3️⃣ Convert the inner list-like string to a Python object
-#         # Use ast.literal_eval because it's not valid JSON (single quotes)
-#         inner_list = ast.literal_eval(output_str)
-#         if not inner_list or not isinstance(inner_list, list):
-#             raise ValueError("Inner 'output' is not a list.")
+    def as_dict(self):
+        return {name: getattr(self, name) for name in INTAKE_FIELDS}
 
-#         inner_dict = inner_list[0]
-#         if not isinstance(inner_dict, dict) or "output" not in inner_dict:
-#             raise ValueError("Inner list item missing 'output' key.")
 
-#         # 4️⃣ Parse the final JSON string inside
-#         patient_json_str = inner_dict["output"]
-#         patient_data = json.loads(patient_json_str)
+def _decode_text(text: str):
+    """JSON (fast path) or, for the single-quoted n8n shape, a Python literal."""
+    stripped = text.strip()
+    if not stripped or stripped[0] not in "[{":
+        raise ParseError(f"Not a JSON/Python literal: {stripped[:40]!r}")
+    # A single quote right after the opening brackets can't be JSON; skip straight to literal_eval
+    if not stripped.lstrip("[{ \n\t").startswith("'"):
+        try:
+            return json.loads(stripped)
+        except ValueError:
+            pass
+    try:
+        return ast.literal_eval(stripped)
+    except (ValueError, SyntaxError) as e:
+        raise ParseError(f"Could not decode output text: {e}") from None
+
+
+def _to_record(item: dict) -> IntakeRecord:
+    age = item.get("age")
+    if type(age) is str and age.strip().isdigit():
+        age = int(age)
+    patient_id = item.get("patient_id")
+    arrival_time = item.get("arrival_time")
+    # Positional: this runs once per patient on the ingest path
+    return IntakeRecord(
+        "" if patient_id is None else str(patient_id),
+        age,
+        "" if arrival_time is None else str(arrival_time),
+        item.get("chief_complaint_and_reported_symptoms") or "",
+        {} if item.keys() <= _INTAKE_KEYS else {k: v for k, v in item.items() if k not in _INTAKE_KEYS},
+    )
 
-#         return patient_data
 
-#     except Exception as e:
-#         print(f"❌ Failed to parse patient data: {e}")
-#         return {}
+def _plain_output(item):
+    """The patient in {'output': {...}} (a dict already), else None."""
+    if type(item) is dict and len(item) == 1:
+        output = item.get("output")
+        if type(output) is dict and "output" not in output:
+            return output
+    return None
 
-# parsed = extract_patient_data(simulated_data)
-# print(parsed)
-# print(parsed.get("patient_id"))
 
-simulated_data = [{'output': {'patient_id': 'er_0001', 'age': 0, 'arrival_time': '14:00:00', 'chief_complaint_and_reported_symptoms': 'The baby has had difficulty breathing and has developed a mild fever. The parents report the baby has been coughing and has a decreased appetite.'}}]
+def _plain_payloads(data):
+    """
+    The patients of the common shapes that need no decoding: [{'output': {...}}, ...],
+    {'output': {...}} and a bare record. None sends the payload through the general walk.
+    """
+    if type(data) is list:
+        outputs = [_plain_output(item) for item in data]
+        return outputs if outputs and None not in outputs else None
+    if type(data) is dict:
+        return [data] if "output" not in data else (None if (output := _plain_output(data)) is None else [output])
+    return None
+
+
+def parse_payloads(data):
+    """
+    Every patient dict in an n8n payload, in order, with its keys as sent.
+
+    One pass over a work queue: strings are decoded, lists are expanded (every
+    element, not only data[0]) and {'output': ...} layers are unwrapped, however
+    deeply they nest. Anything else that is a dict is a patient.
+    Raises ParseError if the payload holds no patient at all.
+    """
+    payloads = _plain_payloads(data)
+    if payloads is not None:
+        return payloads
+    errors = []
+    payloads = []
+    pending = deque([data])
+    while pending:
+        value = pending.popleft()
+        if isinstance(value, (str, bytes)):
+            try:
+                pending.appendleft(_decode_text(value.decode() if isinstance(value, bytes) else value))
+            except ParseError as e:
+                errors.append(str(e))
+        elif isinstance(value, list):
+            pending.extendleft(reversed(value))
+        elif isinstance(value, dict):
+            if "output" in value:
+                pending.appendleft(value["output"])
+            else:
+                payloads.append(value)
+        else:
+            errors.append(f"Unexpected {type(value).__name__} in payload.")
+    if not payloads:
+        raise ParseError("; ".join(errors) or "Payload contains no patient record.")
+    return payloads
+
+
+def parse_records(data):
+    """Every patient record in an n8n payload, in order, as IntakeRecords (see parse_payloads)."""
+    return [_to_record(item) for item in parse_payloads(data)]
 
 
 def parse_structured_output(data):
     """
-    Parses a list of the format:
-    [{'output': {'patient_id': '...', 'age': ..., 'arrival_time': '...', 'chief_complaint_and_reported_symptoms': '...'}}]
-    
-    Returns a dict with only the specified keys:
-    {'patient_id': ..., 'age': ..., 'chief_complaint_and_reported_symptoms': ...}
+    The first patient in an n8n payload as a dict with only the intake keys:
+    {'patient_id': ..., 'age': ..., 'arrival_time': ..., 'chief_complaint_and_reported_symptoms': ...}
+
+    Raises ParseError instead of returning {} when nothing could be parsed.
     """
-    try:
-        # Check if data is a list and has at least one item
-        if not isinstance(data, list) or len(data) == 0:
-            raise ValueError("Data must be a non-empty list.")
-        
-        # Get the first item
-        first_item = data[0]
-        
-        # Check if it has an 'output' key
-        if not isinstance(first_item, dict) or 'output' not in first_item:
-            raise ValueError("First item must be a dict with an 'output' key.")
-        
-        # Get the output dict
-        output_dict = first_item['output']
-        
-        if not isinstance(output_dict, dict):
-            raise ValueError("'output' must be a dictionary.")
-        
-        # Extract only the requested keys
-        result = {
-            'patient_id': output_dict.get('patient_id'),
-            'age': output_dict.get('age'),
-            'chief_complaint_and_reported_symptoms': output_dict.get('chief_complaint_and_reported_symptoms')
-        }
-        
-        return result
-        
-    except Exception as e:
-        print(f"❌ Failed to parse patient data: {e}")
-        return {}
-
-parsed = parse_structured_output(simulated_data)
-print(parsed)
-print(parsed.get("patient_id"))
-print(parsed["age"])
\ No newline at end of file
+    return parse_records(data)[0].as_dict()
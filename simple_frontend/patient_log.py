@@ -0,0 +1,162 @@
+import json
+import os
+import threading
+import time
+
+
+class PatientLog:
+    """
+    Append-only JSON-lines log of everything the nurse board learns.
+
+    Records are written to the current segment file as they arrive and made
+    durable by group commit: a background thread flushes and fsyncs the segment
+    at most every commit_interval_s, so one fsync covers every record appended
+    in that window (a crash loses at most that window). Call sync() to force it.
+
+    When a segment grows past max_segment_bytes the log asks snapshot_fn for the
+    full current state, writes it atomically to snapshot.json and starts a new
+    segment; segments covered by the snapshot are deleted. replay() yields the
+    snapshot's records followed by every newer segment, in order.
+    """
+
+    SNAPSHOT_NAME = "snapshot.json"
+
+    def __init__(self, directory: str, commit_interval_s: float = 0.05, max_segment_bytes: int = 16 * 1024 * 1024):
+        self.directory = directory
+        self.commit_interval_s = commit_interval_s
+        self.max_segment_bytes = max_segment_bytes
+        self.snapshot_fn = None  # () -> [record], called with the writer's lock held
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.RLock()
+        segments = self._segments()
+        self._segment_no = segments[-1] if segments else 1
+        # A crash can leave half a record at the end of the last segment; appending
+        # after it would glue the next record onto it and lose both at replay
+        _drop_torn_tail(self._segment_path(self._segment_no))
+        self._file = open(self._segment_path(self._segment_no), "ab")
+        self._size = self._file.tell()
+        self._appended = 0  # records appended...
+        self._synced = 0  # ...and how many of them are known to be on disk
+        self._closed = False
+        self._flusher = threading.Thread(target=self._run_flusher, name="patient-log-flusher", daemon=True)
+        self._flusher.start()
+
+    # --- Writing ---
+    def append(self, record: dict):
+        line = json.dumps(record, separators=(",", ":"), default=str).encode() + b"\n"
+        with self._lock:
+            # Rotate before writing: the snapshot covers what was applied so far,
+            # and this record (not applied yet) starts the new segment
+            if self._size >= self.max_segment_bytes and self.snapshot_fn is not None:
+                self._rotate()
+            self._file.write(line)
+            self._size += len(line)
+            self._appended += 1
+
+    def sync(self):
+        """Flush and fsync everything appended so far."""
+        with self._lock:
+            if self._synced < self._appended:
+                self._file.flush()
+                os.fsync(self._file.fileno())
+                self._synced = self._appended
+
+    def close(self):
+        with self._lock:
+            self.sync()
+            self._closed = True
+            self._file.close()
+
+    # --- Reading ---
+    def replay(self):
+        """Yield every logged record: the snapshot first, then newer segments in order."""
+        with self._lock:
+            self.sync()
+            start = 0
+            snapshot_path = os.path.join(self.directory, self.SNAPSHOT_NAME)
+            if os.path.exists(snapshot_path):
+                with open(snapshot_path, "rb") as f:
+                    snapshot = json.load(f)
+                start = snapshot["segment"]
+                yield from snapshot["records"]
+            for segment_no in self._segments():
+                if segment_no < start:
+                    continue
+                with open(self._segment_path(segment_no), "rb") as f:
+                    for line in f:
+                        try:
+                            yield json.loads(line)
+                        except ValueError:
+                            # Torn write from a crash (cut off at open, but never let one hide later records)
+                            continue
+
+    # --- Internals ---
+    def _segments(self):
+        numbers = []
+        for name in os.listdir(self.directory):
+            if name.startswith("segment-") and name.endswith(".jsonl"):
+                numbers.append(int(name[len("segment-"):-len(".jsonl")]))
+        return sorted(numbers)
+
+    def _segment_path(self, segment_no: int):
+        return os.path.join(self.directory, f"segment-{segment_no:06d}.jsonl")
+
+    def _rotate(self):
+        # The snapshot holds everything up to now, so it replaces all current segments
+        self.sync()
+        self._file.close()
+        self._segment_no += 1
+        snapshot = {"segment": self._segment_no, "records": self.snapshot_fn()}
+        tmp_path = os.path.join(self.directory, self.SNAPSHOT_NAME + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(snapshot, f, separators=(",", ":"), default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, os.path.join(self.directory, self.SNAPSHOT_NAME))
+        for segment_no in self._segments():
+            if segment_no < self._segment_no:
+                os.remove(self._segment_path(segment_no))
+        self._file = open(self._segment_path(self._segment_no), "ab")
+        self._size = 0
+
+    def _run_flusher(self):
+        while True:
+            time.sleep(self.commit_interval_s)
+            with self._lock:
+                if self._closed:
+                    return
+                if self._synced >= self._appended:
+                    continue
+                self._file.flush()
+                flushed = self._appended
+                fd = self._file.fileno()
+            # fsync outside the lock so appends keep flowing while the disk catches up;
+            # the records only count as synced once it returns, so a concurrent
+            # sync() or close() meanwhile still fsyncs them itself
+            try:
+                os.fsync(fd)
+            except OSError:
+                continue  # segment was rotated (and synced) meanwhile
+            with self._lock:
+                self._synced = max(self._synced, flushed)
+
+
+def _drop_torn_tail(path: str, chunk_size: int = 64 * 1024):
+    """Cut a segment back to just after its last newline (a partial last record is dropped)."""
+    if not os.path.exists(path):
+        return
+    with open(path, "r+b") as f:
+        end = f.seek(0, os.SEEK_END)
+        position = end
+        while position > 0:
+            start = max(0, position - chunk_size)
+            f.seek(start)
+            newline = f.read(position - start).rfind(b"\n")
+            if newline >= 0:
+                position = start + newline + 1
+                break
+            position = start
+        if position < end:
+            f.truncate(position)
+            f.flush()
+            os.fsync(f.fileno())
@@ -0,0 +1,193 @@
+import functools
+import hashlib
+import json
+import re
+
+# ESI levels as the nurse board shows them, most urgent first
+TRIAGE_LEVELS = ["1", "2", "3", "3 - Vital Signs Needed", "4", "5"]
+_LEVEL_RANK = {level.lower(): rank for rank, level in enumerate(TRIAGE_LEVELS)}
+
+
+def triage_rank(level):
+    """Sort rank of a triage level ("2", 2, "Level 3 - Vital Signs Needed", ...). Unknown levels sort last."""
+    if level is None:
+        return len(TRIAGE_LEVELS)
+    text = str(level).strip().lower()
+    if text.startswith("level"):
+        text = text[len("level"):].strip()
+    return _LEVEL_RANK.get(text, len(TRIAGE_LEVELS))
+
+
+def canonical_level(level):
+    """The TRIAGE_LEVELS spelling of a level ("level 3 - Vital Signs Needed" -> "3 - Vital Signs Needed")."""
+    rank = triage_rank(level)
+    if rank < len(TRIAGE_LEVELS):
+        return TRIAGE_LEVELS[rank]
+    return None if level is None else str(level)
+
+
+# Every spelling seen in n8n/LLM payloads, keyed by the key with case, spaces,
+# underscores and punctuation removed ("triage level", "triage_level" -> "triagelevel")
+FIELD_ALIASES = {
+    "patientid": "patient_id",
+    "id": "patient_id",
+    "age": "age",
+    "arrivaltime": "arrival_time",
+    "timeofarrival": "arrival_time",
+    "chiefcomplaintandreportedsymptoms": "complaint",
+    "chiefcomplaint": "complaint",
+    "complaint": "complaint",
+    "triagelevel": "triage_level",
+    "esilevel": "triage_level",
+    "triaged": "triaged",
+    "rationalbehindthetriageclassification": "rationale",
+    "rationalebehindthetriageclassification": "rationale",
+    "rationale": "rationale",
+    "rational": "rationale",
+    "sao2": "sao2",
+    "spo2": "sao2",
+    "oxygensaturation": "sao2",
+    "hr": "hr",
+    "heartrate": "hr",
+    "pulse": "hr",
+    "rr": "rr",
+    "respiratoryrate": "rr",
+    "temperature": "temperature",
+    "temp": "temperature",
+    "correlationid": "correlation_id",
+    "submittedat": "submitted_at",
+    "idempotencykey": "idempotency_key",
+}
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]")
+
+VITAL_FIELDS = ("sao2", "hr", "rr", "temperature")
+
+
+@functools.lru_cache(maxsize=256)  # payload keys repeat, but senders may send arbitrary ones
+def _normalize_key(key: str):
+    return _NON_ALNUM_RE.sub("", str(key).lower())
+
+
+# "triaged?" of a record the board shows before the triage agent answered
+# (pre_triage.screen), and what its idempotency key ends with
+PROVISIONAL = "PROVISIONAL"
+PROVISIONAL_KEY_SUFFIX = ":provisional"
+
+
+def idempotency_key(patient_id, arrival_time, age=None, complaint=None):
+    """
+    The key a submission of this patient at this arrival time is deduplicated by,
+    however often it is resent (the receptionist's outbox replays after outages).
+    The presentation is part of it: a corrected age or complaint is a new
+    submission, which replaces the patient's earlier one instead of being dropped.
+    """
+    return hashlib.sha256(json.dumps([patient_id, arrival_time, age, complaint]).encode()).hexdigest()[:32]
+
+
+def _to_float(value):
+    try:
+        return float(str(value).strip().rstrip("%"))
+    except (TypeError, ValueError):
+        return None
+
+
+class PatientRecord:
+    """
+    One patient as the nurse board keeps it, normalized once at ingest.
+
+    from_payload() resolves every key spelling through FIELD_ALIASES, so the rest
+    of the code uses plain attribute access. Keys the table doesn't know are kept
+    in `extra` (None when there are none).
+
+    correlation_id and submitted_at (epoch seconds) are stamped by the
+    receptionist front end at Submit and follow the patient to the nurse
+    confirmation, for tracing and door-to-triage timing. idempotency_key
+    (see idempotency_key()) marks resends of the same submission.
+    """
+
+    __slots__ = (
+        "patient_id", "age", "arrival_time", "complaint", "triage_level", "triaged", "rationale",
+        "sao2", "hr", "rr", "temperature", "correlation_id", "submitted_at", "idempotency_key",
+        "extra",
+    )
+
+    # (board column label, attribute) in display order
+    COLUMNS = [
+        ("patient id", "patient_id"),
+        ("age", "age"),
+        ("time of arrival", "arrival_time"),
+        ("chief complaint and reported symptoms", "complaint"),
+        ("triage level", "triage_level"),
+        ("triaged?", "triaged"),
+        ("rational behind the triage classification", "rationale"),
+    ]
+
+    def __init__(self, patient_id=None, age=None, arrival_time=None, complaint=None, triage_level=None,
+                 triaged=None, rationale=None, sao2=None, hr=None, rr=None, temperature=None,
+                 correlation_id=None, submitted_at=None, idempotency_key=None, extra=None):
+        self.patient_id = patient_id
+        self.age = age
+        self.arrival_time = arrival_time
+        self.complaint = complaint
+        self.triage_level = triage_level
+        self.triaged = triaged
+        self.rationale = rationale
+        self.sao2 = sao2
+        self.hr = hr
+        self.rr = rr
+        self.temperature = temperature
+        self.correlation_id = correlation_id
+        self.submitted_at = submitted_at
+        self.idempotency_key = idempotency_key
+        self.extra = extra
+
+    @classmethod
+    def from_payload(cls, payload: dict):
+        """Build a record from an n8n payload (or a to_dict() of one), whatever its key spellings."""
+        fields = {}
+        extra = None
+        for key, value in payload.items():
+            name = FIELD_ALIASES.get(_normalize_key(key))
+            if name is None:
+                if key == "extra" and isinstance(value, dict):
+                    extra = {**(extra or {}), **value}
+                else:
+                    extra = extra or {}
+                    extra[key] = value
+            elif name not in fields:
+                fields[name] = value
+        record = cls(extra=extra)
+        patient_id = fields.get("patient_id")
+        record.patient_id = None if patient_id in (None, "") else str(patient_id)
+        age = fields.get("age")
+        record.age = int(age) if isinstance(age, str) and age.strip().isdigit() else age
+        arrival_time = fields.get("arrival_time")
+        record.arrival_time = None if arrival_time is None else str(arrival_time)
+        record.complaint = fields.get("complaint")
+        record.triage_level = canonical_level(fields.get("triage_level"))
+        record.triaged = fields.get("triaged")
+        record.rationale = fields.get("rationale")
+        for name in VITAL_FIELDS:
+            setattr(record, name, _to_float(fields.get(name)))
+        correlation_id = fields.get("correlation_id")
+        record.correlation_id = None if correlation_id in (None, "") else str(correlation_id)
+        record.submitted_at = _to_float(fields.get("submitted_at"))
+        key = fields.get("idempotency_key")
+        record.idempotency_key = None if key in (None, "") else str(key)
+        return record
+
+    def to_dict(self):
+        """Plain dict (snake_case keys) for JSON: the log, /api/queue and analytics."""
+        data = {name: getattr(self, name) for name in self.__slots__ if name != "extra"}
+        if self.extra:
+            data["extra"] = self.extra
+        return data
+
+    def is_provisional(self):
+        return str(self.triaged or "").strip().upper() == PROVISIONAL
+
+    def has_vitals(self):
+        return self.sao2 is not None or self.hr is not None or self.rr is not None
+
+    def __repr__(self):
+        return f"PatientRecord({self.patient_id!r}, level={self.triage_level!r})"
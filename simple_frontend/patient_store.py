@@ -0,0 +1,378 @@
+import heapq
+import itertools
+import threading
+import time
+from collections import OrderedDict, deque
+
+from patient_record import PROVISIONAL_KEY_SUFFIX, TRIAGE_LEVELS, PatientRecord, triage_rank  # noqa: F401 (re-exported)
+
+
+class _Entry:
+    __slots__ = ("record", "seq", "override", "received_at", "confirmed_at", "heap_key")
+
+    def __init__(self, record: PatientRecord, seq: int):
+        self.record = record
+        self.seq = seq
+        self.override = None
+        self.received_at = None
+        self.confirmed_at = None
+        self.heap_key = None
+
+
+class PatientStore:
+    """
+    Patient queue shared by the ingest API and every nurse tab.
+
+    Patients are indexed by patient_id. Waiting patients live in the active set;
+    confirmed ones move to the archived set and are evicted once there are more
+    than max_archived of them or they were confirmed more than archive_max_age_s ago.
+    Insert, lookup, confirm and override are all O(1) (plus an O(log n) heap push
+    for inserts and overrides).
+
+    Waiting patients are also kept in a heap keyed by (triage rank, arrival_time,
+    patient_id), so top(k) returns the k most urgent in O(k log k) without sorting
+    the whole queue. Heap items are invalidated lazily: an item is live only while
+    it is still its patient's current heap_key (the push counter keeps an old
+    item from matching again after a level is changed back).
+
+    Every change bumps `version` and wakes wait_for_change() callers.
+
+    Changes are also kept as delta events ("added", "overridden", "confirmed",
+    "evicted"), the last max_events of them, each with a sequence number one
+    higher than the previous. Sequence numbers start from the clock (in
+    microseconds), so they keep increasing across restarts and a client's
+    position from before a restart is never mistaken for a current one.
+    changes_since(seq) returns what a client at `seq` missed, or None when it
+    has to start over from full_state().
+
+    Records carrying an idempotency_key are also indexed by it while they are
+    kept, so add_once() drops a resend of a submission that is already here.
+
+    A provisional record (pre-triage screen, "triaged?" PROVISIONAL) holds the
+    patient's place until the triage agent's record arrives. That record
+    replaces it but keeps what the nurse already did with it (override,
+    confirmation, and the time it reached the board); a provisional record that
+    arrives after the agent's is dropped.
+
+    With a PatientLog attached (attach_log), every change is also appended to the
+    log, and the store is rebuilt from it on startup. With a Metrics attached
+    (attach_metrics), each confirmation records how long the patient waited on
+    the board and, when the receptionist stamped submitted_at, door-to-triage.
+    """
+
+    def __init__(self, max_archived: int = 500, archive_max_age_s: float = 4 * 3600, max_events: int = 10000):
+        self.max_archived = max_archived
+        self.archive_max_age_s = archive_max_age_s
+        self.version = 0
+        self.seq = time.time_ns() // 1000  # sequence number of the latest event
+        self._events = deque(maxlen=max_events)
+        self._changed = threading.Condition()
+        self._index = {}  # patient_id -> _Entry (active and archived)
+        self._keys = {}  # idempotency_key -> patient_id, for the kept records that have one
+        self._active = {}  # patient_id -> None, in arrival order
+        self._archived = OrderedDict()  # patient_id -> None, oldest confirmation first
+        self._heap = []  # (rank, arrival_time, patient_id, push#), may hold stale items
+        self._next_seq = 0
+        self._pushes = 0
+        self._log = None
+        self._metrics = None
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, patient_id):
+        return patient_id in self._index
+
+    # --- Durability ---
+    def attach_log(self, log):
+        """Rebuild the store from `log`, then append every further change to it."""
+        with self._changed:
+            for op in log.replay():
+                self._apply(op)
+            # Nobody was following the replay; clients start from full_state()
+            self._events.clear()
+            self._log = log
+            log.snapshot_fn = self._snapshot
+            self._bump()
+
+    def attach_metrics(self, metrics):
+        self._metrics = metrics
+
+    # --- Writes ---
+    def add(self, record: PatientRecord):
+        """
+        Insert (or replace) a patient and return its id. Records without an id get a
+        generated one. A provisional record never replaces the triage agent's record.
+        """
+        with self._changed:
+            if record.patient_id is None:
+                record.patient_id = f"_row_{self._next_seq}"
+            if self._supersedes_provisional(record.patient_id, record):
+                # Never logged, so a replay can't resurrect it either
+                return record.patient_id
+            self._write({"op": "add", "id": record.patient_id, "record": record, "at": time.time()})
+            self._bump()
+            return record.patient_id
+
+    def add_once(self, record: PatientRecord):
+        """
+        add(), unless a kept patient already has the record's idempotency_key.
+        Returns (patient_id, added); a duplicate changes nothing.
+        """
+        with self._changed:
+            key = record.idempotency_key
+            existing = self._keys.get(key) if key is not None else None
+            if existing is None and key is not None and record.is_provisional():
+                # The triage agent's record for this submission is already here
+                existing = self._keys.get(key.removesuffix(PROVISIONAL_KEY_SUFFIX))
+            if existing is None and self._supersedes_provisional(record.patient_id, record):
+                # ...or is, but arrived without its key
+                existing = record.patient_id
+            if existing is not None:
+                return existing, False
+            return self.add(record), True
+
+    def confirm(self, patient_id, triage_level=None):
+        """Move a waiting patient to the archived set. Returns False if unknown or already confirmed."""
+        with self._changed:
+            if patient_id not in self._active:
+                return False
+            self._write({"op": "confirm", "id": patient_id, "level": triage_level, "at": time.time()})
+            self._bump()
+            if self._metrics is not None:
+                self._observe_confirm(self._index[patient_id])
+            return True
+
+    def override(self, patient_id, triage_level):
+        """Record a nurse's triage level for a patient. Returns False if unknown."""
+        with self._changed:
+            entry = self._index.get(patient_id)
+            if entry is None:
+                return False
+            if entry.override != triage_level:
+                self._write({"op": "override", "id": patient_id, "level": triage_level})
+                self._bump()
+            return True
+
+    # --- Reads ---
+    def get(self, patient_id):
+        """Return the stored record for patient_id (or None)."""
+        entry = self._index.get(patient_id)
+        return entry.record if entry is not None else None
+
+    def get_override(self, patient_id):
+        entry = self._index.get(patient_id)
+        return entry.override if entry is not None else None
+
+    def get_level(self, patient_id):
+        """The nurse's override if any, else the level the patient arrived with."""
+        entry = self._index.get(patient_id)
+        if entry is None:
+            return None
+        return entry.override if entry.override is not None else entry.record.triage_level
+
+    def levels(self, patient_ids):
+        """{patient_id: get_level(patient_id)} for several patients at once (one call per board page)."""
+        with self._changed:
+            return {patient_id: self.get_level(patient_id) for patient_id in patient_ids}
+
+    def is_confirmed(self, patient_id):
+        return patient_id in self._archived
+
+    def active_count(self):
+        return len(self._active)
+
+    def active(self):
+        """[(patient_id, record)] of waiting patients in arrival order."""
+        with self._changed:
+            return [(pid, self._index[pid].record) for pid in self._active]
+
+    def top(self, k=None):
+        """[(patient_id, record)] of the k most urgent waiting patients (all of them if k is None)."""
+        with self._changed:
+            k = len(self._active) if k is None else min(k, len(self._active))
+            result = []
+            # Best-first walk of the heap array: the children of a popped item are
+            # the only new candidates, so this touches O(k) heap slots, not all n
+            frontier = [(self._heap[0], 0)] if self._heap else []
+            while frontier and len(result) < k:
+                item, i = heapq.heappop(frontier)
+                if self._is_live(item):
+                    pid = item[2]
+                    result.append((pid, self._index[pid].record))
+                for child in (2 * i + 1, 2 * i + 2):
+                    if child < len(self._heap):
+                        heapq.heappush(frontier, (self._heap[child], child))
+            return result
+
+    def archived(self):
+        """[(patient_id, record)] of confirmed patients, oldest confirmation first."""
+        with self._changed:
+            return [(pid, self._index[pid].record) for pid in self._archived]
+
+    def full_state(self):
+        """{"seq": ..., "patients": [...]}: every patient (waiting first) as of event `seq`."""
+        with self._changed:
+            patients = [self._patient(pid) for pid in itertools.chain(self._active, self._archived)]
+            return {"seq": self.seq, "patients": patients}
+
+    def changes_since(self, seq: int):
+        """Events after `seq`, oldest first ([] if none), or None if they are no longer all kept."""
+        with self._changed:
+            if seq == self.seq:
+                return []
+            if not self._events or not self._events[0][0] - 1 <= seq < self.seq:
+                return None
+            missed = itertools.islice(self._events, seq - self._events[0][0] + 1, None)
+            return [self._event_dict(*event) for event in missed]
+
+    def wait_for_change(self, seen_version: int, timeout: float):
+        """Block until version differs from seen_version (or timeout). Returns the current version."""
+        with self._changed:
+            self._changed.wait_for(lambda: self.version != seen_version, timeout=timeout)
+            return self.version
+
+    # --- Internals (caller holds the lock) ---
+    def _write(self, op):
+        if self._log is not None:
+            self._log.append({**op, "record": op["record"].to_dict()} if "record" in op else op)
+        self._apply(op)
+
+    def _apply(self, op):
+        kind, patient_id = op["op"], op["id"]
+        if kind in ("add", "restore"):
+            seq = self._next_seq
+            self._next_seq += 1
+            # A resubmitted patient replaces the old record and is waiting again
+            self._archived.pop(patient_id, None)
+            self._active.pop(patient_id, None)
+            previous = self._index.get(patient_id)
+            if previous is not None:
+                self._forget_key(previous.record)
+            record = op["record"]
+            if not isinstance(record, PatientRecord):
+                # Replayed from the log (older logs hold the raw payload)
+                record = PatientRecord.from_payload(record)
+                record.patient_id = patient_id
+            if record.idempotency_key is not None:
+                self._keys[record.idempotency_key] = patient_id
+            entry = _Entry(record, seq)
+            entry.override = op.get("override")
+            entry.received_at = op.get("received_at", op.get("at"))
+            entry.confirmed_at = op.get("confirmed_at")
+            if kind == "add" and previous is not None and previous.record.is_provisional():
+                # The triage agent's result for a patient shown provisionally: the nurse's actions stand
+                entry.override = previous.override
+                if previous.confirmed_at is not None and previous.override is None:
+                    entry.override = previous.record.triage_level  # the level the nurse confirmed
+                entry.received_at = previous.received_at
+                entry.confirmed_at = previous.confirmed_at
+            self._index[patient_id] = entry
+            if entry.confirmed_at is None:
+                self._active[patient_id] = None
+                self._push(patient_id, entry)
+            else:
+                self._archived[patient_id] = None
+            self._emit("added", patient_id, record=record, level=self.get_level(patient_id),
+                       received_at=entry.received_at, confirmed_at=entry.confirmed_at)
+            self._evict()
+        elif kind == "confirm":
+            entry = self._index.get(patient_id)
+            if entry is None or patient_id not in self._active:
+                return
+            if op["level"] is not None:
+                entry.override = op["level"]
+            del self._active[patient_id]
+            entry.confirmed_at = op["at"]
+            self._archived[patient_id] = None
+            self._emit("confirmed", patient_id, level=self.get_level(patient_id), confirmed_at=entry.confirmed_at)
+            self._evict()
+        elif kind == "override":
+            entry = self._index.get(patient_id)
+            if entry is None:
+                return
+            entry.override = op["level"]
+            if patient_id in self._active:
+                self._push(patient_id, entry)
+            self._emit("overridden", patient_id, level=self.get_level(patient_id))
+
+    def _supersedes_provisional(self, patient_id, record):
+        """True when `record` is a (late) provisional one for a patient already holding the triage agent's record."""
+        if not record.is_provisional():
+            return False
+        kept = self._index.get(patient_id)
+        return kept is not None and not kept.record.is_provisional()
+
+    def _snapshot(self):
+        """The whole store as "restore" ops, in an order that replays to the same state."""
+        ops = []
+        for patient_id in list(self._active) + list(self._archived):
+            entry = self._index[patient_id]
+            ops.append({
+                "op": "restore", "id": patient_id, "record": entry.record.to_dict(),
+                "override": entry.override, "received_at": entry.received_at, "confirmed_at": entry.confirmed_at,
+            })
+        return ops
+
+    def _patient(self, patient_id):
+        entry = self._index[patient_id]
+        return {
+            **entry.record.to_dict(), "level": self.get_level(patient_id),
+            "received_at": entry.received_at, "confirmed_at": entry.confirmed_at,
+        }
+
+    def _emit(self, kind, patient_id, **data):
+        # Kept as a tuple holding the record itself; the JSON-ready dict is only
+        # built for clients that ask (ingest doesn't pay for to_dict())
+        self.seq += 1
+        self._events.append((self.seq, kind, patient_id, data))
+
+    @staticmethod
+    def _event_dict(seq, kind, patient_id, data):
+        if kind == "added":
+            data = {
+                "patient": {
+                    **data["record"].to_dict(), "level": data["level"],
+                    "received_at": data["received_at"], "confirmed_at": data["confirmed_at"],
+                },
+            }
+        return {"seq": seq, "type": kind, "patient_id": patient_id, **data}
+
+    def _observe_confirm(self, entry):
+        level = self.get_level(entry.record.patient_id)
+        if entry.received_at is not None:
+            self._metrics.observe("queue_wait_seconds", entry.confirmed_at - entry.received_at, level)
+        if entry.record.submitted_at is not None:
+            self._metrics.observe("door_to_triage_seconds", entry.confirmed_at - entry.record.submitted_at, level)
+
+    def _bump(self):
+        self.version += 1
+        self._changed.notify_all()
+
+    def _push(self, patient_id, entry):
+        level = entry.override if entry.override is not None else entry.record.triage_level
+        self._pushes += 1
+        entry.heap_key = (triage_rank(level), entry.record.arrival_time or "", patient_id, self._pushes)
+        heapq.heappush(self._heap, entry.heap_key)
+        # Drop stale items once they outnumber the live ones
+        if len(self._heap) > 2 * len(self._active) + 64:
+            self._heap = [self._index[pid].heap_key for pid in self._active]
+            heapq.heapify(self._heap)
+
+    def _is_live(self, item):
+        pid = item[2]
+        return pid in self._active and self._index[pid].heap_key == item
+
+    def _evict(self):
+        cutoff = time.time() - self.archive_max_age_s
+        while self._archived:
+            oldest = next(iter(self._archived))
+            if len(self._archived) <= self.max_archived and self._index[oldest].confirmed_at >= cutoff:
+                break
+            del self._archived[oldest]
+            self._forget_key(self._index.pop(oldest).record)
+            self._emit("evicted", oldest)
+
+    def _forget_key(self, record):
+        if record.idempotency_key is not None and self._keys.get(record.idempotency_key) == record.patient_id:
+            del self._keys[record.idempotency_key]
@@ -0,0 +1,99 @@
+import re
+
+# Local keyword screen run on the receptionist's complaint text before the
+# triage agent sees it. It only flags what the triage prompt spells out:
+# the Decision Point A criteria and examples for level 1, and the Decision
+# Point C examples with no resources (poison ivy, medication ran out) for
+# level 5. Anything else is left to the agent; a flag is provisional either way.
+
+# (reason shown to the nurse, level, patterns); a space in a pattern matches any run of non-word characters
+PHRASES = [
+    ("cardiac arrest", "1", [
+        "cardiac arrest", "heart (?:has )?stopped", "pulseless", "no pulse", "(?:getting|receiving) cpr", "cpr in progress",
+    ]),
+    ("respiratory arrest / apneic", "1", [
+        "respiratory arrest", "apneic", "not breathing(?! (?:properly|well|right|normally))", "stopped breathing",
+    ]),
+    ("already intubated", "1", ["intubated"]),
+    ("severe respiratory distress", "1", ["severe respiratory distress", "agonal", "gasping"]),
+    ("unresponsive", "1", [
+        "unresponsive", "unconscious", "not responding", "(?:won t|will not|can t|cannot) (?:wake|be woken|be awakened)",
+    ]),
+    ("anaphylaxis", "1", ["anaphyla(?:xis|ctic)"]),
+    ("flaccid baby", "1", [
+        "(?:flaccid|floppy) (?:baby|infant|newborn)", "(?:baby|infant|newborn) (?:that|who) is (?:flaccid|floppy)",
+    ]),
+    ("poison ivy", "5", ["poison (?:ivy|oak)"]),
+    ("medication refill", "5", [
+        "(?:prescription|medication|meds?) refill",
+        "refill (?:of |for )?(?:my |his |her |their )?(?:prescription|medication|meds?)",
+        "ran out of (?:\\w+ ){0,4}(?:medications?|meds|pills|prescription)",
+    ]),
+    # Complaints that must not be fast-tracked to level 5 (Decision Point B high-risk presentations)
+    ("alarm", None, [
+        "chest pain", "short(?:ness)? of breath", "(?:trouble|difficulty) breathing", "can t breathe",
+        "not breathing (?:properly|well|right|normally)", "bleeding",
+        "faint(?:ed|ing)?", "passed out", "confus(?:ed|ion)", "suicid(?:e|al)", "pregnan(?:t|cy)",
+        "swelling of (?:the )?(?:face|lips|tongue|throat)", "seizure",
+    ]),
+]
+
+# Oxygen saturation under this (Decision Point A: "SpO2 < 90") is level 1
+SAO2_LEVEL_1_BELOW = 90
+_SAO2 = r"(?:spo2|sao2|o2 sat(?:uration)?s?|oxygen saturation|sats?) (?:of |is |at |was )?(?P<sao2_value>\d{2,3})"
+
+# A match right after one of these words ("no chest pain", "denies bleeding") doesn't count
+NEGATIONS = {"no", "not", "denies", "denied", "without", "negative"}
+NEGATION_WINDOW = 3  # words looked back, within the same clause
+
+_WORD_RE = re.compile(r"\w+")
+_CLAUSE_BREAK_RE = re.compile(r"[,.;:!?()]")
+
+
+def _compile():
+    groups = []
+    for i, (_, _, patterns) in enumerate(PHRASES):
+        alternatives = "|".join(pattern.replace(" ", r"\W+") for pattern in patterns)
+        groups.append(f"(?P<p{i}>{alternatives})")
+    groups.append(f"(?P<sao2>{_SAO2.replace(' ', r'[^0-9a-z]+')})")
+    return re.compile(r"\b(?:" + "|".join(groups) + r")\b", re.IGNORECASE)
+
+
+# One combined pattern: a single pass over the text finds every phrase
+_SCREEN_RE = _compile()
+
+
+def _negated(text: str, start: int) -> bool:
+    clause = _CLAUSE_BREAK_RE.split(text[max(0, start - 40):start])[-1]
+    before = _WORD_RE.findall(clause.lower())
+    return any(word in NEGATIONS for word in before[-NEGATION_WINDOW:])
+
+
+def screen(complaint):
+    """
+    (level, rationale) when the complaint text alone shows a level-1 or level-5
+    presentation from the triage prompt, else (None, None). Level 1 wins over
+    level 5, and a level-5 phrase next to a high-risk complaint is no flag.
+    """
+    if not complaint:
+        return None, None
+    text = str(complaint)
+    found = {}  # level (or None for alarms) -> reasons
+    for match in _SCREEN_RE.finditer(text):
+        if _negated(text, match.start()):
+            continue
+        name = match.lastgroup
+        if name == "sao2":
+            if int(match.group("sao2_value")) < SAO2_LEVEL_1_BELOW:
+                found.setdefault("1", []).append(f"SpO2 < {SAO2_LEVEL_1_BELOW}")
+            continue
+        reason, level, _ = PHRASES[int(name[1:])]
+        found.setdefault(level, []).append(reason)
+    if "1" in found:
+        level = "1"
+    elif "5" in found and None not in found:
+        level = "5"
+    else:
+        return None, None
+    reasons = ", ".join(dict.fromkeys(found[level]))
+    return level, f"Provisional level {level} from the complaint text ({reasons}); awaiting the triage agent."
@@ -1,96 +1,51 @@
 from pandas.core.missing import F
 import streamlit as st
-import requests
 import datetime
 import json
+import os
 import re
-import ast
-
-
-# def extract_patient_data(data):
-#     """
-#     Parses the specific n8n output formats like:
-#     [{'output': '[{\'output\': \'{\\n  "patient_id": 123456, ... }\'}]'}]
-#     or
-#     [{'output': '{\n  "patient_id": "er_0001",\n  "age": 0,\n ...\n}'}]
-
-#     Returns a clean Python dict, e.g.:
-#     {'patient_id': 123456, 'age': 29, ...}
-#     """
-#     try:
-#         # 1️⃣ Outer list
-#         if isinstance(data, list) and len(data) > 0:
-#             data = data[0]
-#         else:
-#             raise ValueError("Unexpected data format (not a list).")
-
-#         # 2️⃣ Get 'output' key (string containing list-like text)
-#         output_str = data.get("output")
-#         if not isinstance(output_str, str):
-#             raise ValueError("Missing or invalid 'output' key.")
-
-#         # 3️⃣ Convert the inner list-like string to a Python object
-#         # Use ast.literal_eval because it's not valid JSON (single quotes)
-#         inner_list = ast.literal_eval(output_str)
-#         if not inner_list or not isinstance(inner_list, list):
-#             raise ValueError("Inner 'output' is not a list.")
-
-#         inner_dict = inner_list[0]
-#         if not isinstance(inner_dict, dict) or "output" not in inner_dict:
-#             raise ValueError("Inner list item missing 'output' key.")
-
-#         # 4️⃣ Parse the final JSON string inside
-#         patient_json_str = inner_dict["output"]
-#         patient_data = json.loads(patient_json_str)
-
-#         return patient_data
-
-#     except Exception as e:
-#         print(f"❌ Failed to parse patient data: {e}")
-#         return {}
-
-def parse_structured_output_simulated_data(data):
-    """
-    Parses a list of the format:
-    [{'output': {'patient_id': '...', 'age': ..., 'arrival_time': '...', 'chief_complaint_and_reported_symptoms': '...'}}]
-    
-    Returns a dict with only the specified keys:
-    {'patient_id': ..., 'age': ..., 'chief_complaint_and_reported_symptoms': ...}
-    """
-    try:
-        # Check if data is a list and has at least one item
-        if not isinstance(data, list) or len(data) == 0:
-            raise ValueError("Data must be a non-empty list.")
-        
-        # Get the first item
-        first_item = data[0]
-        
-        # Check if it has an 'output' key
-        if not isinstance(first_item, dict) or 'output' not in first_item:
-            raise ValueError("First item must be a dict with an 'output' key.")
-        
-        # Get the output dict
-        output_dict = first_item['output']
-        
-        if not isinstance(output_dict, dict):
-            raise ValueError("'output' must be a dictionary.")
-        
-        # Extract only the requested keys
-        result = {
-            'patient_id': output_dict.get('patient_id'),
-            'age': output_dict.get('age'),
-            'chief_complaint_and_reported_symptoms': output_dict.get('chief_complaint_and_reported_symptoms')
-        }
-        
-        return result
-        
-    except Exception as e:
-        print(f"❌ Failed to parse patient data: {e}")
-        return {}
+import time
+import uuid
 
+from outbox import Outbox
+from patient_record import PROVISIONAL, PROVISIONAL_KEY_SUFFIX, idempotency_key
+from pre_triage import screen
+from synthetic_patients import PatientGenerator
 
 # ---- CONFIG ----
-API_URL = "https://lujein.app.n8n.cloud/webhook/reception"  
+API_URL = os.environ.get("N8N_RECEPTION_WEBHOOK_URL", "https://lujein.app.n8n.cloud/webhook/reception")
+# Provisional level-1/5 flags go straight to the nurse board's ingest API (ingest_api.py)
+INGEST_URL = os.environ.get("INGEST_API_URL", "http://localhost:8000/api/data")
+# Delivery status is shown for this many of the session's latest submissions
+SHOW_SUBMISSIONS = 5
+
+
+# Submissions wait here until n8n accepted them (survives n8n outages and restarts)
+OUTBOX_PATH = os.environ.get(
+    "RECEPTION_OUTBOX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "reception_outbox.sqlite3")
+)
+# Last simulated patient id, so a restarted server doesn't reuse ids the board already has
+SIMULATED_ID_PATH = os.path.join(os.path.dirname(OUTBOX_PATH), "reception_last_id")
+
+
+@st.cache_resource
+def get_sender():
+    """One outbox per server: every receptionist session shares it and its pooled connection to n8n."""
+    return Outbox(API_URL, OUTBOX_PATH)
+
+
+@st.cache_resource
+def get_provisional_sender():
+    """A separate outbox for the ingest API, so a provisional flag never waits behind an n8n outage."""
+    root, ext = os.path.splitext(OUTBOX_PATH)
+    return Outbox(INGEST_URL, f"{root}_provisional{ext}")
+
+
+@st.cache_resource
+def get_patient_generator():
+    """One generator per server, so simulated patient ids keep counting up across sessions (and restarts)."""
+    return PatientGenerator(id_path=SIMULATED_ID_PATH)
+
 
 st.set_page_config(page_title="ER Receptionist Prototype", page_icon="🏥", layout="centered")
 st.title("🏥 ER Receptionist Interface")
@@ -143,54 +98,50 @@ with col1:
             "arrival_time": str(st.session_state.arrival_time),
             "chief_complaint_and_reported_symptoms": st.session_state.chief_complaint_and_reported_symptoms,
             "simulate": False,
+            # Carried through n8n to the nurse board and the confirmation, for tracing and door-to-triage time
+            "correlation_id": uuid.uuid4().hex,
+            "submitted_at": time.time(),
         }
-        try:
-            response = requests.post(API_URL, json=data)
-            response.raise_for_status()
-            st.success(f"✅ Data sent successfully! (Status: {response.status_code})")
-
-        except requests.exceptions.RequestException as e:
-            st.error(f"❌ Failed to send data: {e}")
+        # Resends of this submission (outbox replays, double clicks) carry the same key; a corrected
+        # age or complaint gets a new one, so it is sent and replaces the patient's earlier submission
+        data["idempotency_key"] = idempotency_key(
+            data["patient_id"] or data["correlation_id"], data["arrival_time"], data["age"],
+            data["chief_complaint_and_reported_symptoms"],
+        )
+        notifications = st.session_state["_notifications"] = []
+        # Queued, not posted here: the run (and the receptionist) never waits on n8n
+        key = get_sender().submit(data, key=data["idempotency_key"])
+        # Obvious level 1/5 presentations reach the board now, marked provisional until the triage agent answers
+        level, rationale = screen(data["chief_complaint_and_reported_symptoms"])
+        if level is not None and data["patient_id"]:
+            provisional_key = data["idempotency_key"] + PROVISIONAL_KEY_SUFFIX
+            get_provisional_sender().submit({
+                **data, "triage level": level, "triaged?": PROVISIONAL,
+                "rational behind the triage classification": rationale, "idempotency_key": provisional_key,
+            }, key=provisional_key)
+            notifications.append(
+                ("error" if level == "1" else "info", f"Flagged on the nurse board as provisional level {level}."),
+            )
+        earlier = st.session_state.get("_submissions", [])
+        if data["patient_id"] and any(pid == data["patient_id"] and k != key for k, pid in earlier):
+            notifications.append(
+                ("warning", f"{data['patient_id']}: corrected details sent; they replace the earlier submission."),
+            )
+        elif any(k == key for k, _ in earlier):
+            notifications.append(
+                ("info", f"{data['patient_id'] or 'Patient'}: already submitted with these details; not sent again."),
+            )
+        submissions = [item for item in earlier if item[0] != key and item[1] != data["patient_id"]]
+        submissions.append((key, data["patient_id"]))
+        st.session_state["_submissions"] = submissions[-SHOW_SUBMISSIONS:]
 
 # --- Simulate button ---
 with col2:
     if st.button("Simulate Data"):
-        empty_data = {
-            "patient_id": "",
-            "age": 0,
-            "arrival_time": str(st.session_state.arrival_time),
-            "chief_complaint_and_reported_symptoms": "",
-            "simulate": True,
-        }
-        # Show request acknowledgment immediately
-        # st.success("✅ Simulated data requested! (sending…)")
-        # st.session_state.setdefault("_notifications", []).append(("success", "✅ Simulated data requested!"))
-
-        try:
-            response = requests.post(API_URL, json=empty_data)
-            response.raise_for_status()
-
-            # Parse and apply simulated data
-            try:
-                simulated_data = response.json()
-                print(f"simulated data {simulated_data}")
-            except ValueError:
-                st.error("❌ Failed to parse JSON from simulation response.")
-            else:
-                parsed = parse_structured_output_simulated_data(simulated_data)
-                # print(f"parsing result: {parsed}")
-                patient_id = parsed.get("patient_id")
-
-                if patient_id:
-                    print("patient id extracted!")
-                    # st.success(f"✅ Received simulated patient data from n8n! (Status: {response.status_code})")
-                    # st.session_state.setdefault("_notifications", []).append(("success", f"✅ Received simulated patient data from n8n! (Status: {response.status_code})"))
-                    # Defer populating fields until before widgets instantiate, then rerun so values appear
-                    st.session_state["_pending_fill"] = parsed
-                    st.rerun()
-
-        except requests.exceptions.RequestException as e:
-            st.error(f"❌ Failed to send simulation request: {e}")
+        # Generated locally (no n8n/LLM round trip); the fields fill in before the widgets on rerun
+        simulated = get_patient_generator().patient(st.session_state.arrival_time.strftime("%H:%M:%S"))
+        st.session_state["_pending_fill"] = simulated
+        st.rerun()
 
     # --- Render any persisted notifications under the Simulate button ---
     notifications = st.session_state.get("_notifications", [])
@@ -216,4 +167,32 @@ with col3:
             del st.session_state["_notifications"]
         st.rerun()
 
-        
\ No newline at end of file
+
+# --- Delivery status of this session's submissions ---
+def _render_submissions():
+    depth, oldest_s = get_sender().backlog()
+    if depth:
+        st.caption(f"Outbox: {depth} waiting to be sent, oldest for {oldest_s:.0f}s")
+    submissions = st.session_state.get("_submissions", [])[-SHOW_SUBMISSIONS:]
+    statuses = get_sender().statuses([key for key, _ in submissions])
+    for key, patient_id in reversed(submissions):
+        status = statuses.get(key)
+        if status is None:
+            continue  # aged out of the sender's statuses
+        if status["state"] == "sent":
+            st.success(f"✅ {patient_id or 'Patient'}: sent to triage")
+        elif status["state"] == "failed":
+            st.error(f"❌ {patient_id or 'Patient'}: could not be sent ({status['error']})")
+            if st.button("Retry", key=f"retry_{key}"):
+                get_sender().retry(key)
+                st.rerun(scope="fragment")
+        elif status["error"]:
+            st.warning(f"⏳ {patient_id or 'Patient'}: delayed, n8n unreachable; will keep retrying"
+                       f" (attempt {status['attempts']})")
+        else:
+            st.info(f"⏳ {patient_id or 'Patient'}: {status['state']}")
+
+
+# Refreshes on its own only while submissions are still on their way
+_in_flight = get_sender().pending() > 0
+st.fragment(run_every=1 if _in_flight else None)(_render_submissions)()
@@ -0,0 +1,273 @@
+import os
+import secrets
+import signal
+import sys
+import threading
+import time
+from multiprocessing.managers import BaseManager, BaseProxy
+
+from metrics import Metrics
+from patient_log import PatientLog
+from patient_store import PatientStore
+
+# --- Where the shared store listens (the ingest API workers and the nurse UI connect here) ---
+STORE_HOST = os.environ.get("PATIENT_STORE_HOST", "127.0.0.1")
+STORE_PORT = int(os.environ.get("PATIENT_STORE_PORT", "8765"))
+# Clients are trusted with the store (proxies unpickle, and __getattribute__ is exposed),
+# so the key is a secret: PATIENT_STORE_AUTHKEY, else one the store server generates
+# into a file only this user can read, which clients on the same machine pick up
+STORE_AUTHKEY_FILE = os.environ.get(
+    "PATIENT_STORE_AUTHKEY_FILE", os.path.join(os.path.dirname(os.path.abspath(__file__)), ".patient_store_key")
+)
+
+# --- Retention of confirmed patients ---
+ARCHIVE_MAX_COUNT = 500  # keep at most this many confirmed patients...
+ARCHIVE_MAX_AGE_S = 4 * 3600  # ...confirmed within this many seconds
+
+# --- Durable log (received patients and nurse confirmations survive restarts) ---
+PATIENT_LOG_DIR = os.environ.get(
+    "PATIENT_LOG_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "patient_log")
+)
+
+_store = None  # the one PatientStore, only ever created in the store server process
+_log = None
+_metrics = Metrics()  # the hot-path histograms every process reports into
+
+
+def _get_store():
+    global _store, _log
+    if _store is None:
+        _log = PatientLog(PATIENT_LOG_DIR)
+        _store = PatientStore(max_archived=ARCHIVE_MAX_COUNT, archive_max_age_s=ARCHIVE_MAX_AGE_S)
+        _store.attach_log(_log)
+        _store.attach_metrics(_metrics)
+    return _store
+
+
+def _get_metrics():
+    return _metrics
+
+
+class _PooledProxy(BaseProxy):
+    """
+    A proxy whose connections are pooled per process instead of kept per thread.
+
+    BaseProxy opens (and authenticates) a new connection for every thread that
+    calls it, and Streamlit runs each rerun and fragment run on a new thread, so
+    each of those would pay a connection setup. Here a call borrows an idle
+    connection (opening one only when all are busy) and gives it back after, so
+    any number of threads share a few connections.
+    """
+
+    _idle = {}  # server address -> idle connections
+    _idle_lock = threading.Lock()
+
+    def _callmethod(self, methodname, args=(), kwds={}):
+        address = self._token.address
+        with self._idle_lock:
+            idle = self._idle.setdefault(address, [])
+            if idle:
+                self._tls.connection = idle.pop()
+        reusable = False
+        try:
+            result = super()._callmethod(methodname, args, kwds)
+            reusable = True
+            return result
+        except (OSError, EOFError):
+            raise  # the connection broke; don't hand it out again
+        except Exception:
+            reusable = True  # an error raised by the store itself
+            raise
+        finally:
+            conn = getattr(self._tls, "connection", None)
+            if conn is not None:
+                del self._tls.connection
+                if reusable:
+                    with self._idle_lock:
+                        self._idle[address].append(conn)
+                else:
+                    conn.close()
+
+
+class StoreProxy(_PooledProxy):
+    """
+    Client side of the shared PatientStore: the same methods, each one a round
+    trip over the local socket (records come back pickled).
+
+    Connections are shared through a per-process pool (see _PooledProxy), so a
+    proxy can be used by the uvicorn worker threads and every Streamlit run.
+    """
+
+    _exposed_ = (
+        "__getattribute__", "__len__", "__contains__",
+        "add", "add_once", "confirm", "override", "get", "get_override", "get_level", "levels",
+        "is_confirmed", "active_count", "active", "top", "archived", "full_state", "changes_since",
+        "wait_for_change",
+    )
+
+    @property
+    def version(self):
+        return self._callmethod("__getattribute__", ("version",))
+
+    def __len__(self):
+        return self._callmethod("__len__")
+
+    def __contains__(self, patient_id):
+        return self._callmethod("__contains__", (patient_id,))
+
+    def add(self, record):
+        return self._callmethod("add", (record,))
+
+    def add_once(self, record):
+        return self._callmethod("add_once", (record,))
+
+    def confirm(self, patient_id, triage_level=None):
+        return self._callmethod("confirm", (patient_id, triage_level))
+
+    def override(self, patient_id, triage_level):
+        return self._callmethod("override", (patient_id, triage_level))
+
+    def get(self, patient_id):
+        return self._callmethod("get", (patient_id,))
+
+    def get_override(self, patient_id):
+        return self._callmethod("get_override", (patient_id,))
+
+    def get_level(self, patient_id):
+        return self._callmethod("get_level", (patient_id,))
+
+    def levels(self, patient_ids):
+        return self._callmethod("levels", (patient_ids,))
+
+    def is_confirmed(self, patient_id):
+        return self._callmethod("is_confirmed", (patient_id,))
+
+    def active_count(self):
+        return self._callmethod("active_count")
+
+    def active(self):
+        return self._callmethod("active")
+
+    def top(self, k=None):
+        return self._callmethod("top", (k,))
+
+    def archived(self):
+        return self._callmethod("archived")
+
+    def full_state(self):
+        return self._callmethod("full_state")
+
+    def changes_since(self, seq: int):
+        return self._callmethod("changes_since", (seq,))
+
+    def wait_for_change(self, seen_version: int, timeout: float):
+        return self._callmethod("wait_for_change", (seen_version, timeout))
+
+
+class MetricsProxy(_PooledProxy):
+    """Client side of the shared Metrics."""
+
+    _exposed_ = ("observe", "render")
+
+    def observe(self, name: str, value: float, label_value=None):
+        return self._callmethod("observe", (name, value, label_value))
+
+    def render(self):
+        return self._callmethod("render")
+
+
+class VersionWatcher:
+    """
+    The store's version, followed by one thread that blocks on wait_for_change(),
+    so pages that poll for changes read an attribute instead of each making a
+    round trip to the store server. Lags the store by at most one round trip.
+    """
+
+    def __init__(self, store, timeout_s: float = 15):
+        self.version = store.version
+        self._store = store
+        self._timeout_s = timeout_s
+        self._thread = threading.Thread(target=self._run, name="store-version-watcher", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        while True:
+            try:
+                self.version = self._store.wait_for_change(self.version, self._timeout_s)
+            except (OSError, EOFError):
+                time.sleep(1)  # store server restarting; pages keep the last version meanwhile
+
+
+class StoreManager(BaseManager):
+    pass
+
+
+StoreManager.register("patient_store", callable=_get_store, proxytype=StoreProxy)
+StoreManager.register("metrics", callable=_get_metrics, proxytype=MetricsProxy)
+
+
+def _authkey(create: bool = False):
+    """The store's key: PATIENT_STORE_AUTHKEY, else the key file (generated first when `create`), else None."""
+    key = os.environ.get("PATIENT_STORE_AUTHKEY")
+    if key:
+        return key.encode()
+    try:
+        with open(STORE_AUTHKEY_FILE, "rb") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        if not create:
+            return None
+    key = secrets.token_hex(32).encode()
+    try:
+        fd = os.open(STORE_AUTHKEY_FILE, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+    except FileExistsError:
+        return _authkey()  # another server generated it first
+    with os.fdopen(fd, "wb") as f:
+        f.write(key)
+    return key
+
+
+def connect(timeout_s: float = 0, shared="patient_store"):
+    """
+    A proxy for one of the store server's shared objects ("patient_store" gives a
+    StoreProxy, "metrics" a MetricsProxy), retrying for up to timeout_s.
+    Raises ConnectionError if no store server is listening.
+    """
+    deadline = time.monotonic() + timeout_s
+    while True:
+        try:
+            authkey = _authkey()
+            if authkey is None:
+                raise FileNotFoundError(f"no key in PATIENT_STORE_AUTHKEY or {STORE_AUTHKEY_FILE}")
+            manager = StoreManager(address=(STORE_HOST, STORE_PORT), authkey=authkey)
+            manager.connect()
+            return getattr(manager, shared)()
+        except OSError as e:
+            if time.monotonic() >= deadline:
+                raise ConnectionError(f"No patient store listening on {STORE_HOST}:{STORE_PORT}: {e}") from None
+            time.sleep(0.1)
+
+
+def is_running():
+    try:
+        connect()
+        return True
+    except ConnectionError:
+        return False
+
+
+def serve():
+    """Run the store server in this process until SIGINT/SIGTERM (the log is synced on the way out)."""
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(signum, lambda *_: sys.exit(0))
+    store = _get_store()
+    server = StoreManager(address=(STORE_HOST, STORE_PORT), authkey=_authkey(create=True)).get_server()
+    print(f"Patient store listening on {STORE_HOST}:{STORE_PORT} ({len(store)} patients from {PATIENT_LOG_DIR})")
+    try:
+        server.serve_forever()
+    finally:
+        _log.close()
+
+
+if __name__ == "__main__":
+    serve()
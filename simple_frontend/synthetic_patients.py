@@ -0,0 +1,320 @@
+"""
+Seeded synthetic ER patients, generated locally.
+
+Complaints come from the examples in the receptionist and triage prompts
+(with templated onset/pain variations), ages from the ESI vital-sign age bands,
+and arrival times from a Poisson process that follows a daily census curve,
+with occasional bursts (a bus crash, a flu wave hitting at once).
+
+Used by the receptionist's "Simulate Data" button and to drive load tests:
+
+    python synthetic_patients.py --count 5000 --url http://localhost:8000/api/data
+    python synthetic_patients.py --hours 24 --seed 7 --dry-run
+"""
+import argparse
+import datetime
+import functools
+import itertools
+import json
+import math
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+try:
+    from prompts import registry
+except ImportError:
+    # Run from simple_frontend/ (streamlit run, python synthetic_patients.py): prompts/ is next to it
+    sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+    from prompts import registry
+
+from vital_signs import AGE_BANDS, SAO2_DANGER_BELOW
+
+# Relative arrivals per hour of day: trough before dawn, late-morning and early-evening peaks
+HOURLY_PROFILE = [
+    0.45, 0.38, 0.32, 0.28, 0.26, 0.28, 0.40, 0.60, 0.85, 1.05, 1.20, 1.25,
+    1.22, 1.18, 1.15, 1.12, 1.10, 1.12, 1.18, 1.15, 1.05, 0.90, 0.72, 0.56,
+]
+_PROFILE_MEAN = sum(HOURLY_PROFILE) / len(HOURLY_PROFILE)
+
+# Share of patients per AGE_BANDS band (infants, toddlers, young children, everyone older)
+AGE_BAND_WEIGHTS = [0.02, 0.08, 0.08, 0.82]
+
+# ESI level mix for complaints whose level the prompts don't give
+ESI_WEIGHTS = {"1": 0.01, "2": 0.12, "3": 0.42, "4": 0.33, "5": 0.12}
+VITALS_NEEDED_SHARE = 0.3  # of level-3 patients, sent as "level 3 - Vital Signs Needed" with vitals
+DANGER_VITALS_SHARE = 0.25  # of those, vitals in the danger zone
+
+ONSETS = [
+    "", "", " Started about {n} hours ago.", " Since yesterday evening.", " Getting worse over the last {n} days.",
+    " Came on suddenly an hour ago.",
+]
+PAIN_SHARE = 0.3
+LEVEL_RATIONALE = {
+    "1": "Requires immediate life-saving intervention.",
+    "2": "High-risk situation; should not wait.",
+    "3": "Needs two or more resources.",
+    "4": "Needs one resource.",
+    "5": "Needs no resources (exam and prescription).",
+}
+
+
+def _receptionist_examples(prompt: str):
+    """(age, complaint, None) for every "- Age: ... Chief complaint ..." example."""
+    pattern = re.compile(
+        r"^- Age: (\d+)[^\n]*\n\s+Chief complaint and reported symptoms:(.+?)(?=^- Age:|\n\s*\n)", re.M | re.S
+    )
+    return [(int(age), " ".join(text.split()), None) for age, text in pattern.findall(prompt)]
+
+
+def _triage_examples(prompt: str):
+    """(age or None, complaint, level) for the example bullets of decision points A-C."""
+    examples = []
+    level = None
+    in_examples = False
+    for line in prompt.splitlines():
+        stripped = line.strip()
+        header = re.match(r"## Decision Point ([ABC])\b", stripped)
+        if header:
+            level = {"A": "1", "B": "2", "C": None}[header.group(1)]
+            in_examples = False
+        elif stripped == "Examples:":
+            in_examples = True
+        elif not stripped or stripped.startswith(("**", "---", "#", "Remark")):
+            in_examples = False
+        elif in_examples and stripped.startswith("•"):
+            text = stripped.lstrip("• ").rstrip(":").strip()
+            age = re.search(r"(\d+)-year-old", text)
+            months = re.search(r"(\d+)-month-old", text)
+            examples.append([int(age.group(1)) if age else 0 if months else None, text[0].upper() + text[1:], level])
+        elif in_examples and examples and (found := re.match(r"Level: (\d)\.", stripped)):
+            examples[-1][2] = found.group(1)  # decision point C gives the level on the next line
+    return [tuple(example) for example in examples]
+
+
+@functools.cache
+def complaints():
+    """(age, complaint, level) examples of the prompts, parsed on first use (the default variants hold them)."""
+    return (_receptionist_examples(registry.get("receptionist", "default").text)
+            + _triage_examples(registry.get("triage", "default").text))
+
+
+def _read_last_id(path: str) -> int:
+    try:
+        with open(path) as f:
+            return int(f.read().strip() or 0)
+    except (FileNotFoundError, ValueError):
+        return 0
+
+
+def _write_last_id(path: str, number: int):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(str(number))
+    os.replace(tmp_path, path)
+
+
+class PatientGenerator:
+    """
+    Reproducible stream of synthetic patients: the same seed gives the same
+    patients, ids and arrival times.
+
+    patient() makes one record; arrivals() yields arrival times from a
+    non-homogeneous Poisson process (patients_per_hour on average, shaped by
+    HOURLY_PROFILE, plus bursts_per_day clusters of 3-12 patients within a few
+    minutes); stream() combines the two.
+
+    Records are either the receptionist's intake fields or, with triaged=True,
+    a record shaped like the triage agent's output (what n8n posts to /api/data).
+
+    With id_path, the last id handed out is kept in that file and the next
+    generator continues after it, so ids don't repeat across restarts (the patient
+    store is keyed by id and would replace the earlier patient).
+    """
+
+    def __init__(self, seed=None, patients_per_hour: float = 12, bursts_per_day: float = 1,
+                 start: datetime.datetime = None, first_id: int = 1, id_path: str = None):
+        self.random = random.Random(seed)
+        self.patients_per_hour = patients_per_hour
+        self.bursts_per_day = bursts_per_day
+        self.start = start or datetime.datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+        self.id_path = id_path
+        if id_path is not None:
+            first_id = max(first_id, _read_last_id(id_path) + 1)
+        self._ids = itertools.count(first_id)
+        self._id_lock = threading.Lock()
+
+    # --- One patient ---
+    def patient(self, arrival_time=None, triaged: bool = False):
+        rng = self.random
+        age, complaint, level = rng.choice(complaints())
+        if age is None:
+            age = self._age()
+        elif f"{age}-year-old" not in complaint:  # keep ages the complaint spells out
+            age = self._jitter_age(age)
+        if level != "1":  # no "since yesterday" on a cardiac arrest
+            complaint = complaint.rstrip(".") + "." + rng.choice(ONSETS).format(n=rng.randint(2, 6))
+        if rng.random() < PAIN_SHARE and "pain" in complaint.lower():
+            complaint += f" Pain {rng.randint(3, 9)}/10."
+        with self._id_lock:
+            number = next(self._ids)
+            if self.id_path is not None:
+                _write_last_id(self.id_path, number)
+            patient_id = f"er_{number:04d}"
+        if isinstance(arrival_time, datetime.datetime):
+            arrival_time = arrival_time.strftime("%H:%M:%S")
+        arrival_time = arrival_time or datetime.datetime.now().strftime("%H:%M:%S")
+        if not triaged:
+            return {
+                "patient_id": patient_id,
+                "age": age,
+                "arrival_time": arrival_time,
+                "chief_complaint_and_reported_symptoms": complaint,
+            }
+
+        level = level or rng.choices(list(ESI_WEIGHTS), weights=list(ESI_WEIGHTS.values()))[0]
+        record = {
+            "patient id": patient_id,
+            "age": age,
+            "time of arrival": arrival_time,
+            "chief complaint and reported symptoms": complaint,
+            "triage level": level,
+            "triaged?": "YES",
+            "rational behind the triage classification": LEVEL_RATIONALE[level],
+        }
+        if level == "3" and rng.random() < VITALS_NEEDED_SHARE:
+            record["triage level"] = "level 3 - Vital Signs Needed"
+            record["triaged?"] = "PENDING"
+            record.update(self._vitals(age, danger=rng.random() < DANGER_VITALS_SHARE))
+        return record
+
+    def _age(self):
+        band = self.random.choices(range(len(AGE_BANDS)), weights=AGE_BAND_WEIGHTS)[0]
+        low = 0 if band == 0 else AGE_BANDS[band - 1][1] // 12
+        high = 0 if band == 0 else min(AGE_BANDS[band][1], 95 * 12) // 12 - 1
+        if band == len(AGE_BANDS) - 1:
+            return min(95, max(low, int(self.random.gauss(45, 22))))
+        return self.random.randint(low, max(low, high))
+
+    def _jitter_age(self, age):
+        if age < 18:
+            return max(0, age + self.random.randint(-1, 1))
+        return max(18, min(95, age + self.random.randint(-6, 6)))
+
+    def _vitals(self, age, danger: bool):
+        months = age * 12
+        _, _, hr_limit, rr_limit = next(band for band in AGE_BANDS if months < band[1])
+        rng = self.random
+        vitals = {"SpO2": rng.randint(SAO2_DANGER_BELOW + 2, 100), "heart rate": hr_limit - rng.randint(10, 35),
+                  "respiratory rate": rr_limit - rng.randint(2, 6)}
+        if danger:
+            key = rng.choice(list(vitals))
+            vitals[key] = {"SpO2": rng.randint(82, SAO2_DANGER_BELOW - 1), "heart rate": hr_limit + rng.randint(5, 40),
+                           "respiratory rate": rr_limit + rng.randint(2, 12)}[key]
+        return vitals
+
+    # --- Arrival times ---
+    def arrivals(self, hours: float = None):
+        """Arrival datetimes from `start` on (for `hours`, or without end)."""
+        rng = self.random
+        peak = self.patients_per_hour * max(HOURLY_PROFILE) / _PROFILE_MEAN
+        t = 0.0  # hours since start
+        start_hour = self.start.hour + self.start.minute / 60
+        next_burst = rng.expovariate(self.bursts_per_day / 24) if self.bursts_per_day else math.inf
+        while True:
+            # Thinning: candidates at the peak rate, kept with probability rate(t) / peak
+            t += rng.expovariate(peak)
+            if next_burst <= t:
+                burst_at = next_burst
+                cluster = sorted(burst_at + rng.uniform(0, 5) / 60 for _ in range(rng.randint(3, 12)))
+                for at in cluster:
+                    if hours is not None and at >= hours:
+                        return
+                    yield self.start + datetime.timedelta(hours=at)
+                next_burst = burst_at + rng.expovariate(self.bursts_per_day / 24)
+                t = max(t, cluster[-1])
+            if hours is not None and t >= hours:
+                return
+            rate = self.patients_per_hour * HOURLY_PROFILE[int(start_hour + t) % 24] / _PROFILE_MEAN
+            if rng.random() < rate / peak:
+                yield self.start + datetime.timedelta(hours=t)
+
+    def stream(self, count: int = None, hours: float = None, triaged: bool = True):
+        """(arrival datetime, record) pairs, for `count` patients and/or `hours` of arrivals."""
+        arrivals = self.arrivals(hours)
+        if count is not None:
+            arrivals = itertools.islice(arrivals, count)
+        for arrival in arrivals:
+            yield arrival, self.patient(arrival, triaged=triaged)
+
+
+def post_patients(url: str, stream, concurrency: int = 8, speed: float = 0, timeout: float = 10):
+    """
+    POST every record of `stream` ((arrival, record) pairs) to `url`, each stamped
+    with a correlation_id and submitted_at. speed=0 sends as fast as the API
+    answers; speed=60 replays the arrival times one simulated hour per minute.
+    Returns (sent, failed, seconds).
+    """
+    local = threading.local()
+    counts = {"sent": 0, "failed": 0}
+    lock = threading.Lock()
+
+    def send(record):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        record = {**record, "correlation_id": uuid.uuid4().hex, "submitted_at": time.time()}
+        try:
+            ok = session.post(url, json=record, timeout=timeout).ok
+        except requests.exceptions.RequestException:
+            ok = False
+        with lock:
+            counts["sent" if ok else "failed"] += 1
+
+    started = time.perf_counter()
+    first_arrival = None
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for arrival, record in stream:
+            if speed:
+                first_arrival = first_arrival or arrival
+                delay = (arrival - first_arrival).total_seconds() / speed - (time.perf_counter() - started)
+                if delay > 0:
+                    time.sleep(delay)
+            pool.submit(send, record)
+    return counts["sent"], counts["failed"], time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, help="number of patients (default: all arrivals in --hours)")
+    parser.add_argument("--hours", type=float, help="simulated hours of arrivals (default 24 without --count)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--per-hour", type=float, default=12, help="average arrivals per hour")
+    parser.add_argument("--bursts-per-day", type=float, default=1)
+    parser.add_argument("--intake", action="store_true", help="receptionist intake records instead of triaged ones")
+    parser.add_argument("--url", default="http://localhost:8000/api/data")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--speed", type=float, default=0, help="replay speed-up of arrival times (0 = no pacing)")
+    parser.add_argument("--dry-run", action="store_true", help="print JSON lines instead of posting")
+    args = parser.parse_args()
+    hours = args.hours if args.hours is not None or args.count is not None else 24
+
+    generator = PatientGenerator(args.seed, patients_per_hour=args.per_hour, bursts_per_day=args.bursts_per_day)
+    stream = generator.stream(count=args.count, hours=hours, triaged=not args.intake)
+    if args.dry_run:
+        for _, record in stream:
+            print(json.dumps(record))
+        return
+    sent, failed, seconds = post_patients(args.url, stream, concurrency=args.concurrency, speed=args.speed)
+    print(f"sent {sent:,} patients ({failed:,} failed) in {seconds:.1f}s: {sent / seconds:,.0f}/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+import math
+import re
+
+import numpy as np
+
+# --- Danger-zone vital signs (ESI Decision Point D) ---
+# The same table final_decision_agent_prompt and triage_agent_prompt give the LLM.
+SAO2_DANGER_BELOW = 92  # any patient: SaO2 < 92%
+
+# (label, upper age bound in months (exclusive), HR danger above, RR danger above)
+AGE_BANDS = [
+    ("less than 3 months old", 3, 180, 50),
+    ("3 months to 3 years old", 36, 160, 40),
+    ("3 to 8 years old", 108, 140, 30),  # up to (not including) the 9th birthday
+    ("more than 8 years old", math.inf, 100, 20),
+]
+_BAND_UPPER = np.array([band[1] for band in AGE_BANDS])
+_BAND_HR = np.array([band[2] for band in AGE_BANDS], dtype=float)
+_BAND_RR = np.array([band[3] for band in AGE_BANDS], dtype=float)
+
+# Under this age the prompts also ask for body temperature, which has no fixed
+# threshold, so those patients are only decided locally when they are in danger
+TEMPERATURE_CHECK_BELOW_MONTHS = 36
+
+LEVEL_2 = "2"
+LEVEL_3 = "3"
+
+_MONTHS_RE = re.compile(r"(\d+(?:\.\d+)?)\s*months?", re.IGNORECASE)
+
+
+def age_range_months(age):
+    """
+    (youngest, oldest) possible age in months. Ages are recorded in whole years, so
+    an age of 1 means 12-23 months; "0 (15 months - a baby)" style ages give the exact
+    months. Returns None if the age is missing or unreadable.
+    """
+    if age is None or (isinstance(age, float) and math.isnan(age)):
+        return None
+    if isinstance(age, str):
+        months = _MONTHS_RE.search(age)
+        if months:
+            value = float(months.group(1))
+            return value, value
+        try:
+            age = float(age.split()[0])
+        except (ValueError, IndexError):
+            return None
+    years = int(age)
+    return 12 * years, 12 * years + 11
+
+
+def _candidate_bands(age_range):
+    """Indices of the age bands an age range overlaps."""
+    if age_range is None:
+        return range(len(AGE_BANDS))
+    low, high = age_range
+    lower = 0
+    bands = []
+    for i, (_, upper, _, _) in enumerate(AGE_BANDS):
+        if low < upper and high >= lower:
+            bands.append(i)
+        lower = upper
+    return bands
+
+
+def _missing(value):
+    return value is None or (isinstance(value, float) and math.isnan(value))
+
+
+def classify(age=None, sao2=None, hr=None, rr=None):
+    """
+    Level 2 / level 3 decision for one initially level-3 patient.
+
+    Returns (level, rationale) where level is "2", "3", or None when the table
+    can't decide (missing vitals, an age that straddles bands with different
+    limits, or a child under 3 whose temperature still needs judging).
+    """
+    if not _missing(sao2) and sao2 < SAO2_DANGER_BELOW:
+        return LEVEL_2, f"SaO2 {sao2:g}% is below {SAO2_DANGER_BELOW}% (danger zone)."
+
+    age_range = age_range_months(age)
+    bands = _candidate_bands(age_range)
+    for name, value, limit_index in (("HR", hr, 2), ("RR", rr, 3)):
+        if _missing(value):
+            continue
+        limits = [AGE_BANDS[i][limit_index] for i in bands]
+        # Danger whichever band the patient is really in
+        if value > max(limits):
+            band = AGE_BANDS[bands[0]][0] if len(bands) == 1 else "this age"
+            return LEVEL_2, f"{name} {value:g} is above {max(limits)} for a patient {band} (danger zone)."
+
+    if _missing(sao2) or _missing(hr) or _missing(rr):
+        return None, "Vital signs incomplete."
+    if age_range is None or age_range[0] < TEMPERATURE_CHECK_BELOW_MONTHS:
+        return None, "Under 3 years (or age unknown): temperature needs review."
+    # Safe whichever band the patient is really in
+    if all(hr <= AGE_BANDS[i][2] and rr <= AGE_BANDS[i][3] for i in bands):
+        name = AGE_BANDS[bands[0]][0]
+        return LEVEL_3, f"SaO2 {sao2:g}%, HR {hr:g} and RR {rr:g} are within limits for a patient {name}."
+    return None, "Age straddles bands with different limits."
+
+
+def classify_batch(age_low_months, age_high_months, sao2, hr, rr):
+    """
+    Vectorized classify() over arrays (NaN = missing). Ages are given as the
+    (youngest, oldest) months from age_range_months().
+
+    Returns an int array: 2, 3, or 0 where the rules can't decide.
+    """
+    age_low = np.asarray(age_low_months, dtype=float)
+    age_high = np.asarray(age_high_months, dtype=float)
+    sao2, hr, rr = (np.asarray(v, dtype=float) for v in (sao2, hr, rr))
+    known_age = ~np.isnan(age_low)
+
+    # Band of the youngest and oldest possible age; limits are non-increasing with age,
+    # so the youngest band has the loosest limits and the oldest band the tightest
+    young = np.where(known_age, np.searchsorted(_BAND_UPPER, np.nan_to_num(age_low), side="right"), 0)
+    old = np.where(known_age, np.searchsorted(_BAND_UPPER, np.nan_to_num(age_high), side="right"), len(AGE_BANDS) - 1)
+    loosest_hr, loosest_rr = _BAND_HR[young], _BAND_RR[young]
+    tightest_hr, tightest_rr = _BAND_HR[old], _BAND_RR[old]
+
+    with np.errstate(invalid="ignore"):
+        danger = (sao2 < SAO2_DANGER_BELOW) | (hr > loosest_hr) | (rr > loosest_rr)
+        safe = (
+            (sao2 >= SAO2_DANGER_BELOW) & (hr <= tightest_hr) & (rr <= tightest_rr)
+            & known_age & (age_low >= TEMPERATURE_CHECK_BELOW_MONTHS)
+        )
+    return np.where(danger, 2, np.where(safe, 3, 0))
@@ -0,0 +1,55 @@
+import random
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# (connect, read) timeouts in seconds. Connecting fails fast when n8n is
+# unreachable; reading allows for a workflow that answers after its LLM step.
+CONNECT_TIMEOUT_S = 3.05
+READ_TIMEOUT_S = 30
+
+
+def pooled_session(pool_maxsize: int = 2):
+    """A requests.Session that keeps up to pool_maxsize connections per host alive (one TLS handshake each, not one per post)."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_maxsize)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def backoff_delay(attempt: int, backoff_s: float, max_backoff_s: float):
+    """
+    Seconds to wait before retry `attempt` (1, 2, ...): uniform between 0 and the
+    exponential backoff ("full jitter"), so senders that failed together don't retry together.
+    """
+    return random.uniform(0, min(backoff_s * 2 ** (attempt - 1), max_backoff_s))
+
+
+def post_with_retries(session, url: str, body, timeout=(CONNECT_TIMEOUT_S, READ_TIMEOUT_S), max_retries: int = 5,
+                      backoff_s: float = 0.5, max_backoff_s: float = 30, on_attempt=None):
+    """
+    POST `body` as JSON, retrying connection errors, timeouts, 5xx, 408 and 429
+    with jittered exponential backoff. on_attempt(n) is called before each try.
+    Returns (None, False) once the webhook accepted it, else (the last error,
+    whether a later retry could still succeed).
+    """
+    error = None
+    for attempt in range(max_retries + 1):
+        if attempt:
+            time.sleep(backoff_delay(attempt, backoff_s, max_backoff_s))
+        if on_attempt is not None:
+            on_attempt(attempt + 1)
+        try:
+            response = session.post(url, json=body, timeout=timeout)
+        except requests.exceptions.RequestException as e:
+            error = str(e)
+            continue
+        if response.ok:
+            return None, False
+        error = f"HTTP {response.status_code}"
+        # Client errors other than timeouts/throttling won't succeed on retry
+        if 400 <= response.status_code < 500 and response.status_code not in (408, 429):
+            return error, False
+    return error, True
@@ -0,0 +1,51 @@
+"""Confirmations that could not be delivered survive a restart, and a crashing delivery doesn't stop the worker."""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+import confirm_dispatcher  # noqa: E402
+from confirm_dispatcher import ConfirmDispatcher  # noqa: E402
+
+# Nothing listens on port 9: every post fails at once
+UNREACHABLE = "http://127.0.0.1:9/webhook"
+
+
+def _dispatcher(path):
+    return ConfirmDispatcher(UNREACHABLE, max_retries=0, batch_window_s=0, dead_letters_path=str(path))
+
+
+def _wait_for_dead_letters(dispatcher, count, timeout_s=5):
+    deadline = time.monotonic() + timeout_s
+    while len(dispatcher.dead_letters) < count and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return dispatcher.dead_letters
+
+
+def test_dead_letters_survive_a_restart(tmp_path):
+    path = tmp_path / "dead_letters.sqlite3"
+    dispatcher = _dispatcher(path)
+    dispatcher.submit({"patient_id": "er_0001", "triage_level": "Level 2"})
+    assert len(_wait_for_dead_letters(dispatcher, 1)) == 1
+
+    restarted = _dispatcher(path)
+    assert [item["payloads"] for item in restarted.dead_letters] == [[{"patient_id": "er_0001", "triage_level": "Level 2"}]]
+
+    # Retried, it fails again: stored once, not on top of the earlier copy
+    assert restarted.retry_dead_letters() == 1
+    assert len(_wait_for_dead_letters(restarted, 1)) == 1
+    assert len(_dispatcher(path).dead_letters) == 1
+
+
+def test_worker_survives_a_crashing_delivery(tmp_path, monkeypatch):
+    def crash(*args, **kwargs):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(confirm_dispatcher, "post_with_retries", crash)
+    dispatcher = _dispatcher(tmp_path / "dead_letters.sqlite3")
+    dispatcher.submit({"patient_id": "er_0001"})
+    dispatcher.submit({"patient_id": "er_0002"})
+    dead = _wait_for_dead_letters(dispatcher, 2)
+    assert [item["payloads"][0]["patient_id"] for item in dead] == ["er_0001", "er_0002"]
+    assert "boom" in dead[0]["error"]
@@ -0,0 +1,58 @@
+"""Table-driven checks of the receptionist's keyword screen (pre_triage.screen)."""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+from pre_triage import screen  # noqa: E402
+
+# (complaint, expected level)
+CASES = [
+    # Level 1 (Decision Point A)
+    ("Patient in cardiac arrest, CPR in progress.", "1"),
+    ("Found unresponsive on the floor.", "1"),
+    ("Husband says she can't be woken up.", "1"),
+    ("Known peanut allergy, anaphylactic reaction.", "1"),
+    ("Floppy baby, mother worried.", "1"),
+    ("Baby not breathing, turning blue.", "1"),
+    ("Not breathing well since last night.", None),  # breathing difficulty, not apnea
+    ("Shortness of breath, SpO2 of 85.", "1"),
+    ("Shortness of breath, sats 94.", None),
+    ("Shortness of breath, SpO2 90.", None),
+    # Level 5 (Decision Point C, no resources)
+    ("Poison ivy on both forearms.", "5"),
+    ("Needs a prescription refill.", "5"),
+    ("Ran out of her blood pressure pills.", "5"),
+    # Negation, within the same clause only
+    ("No chest pain. Poison ivy on the arms.", "5"),
+    ("Denies being unresponsive at any point.", None),
+    ("Not breathing properly? Poison ivy rash.", None),
+    ("Fell, no loss of consciousness, now unconscious.", "1"),
+    ("Was not unconscious, poison ivy on legs.", "5"),
+    # A level-5 phrase next to an alarm complaint is no flag...
+    ("Poison ivy rash and chest pain.", None),
+    ("Ran out of meds, now confused.", None),
+    ("Medication refill, fainted this morning.", None),
+    # ...but level 1 still wins over both
+    ("Chest pain, then became unresponsive. Poison ivy on hands.", "1"),
+    # Nothing the screen knows
+    ("Sprained ankle playing football.", None),
+    ("", None),
+    (None, None),
+]
+
+
+@pytest.mark.parametrize("complaint, expected", CASES)
+def test_screen(complaint, expected):
+    level, rationale = screen(complaint)
+    assert level == expected, rationale
+    assert (rationale is None) == (level is None)
+
+
+def test_rationale_names_the_reasons_once():
+    level, rationale = screen("Unresponsive. Unconscious and unresponsive, SpO2 80.")
+    assert level == "1"
+    assert rationale.count("unresponsive") == 1
+    assert "SpO2 < 90" in rationale
@@ -0,0 +1,48 @@
+"""A receptionist's corrected resubmission reaches the board; a plain resend doesn't duplicate."""
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+from outbox import Outbox  # noqa: E402
+from patient_record import PatientRecord, idempotency_key  # noqa: E402
+from patient_store import PatientStore  # noqa: E402
+
+
+def _submission(complaint, age=42):
+    data = {
+        "patient_id": "er_0007", "age": age, "arrival_time": "14:02:11",
+        "chief_complaint_and_reported_symptoms": complaint,
+    }
+    data["idempotency_key"] = idempotency_key(data["patient_id"], data["arrival_time"], age, complaint)
+    return data
+
+
+def test_key_changes_with_the_presentation_only():
+    first = _submission("Ankle pain after a fall.")
+    assert _submission("Ankle pain after a fall.")["idempotency_key"] == first["idempotency_key"]
+    assert _submission("Chest pain after a fall.")["idempotency_key"] != first["idempotency_key"]
+    assert _submission("Ankle pain after a fall.", age=24)["idempotency_key"] != first["idempotency_key"]
+
+
+def test_outbox_queues_a_corrected_resubmission(tmp_path):
+    # Nothing listens on port 9: every payload stays queued
+    outbox = Outbox("http://127.0.0.1:9/webhook", str(tmp_path / "outbox.sqlite3"), max_retries=0)
+    first, resend, corrected = (_submission("Ankle pain after a fall."), _submission("Ankle pain after a fall."),
+                                _submission("Chest pain after a fall."))
+    for data in (first, resend, corrected):
+        outbox.submit(data, key=data["idempotency_key"])
+    assert outbox.pending() == 2
+    assert set(outbox.statuses([first["idempotency_key"], corrected["idempotency_key"]])) == {
+        first["idempotency_key"], corrected["idempotency_key"],
+    }
+
+
+def test_store_replaces_the_patient_with_the_corrected_presentation():
+    store = PatientStore()
+    first, corrected = _submission("Ankle pain after a fall."), _submission("Chest pain after a fall.")
+    assert store.add_once(PatientRecord.from_payload(first)) == ("er_0007", True)
+    assert store.add_once(PatientRecord.from_payload(first)) == ("er_0007", False)
+    assert store.add_once(PatientRecord.from_payload(corrected)) == ("er_0007", True)
+    assert len(store) == 1
+    assert store.get("er_0007").complaint == "Chest pain after a fall."
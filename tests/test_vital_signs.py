@@ -0,0 +1,91 @@
+"""Table-driven checks of the danger-zone rules (vital_signs.classify / classify_batch)."""
+import itertools
+import math
+import os
+import sys
+
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "simple_frontend"))
+
+from vital_signs import age_range_months, classify, classify_batch  # noqa: E402
+
+# (age, sao2, hr, rr, expected level)
+CASES = [
+    # SaO2 alone decides danger, at any age
+    (40, 91, 80, 16, "2"),
+    (40, 92, 80, 16, "3"),
+    (None, 91, None, None, "2"),
+    # 35 months: "3 months to 3 years" limits (HR 160, RR 40); under 3 years is never settled as level 3
+    ("0 (35 months)", 98, 160, 40, None),
+    ("0 (35 months)", 98, 161, 20, "2"),
+    ("0 (35 months)", 98, 120, 41, "2"),
+    # 36 months: "3 to 8 years" limits (HR 140, RR 30)
+    ("0 (36 months)", 98, 140, 30, "3"),
+    ("0 (36 months)", 98, 141, 20, "2"),
+    ("0 (36 months)", 98, 120, 31, "2"),
+    # 107 months: still "3 to 8 years"
+    ("0 (107 months)", 98, 140, 30, "3"),
+    ("0 (107 months)", 98, 141, 20, "2"),
+    # 108 months (the 9th birthday): adult limits (HR 100, RR 20)
+    ("0 (108 months)", 98, 100, 20, "3"),
+    ("0 (108 months)", 98, 101, 16, "2"),
+    ("0 (108 months)", 98, 80, 21, "2"),
+    # Whole years: 8 is 96-107 months, 9 is 108-119
+    (8, 98, 140, 30, "3"),
+    (9, 98, 140, 20, "2"),
+    # Age 0 straddles "under 3 months" (HR 180) and "3 months to 3 years" (HR 160): HR 170 is danger
+    # in only one of them, so the table can't decide; above both limits it can
+    (0, 98, 170, 30, None),
+    (0, 98, 181, 30, "2"),
+    # Unknown age: danger only above every band's limit, never settled as level 3
+    (None, 98, 170, 30, None),
+    (None, 98, 181, 30, "2"),
+    ("unknown", 98, 80, 16, None),
+    # Missing vitals
+    (40, 98, None, 16, None),
+    (40, None, 80, 16, None),
+    (40, math.nan, 80, 16, None),
+]
+
+
+@pytest.mark.parametrize("age, sao2, hr, rr, expected", CASES)
+def test_classify(age, sao2, hr, rr, expected):
+    level, rationale = classify(age, sao2, hr, rr)
+    assert level == expected, rationale
+
+
+@pytest.mark.parametrize("age, expected", [
+    (1, (12, 23)),
+    ("42", (504, 515)),
+    ("0 (15 months - a baby)", (15, 15)),
+    (None, None),
+    ("unknown", None),
+])
+def test_age_range_months(age, expected):
+    assert age_range_months(age) == expected
+
+
+def _batch_level(age, sao2, hr, rr):
+    age_range = age_range_months(age) or (math.nan, math.nan)
+    values = [math.nan if v is None else v for v in (sao2, hr, rr)]
+    return int(classify_batch([age_range[0]], [age_range[1]], *[[v] for v in values])[0])
+
+
+@pytest.mark.parametrize("age, sao2, hr, rr, expected", CASES)
+def test_classify_batch_matches_table(age, sao2, hr, rr, expected):
+    assert _batch_level(age, sao2, hr, rr) == (0 if expected is None else int(expected))
+
+
+def test_classify_and_classify_batch_agree():
+    ages = [None, 0, 1, 2, 3, 8, 9, 40, "0 (2 months)", "0 (3 months)", "0 (35 months)", "0 (36 months)",
+            "0 (107 months)", "0 (108 months)"]
+    grid = list(itertools.product(ages, [None, 91, 92, 98], [None, 100, 101, 140, 141, 160, 161, 180, 181],
+                                  [None, 20, 21, 30, 31, 40, 41, 50, 51]))
+    ranges = [age_range_months(age) or (math.nan, math.nan) for age, _, _, _ in grid]
+    columns = [[math.nan if row[i] is None else row[i] for row in grid] for i in (1, 2, 3)]
+    batch = classify_batch([r[0] for r in ranges], [r[1] for r in ranges], *columns)
+    single = np.array([int(classify(*row)[0] or 0) for row in grid])
+    mismatches = [(row, single[i], batch[i]) for i, row in enumerate(grid) if single[i] != batch[i]]
+    assert not mismatches, mismatches[:5]
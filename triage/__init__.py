@@ -0,0 +1,8 @@
+"""
+Batching and caching in front of the triage LLM (see TriageBatcher, TriageCache).
+
+Not called from production yet: triage runs in the n8n workflow, and these are
+exercised by bench/bench_triage_batching.py until that path moves here.
+"""
+from .batcher import TriageBatcher, parse_llm_json, patient_id_of
+from .cache import TriageCache, age_band
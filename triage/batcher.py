@@ -0,0 +1,220 @@
+import json
+import queue
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from prompts import build_triage_batch_prompt, build_triage_prompt, triage_prompt_version
+
+PATIENT_ID_KEYS = ("patient id", "patient_id", "id")
+_FENCE_RE = re.compile(r"^\s*```(?:json)?\s*|\s*```\s*$")
+
+
+def patient_id_of(record: dict):
+    for key in PATIENT_ID_KEYS:
+        if record.get(key) not in (None, ""):
+            return str(record[key])
+    return None
+
+
+def parse_llm_json(text: str):
+    """JSON from an LLM reply, tolerating ```json fences and chatter around the payload."""
+    text = _FENCE_RE.sub("", text)
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    starts = [i for i in (text.find("["), text.find("{")) if i >= 0]
+    if not starts:
+        raise ValueError("No JSON in LLM reply.")
+    start = min(starts)
+    end = text.rfind("]" if text[start] == "[" else "}")
+    return json.loads(text[start:end + 1])
+
+
+def _is_triage_record(item):
+    return isinstance(item, dict) and patient_id_of(item) is not None and item.get("triage level") not in (None, "")
+
+
+class TriageBatcher:
+    """
+    Micro-batching stage in front of the triage LLM.
+
+    submit() queues a patient and returns a Future for its triage record. A
+    collector thread groups arrivals for up to max_wait_ms or max_batch patients,
+    sends one batched prompt (prompts.build_triage_batch_prompt, JSON-array output)
+    and resolves each Future with the array item carrying that patient's id.
+    Patients whose item is missing or malformed are retried one by one with the
+    single-patient prompt; when the batched call itself fails (an LLM outage),
+    every patient in it gets that error instead. Up to max_in_flight LLM calls
+    run concurrently.
+    With handbook_passages=k, prompts use the core rules plus the k handbook
+    passages retrieved for each patient's complaint.
+
+    Every triage record is stamped with the "prompt_version" of the prompt
+    that produced it (see prompts.registry); under an A/B split, patients routed
+    to different variants are never batched together.
+
+    With a cache (triage.TriageCache), submit() answers a cached presentation
+    right away, and a patient whose presentation is already on its way to the
+    LLM waits for that reply instead of being sent again.
+
+    call_llm(parts: PromptParts) -> str is whatever talks to the model.
+    """
+
+    def __init__(self, call_llm, max_batch: int = 10, max_wait_ms: float = 200, max_in_flight: int = 4,
+                 stats=None, handbook_passages: int = 0, cache=None):
+        self.call_llm = call_llm
+        self.handbook_passages = handbook_passages
+        self.cache = cache
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000
+        self.stats = stats
+        self.batches = 0
+        self.fallbacks = 0
+        self.coalesced = 0
+        self._waiting = {}  # cache key in flight -> [(patient, future)] waiting for its reply
+        self._lock = threading.Lock()
+        self._queue = queue.Queue()
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="triage-llm")
+        self._collector = threading.Thread(target=self._collect, name="triage-batcher", daemon=True)
+        self._collector.start()
+
+    def submit(self, patient: dict) -> Future:
+        future = Future()
+        if self.cache is not None:
+            reply = self.cache.get(patient)
+            if reply is not None:
+                future.set_result(reply)
+                return future
+            key = self.cache.key(patient)
+            with self._lock:
+                waiting = self._waiting.get(key)
+                if waiting is not None:
+                    self.coalesced += 1
+                    waiting.append((patient, future))
+                    return future
+                self._waiting[key] = []
+        self._queue.put((patient, future))
+        return future
+
+    def triage(self, patient: dict, timeout: float = None) -> dict:
+        """Blocking convenience wrapper around submit()."""
+        return self.submit(patient).result(timeout)
+
+    def close(self):
+        self._queue.put(None)
+        self._collector.join()
+        self._pool.shutdown(wait=True)
+
+    # --- Internals ---
+    def _collect(self):
+        while True:
+            first = self._queue.get()
+            if first is None:
+                return
+            batch = [first]
+            deadline = time.monotonic() + self.max_wait_s
+            closing = False
+            while len(batch) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    closing = True
+                    break
+                batch.append(item)
+            self._pool.submit(self._run_batch, batch)
+            if closing:
+                return
+
+    def _run_batch(self, batch):
+        # A batch shares one prompt, so under an A/B split of the triage prompt
+        # each arm's patients go in their own request
+        arms = {}
+        for patient, future in batch:
+            version = triage_prompt_version(self.handbook_passages, patient=patient)
+            arms.setdefault(version, []).append((patient, future))
+        for arm in arms.values():
+            self._run_arm(arm)
+
+    def _run_arm(self, batch):
+        if len(batch) == 1:
+            self._run_single(*batch[0])
+            return
+        self.batches += 1
+        try:
+            try:
+                parts = build_triage_batch_prompt([patient for patient, _ in batch], self.stats,
+                                                  self.handbook_passages)
+                reply = self.call_llm(parts)
+            except Exception as e:
+                # The LLM is failing (an outage, a timeout): sending every patient again
+                # on their own would only multiply the load on it
+                for patient, future in batch:
+                    self._resolve(patient, future, error=e)
+                return
+            try:
+                items = parse_llm_json(reply)
+            except ValueError:
+                items = []  # unreadable reply: every patient is retried alone below
+            if isinstance(items, dict):
+                items = [items]
+            by_id = {patient_id_of(item): item for item in items if _is_triage_record(item)} if isinstance(items, list) else {}
+            leftovers = []
+            for patient, future in batch:
+                item = by_id.get(patient_id_of(patient))
+                if item is None:
+                    leftovers.append((patient, future))
+                else:
+                    item.setdefault("prompt_version", parts.version)
+                    self._resolve(patient, future, item)
+            for patient, future in leftovers:
+                self.fallbacks += 1
+                self._run_single(patient, future)
+        except Exception as e:
+            # Whatever went wrong above, no patient's Future is left waiting
+            for patient, future in batch:
+                if not future.done():
+                    self._resolve(patient, future, error=e)
+
+    def _run_single(self, patient, future):
+        try:
+            parts = build_triage_prompt(patient, self.stats, self.handbook_passages)
+            item = parse_llm_json(self.call_llm(parts))
+            if isinstance(item, list) and len(item) == 1:
+                item = item[0]
+            if not isinstance(item, dict):
+                raise ValueError("Triage reply is not a JSON object.")
+            item.setdefault("prompt_version", parts.version)
+        except Exception as e:
+            self._resolve(patient, future, error=e)
+            return
+        self._resolve(patient, future, item)
+
+    def _resolve(self, patient, future, item=None, error=None):
+        """Settle a patient's Future and those of the duplicates that waited for it."""
+        waiting = []
+        if self.cache is not None:
+            if error is None and _is_triage_record(item):
+                try:
+                    self.cache.put(patient, item)
+                except Exception:
+                    pass  # an uncacheable reply is still this patient's reply
+            with self._lock:
+                waiting = self._waiting.pop(self.cache.key(patient), [])
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(item)
+        for other, other_future in waiting:
+            reply = self.cache.get(other, count=False) if error is None else None  # counted as a miss in submit()
+            if reply is None:
+                other_future.set_exception(error or ValueError("Triage reply is not a triage record."))
+            else:
+                other_future.set_result(reply)
@@ -0,0 +1,260 @@
+import math
+import re
+import sys
+import threading
+import time
+import zlib
+from collections import OrderedDict
+
+import numpy as np
+
+# Fields that identify the visit rather than the presentation; they never take part in the key
+IDENTITY_KEYS = {
+    "patient id", "patient_id", "id", "time of arrival", "arrival_time", "correlation_id", "submitted_at",
+    "idempotency_key",
+}
+COMPLAINT_KEYS = ("chief_complaint_and_reported_symptoms", "chief complaint and reported symptoms", "complaint")
+# Fields of the triage reply that describe the patient; a hit takes them from the new patient instead
+_PATIENT_FIELDS = {
+    "patient id": ("patient_id", "patient id", "id"),
+    "age": ("age",),
+    "time of arrival": ("arrival_time", "time of arrival"),
+    "chief complaint and reported symptoms": COMPLAINT_KEYS,
+}
+
+# (label, upper bound in years): the pediatric vital-sign bands of the prompt, then adults and elderly
+AGE_BANDS = [("under 1", 1), ("1-2", 3), ("3-8", 9), ("9-17", 18), ("18-64", 65), ("65+", math.inf)]
+_YOUNGER_THAN_A_YEAR_RE = re.compile(r"\b(?:months?|weeks?|days?|newborn)\b", re.IGNORECASE)
+
+_WORD_RE = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+# Words that flip or quantify a finding: near-duplicates must agree on all of them
+_GUARD_WORDS = {"no", "not", "denies", "without", "never", "none", "nor", "negative"}
+
+
+def age_band(age) -> str:
+    """The AGE_BANDS label of an age in years ("2 months"-style ages are under 1), or "unknown"."""
+    if age is None or (isinstance(age, float) and math.isnan(age)):
+        return "unknown"
+    if isinstance(age, str):
+        if _YOUNGER_THAN_A_YEAR_RE.search(age):
+            return AGE_BANDS[0][0]
+        try:
+            age = float(age.split()[0])
+        except (ValueError, IndexError):
+            return "unknown"
+    for label, upper in AGE_BANDS:
+        if age < upper:
+            return label
+    return "unknown"
+
+
+def complaint_words(complaint) -> list:
+    """The complaint lowercased and stripped of punctuation, as words in their original order."""
+    return _WORD_RE.findall(str(complaint or "").lower())
+
+
+class TriageCache:
+    """
+    Triage results by presentation, so the same complaint at the same age band
+    (webhook resends, the tenth "Poison ivy on extremities" of the day) doesn't
+    go back to the LLM.
+
+    The key is the triage prompt version, the age band and the normalized complaint
+    (lowercase words, punctuation dropped, word order kept so "no fever, cough" and
+    "fever, no cough" stay apart), plus any other clinical fields of the record such
+    as vital signs. Identity fields (id, arrival time, tracing) are left out.
+    prompt_version is the version string, or a function of the patient giving the
+    version that patient's prompt has (prompts.triage_prompt_version(patient=...)),
+    so the arms of an A/B split of the triage prompt never share results.
+
+    With near_duplicates=True a miss also looks for an entry with the same version,
+    age band, other fields, numbers and negations whose word-trigram MinHash
+    similarity is at least `threshold`, found through LSH bands rather than a scan.
+
+    Entries live ttl_s seconds and at most max_entries are kept, least recently used
+    evicted first. A hit is the stored reply with the new patient's id, arrival time
+    and complaint, flagged in "triage_cache" and in the rationale: the nurse reviews
+    it like any other triage. report() gives hit ratio and memory use.
+    """
+
+    def __init__(self, prompt_version, max_entries: int = 1024, ttl_s: float = 3600,
+                 near_duplicates: bool = True, threshold: float = 0.85, num_perm: int = 64, bands: int = 16):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands.")
+        self.prompt_version = prompt_version
+        self.max_entries = max_entries
+        self.ttl_s = ttl_s
+        self.near_duplicates = near_duplicates
+        self.threshold = threshold
+        self.bands = bands
+        self.exact_hits = 0
+        self.near_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        # Multiply-shift hash functions, one per permutation (uint64 arithmetic wraps)
+        rng = np.random.default_rng(0)
+        self._a = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64) * np.uint64(2) + np.uint64(1)
+        self._b = rng.integers(0, 1 << 63, num_perm, dtype=np.uint64)
+        self._entries = OrderedDict()  # key -> (expires_at, reply, signature, bucket, nbytes)
+        self._lsh = {}  # (bucket, band, band bytes) -> set of keys
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    # --- Keys ---
+    def key(self, patient: dict):
+        """(prompt version, age band, other clinical fields, normalized complaint) for a patient record."""
+        complaint = next((patient[key] for key in COMPLAINT_KEYS if patient.get(key)), "")
+        others = tuple(sorted(
+            (key, str(value)) for key, value in patient.items()
+            if key not in IDENTITY_KEYS and key not in COMPLAINT_KEYS and key != "age" and value not in (None, "")
+        ))
+        version = self.prompt_version(patient) if callable(self.prompt_version) else self.prompt_version
+        return version, age_band(patient.get("age")), others, " ".join(complaint_words(complaint))
+
+    def _signature(self, words):
+        shingles = {" ".join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))}
+        hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+        return ((np.outer(hashes, self._a) + self._b) >> np.uint64(32)).min(axis=0)
+
+    @staticmethod
+    def _bucket(key):
+        """What near-duplicates must share exactly: everything but the wording, plus numbers and negations."""
+        version, band, others, complaint = key
+        guards = tuple(word for word in complaint.split() if word in _GUARD_WORDS or word[0].isdigit())
+        return version, band, others, guards
+
+    def _bands(self, signature):
+        return [(i, signature[i::self.bands].tobytes()) for i in range(self.bands)]
+
+    # --- Lookups ---
+    def get(self, patient: dict, count: bool = True):
+        """
+        The cached triage reply for this patient, adapted to them, or None.
+        count=False leaves the hit/miss counters alone.
+        """
+        key = self.key(patient)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._live(key, now)
+            if entry is not None:
+                self.exact_hits += count
+                return self._adapt(entry[1], patient, "exact", 1.0)
+            if self.near_duplicates and key[3]:
+                match = self._nearest(key, now)
+                if match is not None:
+                    similarity, entry = match
+                    self.near_hits += count
+                    return self._adapt(entry[1], patient, "similar", similarity)
+            self.misses += count
+        return None
+
+    def put(self, patient: dict, reply: dict):
+        """Remember the LLM's triage reply for this patient's presentation."""
+        key = self.key(patient)
+        stored = {
+            field: value for field, value in reply.items()
+            if field not in _PATIENT_FIELDS and field not in IDENTITY_KEYS and field not in COMPLAINT_KEYS
+        }
+        signature = self._signature(key[3].split()) if self.near_duplicates and key[3] else None
+        bucket = self._bucket(key)
+        nbytes = _size(key) + _size(stored) + (signature.nbytes if signature is not None else 0)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic() + self.ttl_s, stored, signature, bucket, nbytes)
+            self._nbytes += nbytes
+            if signature is not None:
+                for band in self._bands(signature):
+                    self._lsh.setdefault((bucket, *band), set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._lsh.clear()
+            self._nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def report(self):
+        with self._lock:
+            lookups = self.exact_hits + self.near_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "lookups": lookups,
+                "exact_hits": self.exact_hits,
+                "near_hits": self.near_hits,
+                "misses": self.misses,
+                "hit_ratio": (self.exact_hits + self.near_hits) / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "memory_bytes": self._nbytes + sum(map(sys.getsizeof, (self._entries, self._lsh)))
+                + sum(sys.getsizeof(keys) for keys in self._lsh.values()),
+            }
+
+    # --- Internals (called with the lock held) ---
+    def _live(self, key, now):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            self._remove(key)
+            self.expirations += 1
+            return None
+        self._entries.move_to_end(key)
+        return entry
+
+    def _nearest(self, key, now):
+        signature = self._signature(key[3].split())
+        bucket = self._bucket(key)
+        candidates = set()
+        for band in self._bands(signature):
+            candidates.update(self._lsh.get((bucket, *band), ()))
+        best = None
+        for candidate in candidates:
+            entry = self._live(candidate, now)
+            if entry is None:
+                continue
+            similarity = float(np.mean(entry[2] == signature))
+            if similarity >= self.threshold and (best is None or similarity > best[0]):
+                best = similarity, entry
+        return best
+
+    def _remove(self, key):
+        _, _, signature, bucket, nbytes = self._entries.pop(key)
+        self._nbytes -= nbytes
+        if signature is not None:
+            for band in self._bands(signature):
+                keys = self._lsh.get((bucket, *band))
+                if keys is not None:
+                    keys.discard(key)
+                    if not keys:
+                        del self._lsh[(bucket, *band)]
+
+    @staticmethod
+    def _adapt(stored, patient, match, similarity):
+        reply = dict(stored)
+        for field, keys in _PATIENT_FIELDS.items():
+            value = next((patient[key] for key in keys if patient.get(key) not in (None, "")), None)
+            if value is not None:
+                reply[field] = value
+        note = "Same presentation" if match == "exact" else f"Similar presentation ({similarity:.0%})"
+        rationale = reply.get("rational behind the triage classification") or ""
+        reply["rational behind the triage classification"] = (
+            f"[{note} as an earlier patient, triage reused - review before confirming] {rationale}"
+        ).strip()
+        reply["triage_cache"] = match if match == "exact" else f"{match} ({similarity:.2f})"
+        return reply
+
+
+def _size(value):
+    """Approximate deep size in bytes of the str/number/tuple/dict values a cache entry holds."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(_size(k) + _size(v) for k, v in value.items())
+    if isinstance(value, (tuple, list)):
+        return sys.getsizeof(value) + sum(map(_size, value))
+    return sys.getsizeof(value)